@@ -0,0 +1,123 @@
+# call_stack.py
+#
+# Variable storage of the TAC interpreter. Every variable name of a linked
+# program has a slot number (LinkedProgram.variables is the list of names in
+# slot order), and each call frame keeps its variables in a list indexed by
+# slot, with UNBOUND where the frame has no variable of that name.
+#
+# Minima variables are scoped dynamically: a name resolves to the innermost
+# frame on the stack that has it. Rather than searching the frames for it,
+# CallStack keeps visible[slot], the value list of the frame holding that
+# innermost binding, so a read is visible[slot][slot] whatever the call
+# depth. A frame records the entries of visible it replaces as it binds
+# names, and puts them back when it is popped. The global frame has every
+# slot and is what visible starts out pointing at, so it never needs to.
+#
+# scope() and scopes() give the old dict view of the frames, for the debug
+# traces and anything else that wants variables by name.
+
+# Value of a slot the frame has no variable for
+UNBOUND = object()
+
+
+class Frame:
+    """
+    One call of a function (or the global scope, at the bottom of the
+    stack): its variables by slot, the (slot, value list) entries of
+    CallStack.visible it has replaced in binding order, and where the call
+    returns to.
+    """
+    __slots__ = ('values', 'shadowed', 'return_ip', 'target_var')
+
+    def __init__(self, size, return_ip=None, target_var=None):
+        self.values = [UNBOUND] * size
+        self.shadowed = []
+        self.return_ip = return_ip
+        self.target_var = target_var
+
+
+class CallStack:
+    """
+    The frames of a running program, global frame first. Slots are those of
+    the LinkedProgram it is created for; names the program does not mention
+    get a new slot when first assigned.
+    """
+
+    def __init__(self, code):
+        self.names = list(code.variables)
+        self.slots = {name: slot for slot, name in enumerate(self.names)}
+        # Call frames only get room for the names an instruction can assign
+        self.frame_size = code.local_slots
+        self.frames = [Frame(len(self.names))]
+        self.visible = [self.frames[0].values] * len(self.names)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def slot(self, name):
+        """Slot of variable name, added to every frame if it has none yet."""
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.names)
+            self.names.append(name)
+            self.frames[0].values.append(UNBOUND)
+            self.visible.append(self.frames[0].values)
+        return slot
+
+    def lookup(self, name):
+        """Value of variable name in the innermost frame that has it, or UNBOUND."""
+        if not isinstance(name, str):
+            return UNBOUND
+        slot = self.slots.get(name)
+        if slot is None:
+            return UNBOUND
+        return self.visible[slot][slot]
+
+    def store(self, slot, value):
+        """Set the variable in slot in the current frame."""
+        values = self.frames[-1].values
+        if self.visible[slot] is not values:
+            self.bind(slot)
+        values[slot] = value
+
+    def assign(self, name, value):
+        """Set variable name in the current frame."""
+        self.store(self.slot(name), value)
+
+    def bind(self, slot):
+        """Make the current frame's variable in slot the one reads of it see."""
+        frame = self.frames[-1]
+        values = frame.values
+        if len(values) <= slot:
+            values.extend([UNBOUND] * (slot + 1 - len(values)))
+        frame.shadowed.append((slot, self.visible[slot]))
+        self.visible[slot] = values
+
+    def push(self, return_ip=None, target_var=None):
+        """Start a new frame with no variables, and return it."""
+        frame = Frame(self.frame_size, return_ip, target_var)
+        self.frames.append(frame)
+        return frame
+
+    def pop(self):
+        """Remove the current frame, and return it."""
+        frame = self.frames.pop()
+        visible = self.visible
+        for slot, values in reversed(frame.shadowed):
+            visible[slot] = values
+        return frame
+
+    def scope(self, index=-1):
+        """The variables of frame index, as a name -> value dict."""
+        frame = self.frames[index]
+        values = frame.values
+        if index in (0, -len(self.frames)):
+            slots = range(len(values))
+        else:
+            slots = [slot for slot, _ in frame.shadowed]
+        names = self.names
+        return {names[slot]: values[slot] for slot in slots if values[slot] is not UNBOUND}
+
+    def scopes(self):
+        """scope() of every frame, global frame first."""
+        return [self.scope(index) for index in range(len(self.frames))]
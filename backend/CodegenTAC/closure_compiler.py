@@ -0,0 +1,425 @@
+# closure_compiler.py
+#
+# Second execution tier of the TAC interpreter. compile_steps() turns the
+# interpreter's LinkedProgram into one closure per instruction, so the run
+# loop executes instruction ip as steps[ip]() with nothing left to decode or
+# dispatch. Each closure has its operands decoded and its jump target
+# resolved when it is built; constant operands, and names the program never
+# assigns (see LinkedProgram.literals), are captured as the value
+# resolve_variable gives for them.
+#
+# The instructions student programs spend their time in (assignments, int
+# arithmetic and comparisons, branches, calls and returns, list reads,
+# printing and joining text) get
+# closures that read and write variables by slot (see call_stack) and handle
+# the common case inline. Whenever that case does not apply - a name that is
+# not a bound variable, an operand that is not an int, a result out of range,
+# arguments not pushed in order - they fall back to the instruction's
+# execute_<op> handler, which re-reads the operands and does exactly what the
+# first tier does, errors included. All other instructions run their handler
+# through functools.partial. Result operands are among the names every frame
+# has room for (LinkedProgram.local_slots), so the closures bind them in the
+# current frame without CallStack.bind().
+
+import operator
+from functools import partial
+
+from backend.CodegenTAC.call_stack import Frame, UNBOUND
+from backend.CodegenTAC.tac_program import OPCODE_NUMBERS
+
+
+def operand_name(value):
+    """Name a TAC operand is looked up as at runtime, or None for a constant."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, tuple) and len(value) >= 2 and value[0] == 'id' and isinstance(value[1], str):
+        return value[1]
+    return None
+
+
+def variable_name(interpreter, value):
+    """
+    operand_name(value), or None when that is a name the program never
+    assigns: it always resolves to its entry in the linked literals.
+    """
+    name = operand_name(value)
+    if name in interpreter.code.literals:
+        return None
+    return name
+
+
+def compile_steps(interpreter):
+    """One closure per instruction of interpreter.code, indexed like it."""
+    code = interpreter.code
+    handlers = interpreter.handlers
+    steps = []
+    for ip in range(len(code)):
+        op, arg1, arg2, result = code.instruction(ip)
+        handler = handlers[OPCODE_NUMBERS[op]]
+        target = code.targets[ip]
+        if interpreter.debug_mode:
+            step = traced_step(interpreter, handler, code.origins[ip], op, arg1, arg2, result, target)
+        else:
+            compile_op = STEP_COMPILERS.get(op)
+            step = compile_op(interpreter, handler, arg1, arg2, result, target) if compile_op else None
+            if step is None:
+                step = partial(handler, arg1, arg2, result, target)
+        steps.append(step)
+    return steps
+
+
+def traced_step(interpreter, handler, origin, op, arg1, arg2, result, target):
+    """Step running handler between the debug traces of the first tier."""
+    def step():
+        print(f"Step {interpreter.steps_executed}: Executing {origin}: {op} {arg1}, {arg2}, {result}")
+        interpreter.debug_instruction(op, arg1, arg2, result)
+        handler(arg1, arg2, result, target)
+        interpreter.debug_scope(op)
+    return step
+
+
+def compile_assign(interpreter, handler, arg1, arg2, result, target):
+    if arg1 == ']' or not isinstance(result, str):
+        return None
+    call_stack = interpreter.call_stack
+    frames, visible = call_stack.frames, call_stack.visible
+    resolve = interpreter.resolve_variable
+    result_slot = call_stack.slot(result)
+    name = variable_name(interpreter, arg1)
+    if name is None:
+        value = resolve(arg1)
+        def step():
+            frame = frames[-1]
+            values = frame.values
+            if visible[result_slot] is not values:
+                frame.shadowed.append((result_slot, visible[result_slot]))
+                visible[result_slot] = values
+            values[result_slot] = value
+    else:
+        slot = call_stack.slot(name)
+        def step():
+            value = visible[slot][slot]
+            if value is UNBOUND:
+                value = resolve(name)
+            frame = frames[-1]
+            values = frame.values
+            if visible[result_slot] is not values:
+                frame.shadowed.append((result_slot, visible[result_slot]))
+                visible[result_slot] = values
+            values[result_slot] = value
+    return step
+
+
+def binary_compiler(apply):
+    """
+    Compiler for an instruction that stores apply(left, right) when both
+    operands are ints and the value is within the Minima integer range.
+    Comparisons use it too: their bool results are always in range.
+    """
+    def compile_binary(interpreter, handler, arg1, arg2, result, target):
+        if not isinstance(result, str):
+            return None
+        call_stack = interpreter.call_stack
+        frames, visible = call_stack.frames, call_stack.visible
+        resolve = interpreter.resolve_variable
+        low, high = interpreter.min_number, interpreter.max_number
+        result_slot = call_stack.slot(result)
+        left_name, right_name = variable_name(interpreter, arg1), variable_name(interpreter, arg2)
+        # An unbound variable is not an int either, so the handler resolves it
+        if left_name is not None and right_name is not None:
+            left_slot, right_slot = call_stack.slot(left_name), call_stack.slot(right_name)
+            def step():
+                left = visible[left_slot][left_slot]
+                right = visible[right_slot][right_slot]
+                if type(left) is int and type(right) is int:
+                    value = apply(left, right)
+                    if low <= value <= high:
+                        frame = frames[-1]
+                        values = frame.values
+                        if visible[result_slot] is not values:
+                            frame.shadowed.append((result_slot, visible[result_slot]))
+                            visible[result_slot] = values
+                        values[result_slot] = value
+                        return
+                handler(arg1, arg2, result, target)
+        elif left_name is not None:
+            right = resolve(arg2)
+            if type(right) is not int:
+                return None
+            left_slot = call_stack.slot(left_name)
+            def step():
+                left = visible[left_slot][left_slot]
+                if type(left) is int:
+                    value = apply(left, right)
+                    if low <= value <= high:
+                        frame = frames[-1]
+                        values = frame.values
+                        if visible[result_slot] is not values:
+                            frame.shadowed.append((result_slot, visible[result_slot]))
+                            visible[result_slot] = values
+                        values[result_slot] = value
+                        return
+                handler(arg1, arg2, result, target)
+        elif right_name is not None:
+            left = resolve(arg1)
+            if type(left) is not int:
+                return None
+            right_slot = call_stack.slot(right_name)
+            def step():
+                right = visible[right_slot][right_slot]
+                if type(right) is int:
+                    value = apply(left, right)
+                    if low <= value <= high:
+                        frame = frames[-1]
+                        values = frame.values
+                        if visible[result_slot] is not values:
+                            frame.shadowed.append((result_slot, visible[result_slot]))
+                            visible[result_slot] = values
+                        values[result_slot] = value
+                        return
+                handler(arg1, arg2, result, target)
+        else:
+            return None
+        return step
+    return compile_binary
+
+
+def compile_goto(interpreter, handler, arg1, arg2, result, target):
+    if target < 0:
+        return None
+    def step():
+        interpreter.ip = target
+    return step
+
+
+def branch_compiler(jump_if):
+    """Compiler for a conditional jump taken when the condition evaluates to jump_if."""
+    def compile_branch(interpreter, handler, arg1, arg2, result, target):
+        name = variable_name(interpreter, arg1)
+        if name is None or target < 0:
+            return None
+        visible = interpreter.call_stack.visible
+        slot = interpreter.call_stack.slot(name)
+        resolve = interpreter.resolve_variable
+        evaluate = interpreter.evaluate_condition
+        def step():
+            value = visible[slot][slot]
+            if value is not True and value is not False:
+                if value is UNBOUND:
+                    value = resolve(name)
+                value = evaluate(value)
+            if value is jump_if:
+                interpreter.ip = target
+        return step
+    return compile_branch
+
+
+def compile_param(interpreter, handler, arg1, arg2, result, target):
+    entry = (result, arg1)
+    def step():
+        interpreter.param_stack.append(entry)
+    return step
+
+
+def compile_call(interpreter, handler, arg1, arg2, result, target):
+    """
+    Call of a function of the program, for when the PARAMs before it have
+    pushed exactly its arguments, in order; anything else goes to the handler.
+    """
+    if arg1 in interpreter.builtins or arg1 not in interpreter.functions or target < 0 \
+            or type(arg2) is not int:
+        return None
+    count = arg2
+    params = interpreter.function_params[arg1][:count]
+    if len(params) < count or len(set(params)) < count:
+        return None
+    call_stack = interpreter.call_stack
+    frames, visible, frame_size = call_stack.frames, call_stack.visible, call_stack.frame_size
+    resolve = interpreter.resolve_variable
+    param_slots = [call_stack.slot(param) for param in params]
+    def step():
+        pending = interpreter.param_stack
+        if len(pending) != count:
+            return handler(arg1, arg2, result, target)
+        args = []
+        for position, (index, raw) in enumerate(pending):
+            if index != position:
+                return handler(arg1, arg2, result, target)
+            args.append(resolve(raw))
+        interpreter.param_stack = []
+        frame = Frame(frame_size, interpreter.ip, result)
+        values, shadowed = frame.values, frame.shadowed
+        for slot, value in zip(param_slots, args):
+            shadowed.append((slot, visible[slot]))
+            visible[slot] = values
+            values[slot] = value
+        frames.append(frame)
+        interpreter.ip = target
+    return step
+
+
+def compile_return(interpreter, handler, arg1, arg2, result, target):
+    call_stack = interpreter.call_stack
+    frames, visible, slots = call_stack.frames, call_stack.visible, call_stack.slots
+    resolve = interpreter.resolve_variable
+    name = variable_name(interpreter, arg1)
+    slot = call_stack.slot(name) if name is not None else None
+    constant = resolve(arg1) if name is None else None
+    def step():
+        if len(frames) == 1:
+            return handler(arg1, arg2, result, target)
+        if slot is None:
+            value = constant
+        else:
+            value = visible[slot][slot]
+            if value is UNBOUND:
+                value = resolve(name)
+        returning = frames.pop()
+        for shadowed_slot, shadowed_values in reversed(returning.shadowed):
+            visible[shadowed_slot] = shadowed_values
+        target_var = returning.target_var
+        if target_var:
+            target_slot = slots[target_var]
+            frame = frames[-1]
+            values = frame.values
+            if visible[target_slot] is not values:
+                frame.shadowed.append((target_slot, visible[target_slot]))
+                visible[target_slot] = values
+            values[target_slot] = value
+        interpreter.ip = returning.return_ip
+    return step
+
+
+def compile_print(interpreter, handler, arg1, arg2, result, target):
+    name = variable_name(interpreter, arg1)
+    if name is None:
+        text = interpreter.resolve_variable(arg1)
+        if type(text) is not str:
+            return None
+        def step():
+            interpreter.output_buffer.write(text)
+        return step
+    slot = interpreter.call_stack.slot(name)
+    visible = interpreter.call_stack.visible
+    low, high = interpreter.min_number, interpreter.max_number
+    def step():
+        value = visible[slot][slot]
+        if type(value) is str:
+            interpreter.output_buffer.write(value)
+        elif type(value) is int and low <= value <= high:
+            interpreter.output_buffer.write(str(value))
+        else:
+            handler(arg1, arg2, result, target)
+    return step
+
+
+def compile_concat(interpreter, handler, arg1, arg2, result, target):
+    """
+    CONCAT of two texts within the text length limit; anything else
+    (numbers to format, ...) goes to the handler.
+    """
+    if not isinstance(result, str):
+        return None
+    call_stack = interpreter.call_stack
+    frames, visible = call_stack.frames, call_stack.visible
+    resolve = interpreter.resolve_variable
+    max_text = interpreter.budget.max_text_length
+    result_slot = call_stack.slot(result)
+    left_name, right_name = variable_name(interpreter, arg1), variable_name(interpreter, arg2)
+    if left_name is not None and right_name is not None:
+        left_slot, right_slot = call_stack.slot(left_name), call_stack.slot(right_name)
+        def texts():
+            return visible[left_slot][left_slot], visible[right_slot][right_slot]
+    elif left_name is not None:
+        right = resolve(arg2)
+        if type(right) is not str:
+            return None
+        left_slot = call_stack.slot(left_name)
+        def texts():
+            return visible[left_slot][left_slot], right
+    elif right_name is not None:
+        left = resolve(arg1)
+        if type(left) is not str:
+            return None
+        right_slot = call_stack.slot(right_name)
+        def texts():
+            return left, visible[right_slot][right_slot]
+    else:
+        return None
+    def step():
+        left, right = texts()
+        if type(left) is str and type(right) is str and len(left) + len(right) <= max_text:
+            frame = frames[-1]
+            values = frame.values
+            if visible[result_slot] is not values:
+                frame.shadowed.append((result_slot, visible[result_slot]))
+                visible[result_slot] = values
+            values[result_slot] = left + right
+        else:
+            handler(arg1, arg2, result, target)
+    return step
+
+
+def compile_list_access(interpreter, handler, arg1, arg2, result, target):
+    list_name, index_name = variable_name(interpreter, arg1), variable_name(interpreter, arg2)
+    if list_name is None or not isinstance(result, str):
+        return None
+    call_stack = interpreter.call_stack
+    frames, visible = call_stack.frames, call_stack.visible
+    resolve = interpreter.resolve_variable
+    list_slot, result_slot = call_stack.slot(list_name), call_stack.slot(result)
+    if index_name is None:
+        index = resolve(arg2)
+        if type(index) is not int:
+            return None
+        def step():
+            items = visible[list_slot][list_slot]
+            if type(items) is list and 0 <= index < len(items):
+                frame = frames[-1]
+                values = frame.values
+                if visible[result_slot] is not values:
+                    frame.shadowed.append((result_slot, visible[result_slot]))
+                    visible[result_slot] = values
+                values[result_slot] = items[index]
+            else:
+                handler(arg1, arg2, result, target)
+    else:
+        index_slot = call_stack.slot(index_name)
+        def step():
+            items = visible[list_slot][list_slot]
+            index = visible[index_slot][index_slot]
+            if type(items) is list and type(index) is int and 0 <= index < len(items):
+                frame = frames[-1]
+                values = frame.values
+                if visible[result_slot] is not values:
+                    frame.shadowed.append((result_slot, visible[result_slot]))
+                    visible[result_slot] = values
+                values[result_slot] = items[index]
+            else:
+                handler(arg1, arg2, result, target)
+    return step
+
+
+# Opcode name -> compiler returning the specialized step for an instruction,
+# or None to run its handler as is
+STEP_COMPILERS = {
+    'ASSIGN': compile_assign,
+    'ADD': binary_compiler(operator.add),
+    'SUB': binary_compiler(operator.sub),
+    'MUL': binary_compiler(operator.mul),
+    'LT': binary_compiler(operator.lt),
+    'LE': binary_compiler(operator.le),
+    'GT': binary_compiler(operator.gt),
+    'GE': binary_compiler(operator.ge),
+    'EQ': binary_compiler(operator.eq),
+    'NEQ': binary_compiler(operator.ne),
+    'GOTO': compile_goto,
+    'IFFALSE': branch_compiler(False),
+    'IFTRUE': branch_compiler(True),
+    'PARAM': compile_param,
+    'CALL': compile_call,
+    'RETURN': compile_return,
+    'LIST_ACCESS': compile_list_access,
+    'PRINT': compile_print,
+    'CONCAT': compile_concat,
+}
@@ -1,14 +1,25 @@
 from backend.CodegenTAC.code_generator import TACGenerator
-from backend.Lexer.minima_lexer import Lexer
-from backend.Semantic.semantic_analyzer import SemanticAnalyzer
-from backend.Syntax.syntax_analyzer import analyze_syntax
+from backend.compilation_cache import compilation_cache
 from backend.CodegenTAC.interpreter import TACInterpreter
+from backend.CodegenTAC.execution_budget import ExecutionBudget
+from backend.CodegenTAC.tac_program import TACProgram
 import uuid
 import time
 import sys
 import traceback
 from io import StringIO
 execution_states = {}
+# Limits on running a submitted program (see ExecutionBudget). The time limit
+# applies to each stretch of execution between inputs; the step limit to all
+# of them together.
+EXECUTION_LIMITS = {
+    'max_steps': 100_000_000,
+    'max_seconds': 10,
+    'max_output_length': 1_000_000,
+    'max_list_size': 1_000_000,
+    'max_text_length': 10_000_000,
+    'max_call_depth': 10_000,
+}
 def format_minima_number(value):
     """
     Format a number for output according to Minima language rules.
@@ -58,37 +69,6 @@ def format_minima_number(value):
     else:
         # It's actually an integer stored as a float
         return f"{sign}{abs_str}"
-def format_minima_output(output_text):
-    """
-    Ensure all negative numbers in output are displayed with hyphen notation.
-    This provides a second layer of formatting in case the interpreter missed anything.
-    Also trims any decimal places to max 9 digits.
-    """
-    import re
-    def replace_negatives(match):
-        number = match.group(1)
-        if '.' in number:  
-            parts = number.split('.')
-            if len(parts) > 1 and len(parts[1]) > 9:
-                parts[1] = parts[1][:9]
-            return f"-{parts[0]}.{parts[1]}" if len(parts) > 1 else f"-{parts[0]}"
-        else:  
-            return f"-{number}"
-    formatted_text = re.sub(r'(?<!\w)-(\d+(?:\.\d+)?)', replace_negatives, output_text)
-    formatted_text = re.sub(r'(^|\s+)-(\d+(?:\.\d+)?)', lambda m: m.group(1) + "-" + m.group(2), formatted_text)
-    formatted_text = re.sub(r'([\[\(,])-(\d+(?:\.\d+)?)', lambda m: m.group(1) + "-" + m.group(2), formatted_text)
-    def trim_decimals(match):
-        whole = match.group(1)
-        decimal = match.group(2)
-        if len(decimal) > 9:
-            # Truncate without rounding to preserve original digits
-            decimal = decimal[:9]
-        return f"{whole}.{decimal}"
-    # First handle the case of 10+ decimal places
-    formatted_text = re.sub(r'((?:-)?\d+)\.(\d{10,})', trim_decimals, formatted_text)
-    # Also catch any cases that might have been rounded during string conversion
-    formatted_text = re.sub(r'((?:-)?\d+\.\d*?)9{3,}(\d*)', lambda m: f"{m.group(1)}{m.group(2)}", formatted_text)
-    return formatted_text
 def execute_code(code, execution_id=None, user_input=None, debug_mode=False):
     """
     Execute Minima code and return the results.
@@ -109,6 +89,7 @@ def execute_code(code, execution_id=None, user_input=None, debug_mode=False):
         'waitingForInput': False,
         'inputPrompt': '',
         'executionId': None,
+        'termination': None,
         'terminalOutput': ''
     }
     
@@ -125,10 +106,12 @@ def execute_code(code, execution_id=None, user_input=None, debug_mode=False):
             output_segment = interpreter.resume_with_input(user_input)
             results['success'] = True
             results['output'] = output_segment
-            results['tac'] = interpreter.instructions
+            results['tac'] = list(interpreter.instructions)
             results['formattedTAC'] = format_tac_instructions(interpreter.instructions, interpreter.source_positions)
             results['terminalOutput'] = f"Execution resumed with input: {user_input}\n"
             results['terminalOutput'] += f"Steps executed: {interpreter.steps_executed}\n"
+            if interpreter.termination is not None:
+                report_termination(results, interpreter.termination)
         except Exception as e:
             results['error'] = f"Execution Error: {str(e)}"
             results['terminalOutput'] = f"Error when processing input: {str(e)}\n"
@@ -143,54 +126,58 @@ def execute_code(code, execution_id=None, user_input=None, debug_mode=False):
             results['terminalOutput'] += f"\nWaiting for input with prompt: {interpreter.input_prompt}"
             if results['success']:
                 results['success'] = True
-        elif interpreter:
+        elif interpreter and results['success']:
             results['waitingForInput'] = False
             results['terminalOutput'] += f"\nExecution completed after {interpreter.steps_executed} total steps.\n"
         return results
     try:
-        lexer = Lexer(code)
-        tokens = []
-        while True:
-            token = lexer.get_next_token()
-            if token is None:
-                break
-            tokens.append(token)
-        if lexer.errors:
-            results['error'] = 'Lexical Errors: ' + ', '.join(error.message for error in lexer.errors)
+        # Front-end results (and the TAC) are shared with the other routes
+        # through the compilation cache
+        artifact = compilation_cache.get(code)
+        if artifact.errors:
+            results['error'] = 'Lexical Errors: ' + ', '.join(error.message for error in artifact.errors)
             return results
-        success, parse_tree_or_error = analyze_syntax(code)
+        success, parse_tree_or_error = artifact.parse()
         if not success:
             results['error'] = 'Syntax Error: ' + parse_tree_or_error['message']
             return results
         parse_tree = parse_tree_or_error
-        semantic_analyzer = SemanticAnalyzer()
-        semantic_errors = semantic_analyzer.analyze(parse_tree)
+        semantic_errors = artifact.analyze().errors
         if semantic_errors:
             results['error'] = 'Semantic Errors: ' + ', '.join(error.message for error in semantic_errors)
             return results
-        code_generator = TACGenerator(debug_mode=debug_mode)
-        tac_instructions = code_generator.generate(parse_tree)
-        source_positions = getattr(code_generator, 'source_positions', None)
+        if debug_mode:
+            # Debug output comes from generating the TAC, so skip the cache.
+            # Generation annotates the shared tree, so hold the artifact lock.
+            with artifact.lock:
+                code_generator = TACGenerator(debug_mode=debug_mode)
+                tac_instructions = code_generator.generate(parse_tree)
+                program = TACProgram.from_instructions(
+                    tac_instructions, getattr(code_generator, 'source_positions', None))
+        else:
+            program = artifact.program()
         
-        results['tac'] = tac_instructions
-        results['formattedTAC'] = format_tac_instructions(tac_instructions, source_positions)
-        results['terminalOutput'] += f"Generated {len(tac_instructions)} TAC instructions.\n"
+        results['tac'] = list(program.instructions)
+        results['formattedTAC'] = format_tac_instructions(program.instructions, program.source_positions)
+        results['terminalOutput'] += f"Generated {len(program)} TAC instructions.\n"
         
-        interpreter = TACInterpreter().load(tac_instructions, source_positions)
+        interpreter = TACInterpreter().load(program)
         interpreter.debug_mode = debug_mode
-        max_steps = float('inf')
-        interpreter.max_execution_steps = max_steps
+        interpreter.set_budget(ExecutionBudget(**EXECUTION_LIMITS))
+        # Programs that qualify (no input, among others) run as generated Python
+        transpiled = None if debug_mode else artifact.transpiled()
         start_time = time.time()
-        output_segment = interpreter.run()
+        if transpiled is not None:
+            output_segment = transpiled.run(interpreter)
+        else:
+            output_segment = interpreter.run()
         end_time = time.time()
         execution_time = end_time - start_time
         results['output'] = output_segment
-        if interpreter.steps_executed >= max_steps:
-            results['error'] = f"Execution exceeded maximum of {max_steps} steps. Potential infinite loop detected."
+        if interpreter.termination is not None:
             results['terminalOutput'] += f"\n----- Execution Log -----\n"
             results['terminalOutput'] += f"Code executed in {execution_time:.3f} seconds.\n"
-            results['terminalOutput'] += f"Execution terminated after {max_steps} steps to prevent infinite loop.\n"
-            results['success'] = False
+            report_termination(results, interpreter.termination)
         else:
             results['success'] = True
             results['terminalOutput'] += f"\n----- Execution Log -----\n"
@@ -212,16 +199,20 @@ def execute_code(code, execution_id=None, user_input=None, debug_mode=False):
     elif interpreter and results['success']:
         results['waitingForInput'] = False
         results['terminalOutput'] += f"Execution completed after {interpreter.steps_executed} total steps.\n"
-    if 'output' in results and results['output']:
-        results['output'] = format_minima_output(results['output'])    
     return results
+def report_termination(results, termination):
+    """Fill in results for a run stopped by BudgetExceeded termination."""
+    results['error'] = f"Execution stopped: {termination}."
+    results['termination'] = termination.as_dict()
+    results['terminalOutput'] += f"Execution terminated to stay within its limits: {termination}.\n"
+    results['success'] = False
 def format_tac_instructions(tac_instructions, source_positions=None):
     """
     Format TAC instructions for display.
     
     Args:
-        tac_instructions: List of TAC instructions
-        source_positions: Optional list of source positions (line, column) for each instruction
+        tac_instructions: Sequence of TAC instruction tuples, e.g. TACProgram.instructions
+        source_positions: Optional sequence of source positions (line, column) for each instruction
     
     Returns:
         Formatted string representation of TAC instructions
@@ -1,5 +1,7 @@
 from lark import Visitor
 import uuid
+from backend.Syntax.ast_nodes import UNSET, clear_annotation
+from backend.visitor_dispatch import bind_handlers
 class TACGenerator(Visitor):
     def __init__(self, debug_mode=False):
         super().__init__()
@@ -15,8 +17,7 @@ class TACGenerator(Visitor):
         self.values = {}
         self.debug_mode = debug_mode
         self.expression_depth = 0  # Track expression nesting depth
-        self.processed_expressions = {}  # Cache for processed expressions
-        self.paren_depth_cache = {}  # Cache for parentheses depth calculations
+        self.handlers = bind_handlers(self)  # Rule name -> bound visit_<rule> method
     def push_loop(self, start_label, end_label):
         """Push a new loop context onto the stack."""
         self.loop_stack.append((start_label, end_label))
@@ -86,8 +87,7 @@ class TACGenerator(Visitor):
         self.label_counter = 0
         self.variable_types = {}
         self.values = {}
-        self.processed_expressions = {}  # Reset expression cache
-        self.paren_depth_cache = {}      # Reset parenthesis depth cache
+        clear_annotation(tree, 'tac_value')  # Reset expression cache
         
         # Start traversal
         self.visit(tree)
@@ -128,39 +128,36 @@ class TACGenerator(Visitor):
                 return self.visit_token(tree)
             return None
         
+        if self.debug_mode:
+            self.debug_paren_scan(tree)
+        
+        handler = self.handlers.get(tree.data)
+        if handler is not None:
+            return handler(tree)
+        return self.__default__(tree)
+    def __default__(self, tree):
+        """Default handling for nodes without specific visit methods."""
+        result = None
+        for child in tree.children:
+            if hasattr(child, "data") or hasattr(child, "type"):
+                result = self.visit(child)
+        return result
+    def debug_paren_scan(self, tree):
+        """Report parenthesized expressions as they are reached (debug mode only)."""
         # Check for direct parenthesized expressions at any level
         if tree.data == "primary_expr" and len(tree.children) > 1:
             if (hasattr(tree.children[0], "type") and tree.children[0].type == "LPAREN" and
                 hasattr(tree.children[-1], "type") and tree.children[-1].type == "RPAREN"):
-                # This is a parenthesized expression, prioritize it
-                if self.debug_mode:
-                    print(f"Prioritizing parenthesized expression: {tree.data}")
-                method_name = f"visit_{tree.data}"
-                method = getattr(self, method_name)
-                return method(tree)
+                print(f"Prioritizing parenthesized expression: {tree.data}")
+                return
         
         # Check for expressions with parenthesized sub-expressions
         if tree.data in ("add_expr", "mul_expr", "expression"):
-            # Look for parenthesized expressions within this expression
             for child in tree.children:
                 if hasattr(child, "data") and child.data == "primary_expr":
                     if (len(child.children) > 1 and 
                         hasattr(child.children[0], "type") and child.children[0].type == "LPAREN"):
-                        # Found a parenthesized expression within this node
-                        if self.debug_mode:
-                            print(f"Found parenthesized subexpression in {tree.data}")
-        
-        method_name = f"visit_{tree.data}"
-        if hasattr(self, method_name):
-            method = getattr(self, method_name)
-            return method(tree)
-        else:
-            # Default handling for nodes without specific visit methods
-            result = None
-            for child in tree.children:
-                if hasattr(child, "data") or hasattr(child, "type"):
-                    result = self.visit(child)
-            return result
+                        print(f"Found parenthesized subexpression in {tree.data}")
     def visit_token(self, token):
         """Visit a token node."""
         if token.type == 'TEXTLITERAL':
@@ -199,18 +196,17 @@ class TACGenerator(Visitor):
         return None
     def visit_varlist_declaration(self, node):
         """Handle variable declarations."""
-        var_name = node.children[1].value
+        var_name = node.name.value
         source_pos = self.get_source_position(node)
         
-        if len(node.children) >= 3 and node.children[2]:
-            if hasattr(node.children[2], 'data') and node.children[2].data == 'var_init':
-                if len(node.children[2].children) > 0:
-                    init_expr_node = node.children[2].children[1]
+        if node.init:
+            if hasattr(node.init, 'data') and node.init.data == 'var_init':
+                if len(node.init.children) > 0:
+                    init_expr_node = node.init.expr
                     get_prompt = None
                     
-                    # Check for and process any parenthesized expressions first (PEMDAS)
-                    if self._contains_parenthesized_expr(init_expr_node):
-                        self._process_parenthesized_expr(init_expr_node)
+                    # Process any parenthesized expressions first (PEMDAS)
+                    self._hoist_parenthesized(init_expr_node)
                     
                     if self._is_get_function_call(init_expr_node, get_prompt):
                         prompt = get_prompt if get_prompt else "Enter a value:"
@@ -219,7 +215,7 @@ class TACGenerator(Visitor):
                                  *(source_pos if source_pos else (None, None)))
                         self.variable_types[var_name] = 'text'
                     else:
-                        init_expr = self.visit(node.children[2].children[1])
+                        init_expr = self.visit(init_expr_node)
                         if isinstance(init_expr, tuple) and init_expr[0] in ('id','integer','float','bool','string','text'):
                             self.emit('ASSIGN', init_expr[1], None, var_name,
                                      *(source_pos if source_pos else (None, None)))
@@ -227,8 +223,8 @@ class TACGenerator(Visitor):
                         else:
                             self.emit('ASSIGN', init_expr, None, var_name,
                                      *(source_pos if source_pos else (None, None)))
-            if len(node.children) > 3 and node.children[3]:
-                self.visit(node.children[3])
+            if node.tail:
+                self.visit(node.tail)
             return None
     def _is_get_function_call(self, node, prompt_ref=None):
         """Check if a node is or contains a get() function call.
@@ -268,23 +264,23 @@ class TACGenerator(Visitor):
         """Handle additional variable declarations."""
         if not node or not hasattr(node, 'children') or len(node.children) < 2:
             return None
-        var_name = node.children[1].value
-        if len(node.children) >= 3 and node.children[2]:
-            init_expr = self.visit(node.children[2])
+        var_name = node.name.value
+        if node.init:
+            init_expr = self.visit(node.init)
             if isinstance(init_expr, tuple) and init_expr[0] in ('id','integer','float','bool','string','text'):
                 self.emit('ASSIGN', init_expr[1], None, var_name)
                 self.variable_types[var_name] = init_expr[0]
             else:
                 self.emit('ASSIGN', init_expr, None, var_name)
-        if len(node.children) > 3 and node.children[3]:
-            self.visit(node.children[3])
+        if node.tail:
+            self.visit(node.tail)
         return None
     def visit_var_init(self, node):
         """Handle variable initialization."""
         if not node.children:
             return None
         if len(node.children) > 1:
-            return self.visit(node.children[1])
+            return self.visit(node.expr)
         return None
     def visit_variable_value(self, node):
         """Visit a variable value node, handling both expressions and list literals."""
@@ -430,94 +426,52 @@ class TACGenerator(Visitor):
                     self.emit('INPUT', prompt, None, temp)
                     return ('text', temp)
         
-        # First, find all nodes with parenthesized expressions
-        nodes_with_parens = []
-        
-        # Function to collect all parenthesized nodes with their depths
-        def collect_paren_nodes(node, path=None):
-            if path is None:
-                path = []
-            
-            if hasattr(node, 'data'):
-                # Check if this node is a parenthesized expression
-                is_paren = node.data == 'primary_expr' and len(node.children) > 1 and \
-                        hasattr(node.children[0], 'type') and node.children[0].type == 'LPAREN'
-                
-                if is_paren:
-                    # Calculate its parentheses nesting depth
-                    depth = self._calculate_paren_depth(node)
-                    nodes_with_parens.append((node, depth, path + [node]))
-                
-                # Recursively check all children
-                for i, child in enumerate(node.children):
-                    collect_paren_nodes(child, path + [child])
-        
-        # Collect all parenthesized expressions in the tree
-        collect_paren_nodes(node)
-        
-        # Sort by depth in descending order (process deepest/innermost first)
-        nodes_with_parens.sort(key=lambda x: x[1], reverse=True)
-        
-        # Process parenthesized expressions in order from innermost to outermost
-        for paren_node, depth, _ in nodes_with_parens:
-            if self.debug_mode:
-                print(f"Processing parenthesized expression with depth {depth}")
-            node_key = id(paren_node)
-            if node_key not in self.processed_expressions:
-                result = self.visit(paren_node)
-                self.processed_expressions[node_key] = result
+        # Generate parenthesized sub-expressions first, innermost first
+        self._hoist_parenthesized(node.children[0])
         
         # Now process the expression following precedence rules
         return self.visit(node.children[0])
         
-    def _contains_parenthesized_expr(self, node):
-        """Check if a node contains a parenthesized expression."""
-        if hasattr(node, 'data'):
-            if node.data == 'primary_expr':
-                if len(node.children) > 1 and hasattr(node.children[0], 'type') and node.children[0].type == 'LPAREN':
-                    return True
-            for child in node.children:
-                if self._contains_parenthesized_expr(child):
-                    return True
-        return False
+    def _is_parenthesized(self, node):
+        """Check if a node is a parenthesized expression (LPAREN expression RPAREN)."""
+        return (node.data == 'primary_expr' and len(node.children) > 1 and
+                hasattr(node.children[0], 'type') and node.children[0].type == 'LPAREN')
         
-    def _process_parenthesized_expr(self, node):
+    def _hoist_parenthesized(self, node):
         """
-        Pre-process all parenthesized expressions to ensure they are evaluated first.
-        This function recursively finds and evaluates inner parentheses before outer ones.
+        Generate every parenthesized expression inside node before the rest of
+        node, innermost first and left to right (post-order). Their results are
+        cached in tac_value, so generating node afterwards reuses them.
+        Parenthesized expressions that were already generated are not walked
+        again, which keeps this linear in the size of node.
         """
-        if hasattr(node, 'data'):
-            # First process any child nodes that might contain even deeper parentheses
-            for child in node.children:
-                if self._contains_parenthesized_expr(child):
-                    self._process_parenthesized_expr(child)
-                    
-            # Now process this node if it's a parenthesized expression
-            if node.data == 'primary_expr':
-                if len(node.children) > 1 and hasattr(node.children[0], 'type') and node.children[0].type == 'LPAREN':
-                    # Generate a unique key for this node
-                    node_key = id(node)
-                    
-                    # Only process this node if we haven't seen it before
-                    if node_key not in self.processed_expressions:
-                        # Visit this parenthesized expression now
-                        result = self.visit(node)
-                        # Store the result for future use
-                        self.processed_expressions[node_key] = result
-                    return
-            for child in node.children:
-                self._process_parenthesized_expr(child)
+        if not hasattr(node, 'data'):
+            return
+        stack = [(node, False)]
+        while stack:
+            current, children_done = stack.pop()
+            if children_done:
+                if self.debug_mode:
+                    print(f"Processing parenthesized expression {id(current)}")
+                self.visit(current)
+                continue
+            if self._is_parenthesized(current):
+                if current.tac_value is not UNSET:
+                    continue
+                stack.append((current, True))
+            for child in reversed(current.children):
+                if hasattr(child, 'data'):
+                    stack.append((child, False))
     def visit_logical_or_expr(self, node):
-        node_key = id(node)
-        if node_key in self.processed_expressions:
+        if node.tac_value is not UNSET:
             if self.debug_mode:
-                print(f"Reusing cached result for logical_or_expr {node_key}")
-            return self.processed_expressions[node_key]
+                print(f"Reusing cached result for logical_or_expr {id(node)}")
+            return node.tac_value
             
         children = node.children
         if len(children) == 1:
             result = self.visit(children[0])
-            self.processed_expressions[node_key] = result
+            node.tac_value = result
             return result
             
         left = self.visit(children[0])
@@ -531,19 +485,18 @@ class TACGenerator(Visitor):
             left = temp
             i += 2
             
-        self.processed_expressions[node_key] = left
+        node.tac_value = left
         return left
     def visit_logical_and_expr(self, node):
-        node_key = id(node)
-        if node_key in self.processed_expressions:
+        if node.tac_value is not UNSET:
             if self.debug_mode:
-                print(f"Reusing cached result for logical_and_expr {node_key}")
-            return self.processed_expressions[node_key]
+                print(f"Reusing cached result for logical_and_expr {id(node)}")
+            return node.tac_value
             
         children = node.children
         if len(children) == 1:
             result = self.visit(children[0])
-            self.processed_expressions[node_key] = result
+            node.tac_value = result
             return result
             
         left = self.visit(children[0])
@@ -557,24 +510,23 @@ class TACGenerator(Visitor):
             left = temp
             i += 2
             
-        self.processed_expressions[node_key] = left
+        node.tac_value = left
         return left
     def visit_equality_expr(self, node):
-        node_key = id(node)
-        if node_key in self.processed_expressions:
+        if node.tac_value is not UNSET:
             if self.debug_mode:
-                print(f"Reusing cached result for equality_expr {node_key}")
-            return self.processed_expressions[node_key]
+                print(f"Reusing cached result for equality_expr {id(node)}")
+            return node.tac_value
             
         children = node.children
         if len(children) == 1:
             result = self.visit(children[0])
-            self.processed_expressions[node_key] = result
+            node.tac_value = result
             return result
             
         left = self.visit(children[0])
-        op = node.children[1].value
-        right = self.visit(children[2])
+        op = node.op.value
+        right = self.visit(node.right)
         temp = self.get_temp()
         left_operand = left[1] if isinstance(left, tuple) else left
         right_operand = right[1] if isinstance(right, tuple) else right
@@ -583,24 +535,23 @@ class TACGenerator(Visitor):
         else:
             self.emit('NEQ', left_operand, right_operand, temp)
             
-        self.processed_expressions[node_key] = temp
+        node.tac_value = temp
         return temp
     def visit_relational_expr(self, node):
-        node_key = id(node)
-        if node_key in self.processed_expressions:
+        if node.tac_value is not UNSET:
             if self.debug_mode:
-                print(f"Reusing cached result for relational_expr {node_key}")
-            return self.processed_expressions[node_key]
+                print(f"Reusing cached result for relational_expr {id(node)}")
+            return node.tac_value
             
         children = node.children
         if len(children) == 1:
             result = self.visit(children[0])
-            self.processed_expressions[node_key] = result
+            node.tac_value = result
             return result
             
         left = self.visit(children[0])
-        op = node.children[1].value
-        right = self.visit(children[2])
+        op = node.op.value
+        right = self.visit(node.right)
         temp = self.get_temp()
         left_operand = left[1] if isinstance(left, tuple) else left
         right_operand = right[1] if isinstance(right, tuple) else right
@@ -613,7 +564,7 @@ class TACGenerator(Visitor):
         else:
             self.emit('GE', left_operand, right_operand, temp)
             
-        self.processed_expressions[node_key] = temp
+        node.tac_value = temp
         return temp
     def visit_add_expr(self, node):
         """
@@ -623,17 +574,16 @@ class TACGenerator(Visitor):
         children = node.children
         source_pos = self.get_source_position(node)
         
-        # Cache key to detect duplicate processing
-        node_key = id(node)
-        if node_key in self.processed_expressions:
+        # Reuse the result if this node was already generated
+        if node.tac_value is not UNSET:
             if self.debug_mode:
-                print(f"Reusing cached result for add_expr {node_key}")
-            return self.processed_expressions[node_key]
+                print(f"Reusing cached result for add_expr {id(node)}")
+            return node.tac_value
         
         # If there's only one child, just process it and return
         if len(children) == 1:
             result = self.visit(children[0])
-            self.processed_expressions[node_key] = result
+            node.tac_value = result
             return result
             
         # PEMDAS implementation - first collect all sub-expressions
@@ -701,7 +651,7 @@ class TACGenerator(Visitor):
             left = temp
         
         # Cache the result for future use
-        self.processed_expressions[node_key] = left
+        node.tac_value = left
         return left
     def visit_mul_expr(self, node):
         """
@@ -713,17 +663,16 @@ class TACGenerator(Visitor):
         children = node.children
         source_pos = self.get_source_position(node)
         
-        # Cache key to detect duplicate processing
-        node_key = id(node)
-        if node_key in self.processed_expressions:
+        # Reuse the result if this node was already generated
+        if node.tac_value is not UNSET:
             if self.debug_mode:
-                print(f"Reusing cached result for mul_expr {node_key}")
-            return self.processed_expressions[node_key]
+                print(f"Reusing cached result for mul_expr {id(node)}")
+            return node.tac_value
         
         # If there's only one child, just process it and return
         if len(children) == 1:
             result = self.visit(children[0])
-            self.processed_expressions[node_key] = result
+            node.tac_value = result
             return result
         
         # PEMDAS implementation - collect all sub-expressions first
@@ -783,14 +732,14 @@ class TACGenerator(Visitor):
             left = temp
         
         # Cache the result for future use
-        self.processed_expressions[node_key] = left
+        node.tac_value = left
         return left
     def visit_pre_expr(self, node):
         children = node.children
         if len(children) == 1:
             return self.visit(children[0])
-        op = children[0].value
-        expr = self.visit(children[1])
+        op = node.op.value
+        expr = self.visit(node.operand)
         temp = self.get_temp()
         operand = expr[1] if isinstance(expr, tuple) else expr
         if op == "!":
@@ -815,11 +764,10 @@ class TACGenerator(Visitor):
         else:
             # This is a parenthesized expression (LPAREN expression RPAREN)
             # Check if we've already processed this exact node
-            node_key = id(node)
-            if node_key in self.processed_expressions:
+            if node.tac_value is not UNSET:
                 if self.debug_mode:
-                    print(f"Reusing cached result for parenthesized expression {node_key}")
-                return self.processed_expressions[node_key]
+                    print(f"Reusing cached result for parenthesized expression {id(node)}")
+                return node.tac_value
             
             # Track entry into parenthesized expression
             self.enter_expression()
@@ -832,8 +780,7 @@ class TACGenerator(Visitor):
                 inner_expr = node.children[1]
                 # Process nested parentheses first (if any)
                 for subchild in inner_expr.children:
-                    if self._contains_parenthesized_expr(subchild):
-                        self._process_parenthesized_expr(subchild)
+                    self._hoist_parenthesized(subchild)
             
             # Now evaluate the inner expression
             expr_result = self.visit(node.children[1])
@@ -842,7 +789,7 @@ class TACGenerator(Visitor):
             self.exit_expression()
             
             # Cache the result for future use
-            self.processed_expressions[node_key] = expr_result
+            node.tac_value = expr_result
             
             # Return the expression result directly
             return expr_result
@@ -1101,7 +1048,7 @@ class TACGenerator(Visitor):
     def visit_var_assign(self, node):
         """Handle variable assignments, including list element assignments."""
         children = node.children
-        var_name = children[0].value
+        var_name = node.name.value
         source_pos = self.get_source_position(node)
         
         has_accessor = False
@@ -1238,17 +1185,17 @@ class TACGenerator(Visitor):
         source_pos = self.get_source_position(node)
         
         # Process the expression inside the show statement with special handling for parentheses
-        if hasattr(node.children[2], 'data') and node.children[2].data == 'primary_expr':
+        if hasattr(node.expr, 'data') and node.expr.data == 'primary_expr':
             # Direct access to primary_expr in show() statement - handle special case for parentheses
-            if len(node.children[2].children) > 1 and hasattr(node.children[2].children[0], 'type') and node.children[2].children[0].type == 'LPAREN':
+            if len(node.expr.children) > 1 and hasattr(node.expr.children[0], 'type') and node.expr.children[0].type == 'LPAREN':
                 # This is a parenthesized expression, ensure it's evaluated first
                 self.enter_expression()
-                expr = self.visit(node.children[2])
+                expr = self.visit(node.expr)
                 self.exit_expression()
             else:
-                expr = self.visit(node.children[2])
+                expr = self.visit(node.expr)
         else:
-            expr = self.visit(node.children[2])
+            expr = self.visit(node.expr)
         
         if isinstance(expr, str) and expr.startswith('t'):
             val = expr
@@ -1259,9 +1206,9 @@ class TACGenerator(Visitor):
                  *(source_pos if source_pos else (None, None)))
         return None
     def visit_func_definition(self, node):
-        func_name = node.children[1].value
+        func_name = node.name.value
         param_names = []
-        param_node = node.children[3]
+        param_node = node.params
         if hasattr(param_node, 'children'):
             for child in param_node.children:
                 if hasattr(child, 'type') and child.type == 'IDENTIFIER':
@@ -1274,7 +1221,7 @@ class TACGenerator(Visitor):
         self.emit('GOTO', None, None, skip_label)
         self.emit('FUNCTION', func_name, param_names, func_label)
         self.emit('LABEL', None, None, func_label)
-        body_node = node.children[6]
+        body_node = node.body
         self.visit(body_node)
         self.emit('LABEL', None, None, end_label)
         self.emit('RETURN', None, None, None)
@@ -1284,7 +1231,7 @@ class TACGenerator(Visitor):
         """
         Generate TAC for throw statement (function return)
         """
-        expr = self.visit(node.children[1])
+        expr = self.visit(node.expr)
         val = expr[1] if isinstance(expr, tuple) else expr
         self.emit('RETURN', val, None, None)
         return None
@@ -1293,8 +1240,8 @@ class TACGenerator(Visitor):
             self.visit(child)
         return None
     def visit_typecast_expression(self, node):
-        target_type = node.children[0].value.lower()
-        expr = self.visit(node.children[2])
+        target_type = node.target.value.lower()
+        expr = self.visit(node.expr)
         temp = self.get_temp()
         self.variable_types[temp] = target_type
         if isinstance(expr, tuple):
@@ -1312,17 +1259,15 @@ class TACGenerator(Visitor):
         """Generate TAC for if statements (checkif)."""
         else_label = self.get_label()
         end_label = self.get_label()
-        condition = self.visit(node.children[2])
+        condition = self.visit(node.condition)
         self.emit('IFFALSE', condition, None, else_label)
-        self.visit(node.children[5])  
+        self.visit(node.body)
         self.emit('GOTO', None, None, end_label)
         self.emit('LABEL', None, None, else_label)
-        for child in node.children[6:]:
-            if child and hasattr(child, 'data'):
-                if child.data == 'recheck_statement':
-                    self.visit_recheck_statement(child, end_label)
-                elif child.data == 'otherwise_statement':
-                    self.visit_otherwise_statement(child)
+        if node.recheck is not None:
+            self.visit_recheck_statement(node.recheck, end_label)
+        if node.otherwise is not None:
+            self.visit_otherwise_statement(node.otherwise)
         self.emit('LABEL', None, None, end_label)
         return None
     def visit_recheck_statement(self, node, end_label):
@@ -1330,13 +1275,13 @@ class TACGenerator(Visitor):
         if not node or not hasattr(node, 'children') or len(node.children) < 5:
             return None
         next_else_label = self.get_label()
-        condition = self.visit(node.children[2])
+        condition = self.visit(node.condition)
         self.emit('IFFALSE', condition, None, next_else_label)
-        self.visit(node.children[5])  
+        self.visit(node.body)
         self.emit('GOTO', None, None, end_label)
         self.emit('LABEL', None, None, next_else_label)
-        if len(node.children) > 7 and node.children[7]:
-            self.visit_recheck_statement(node.children[7], end_label)
+        if node.recheck:
+            self.visit_recheck_statement(node.recheck, end_label)
         return None
     def visit_otherwise_statement(self, node):
         """
@@ -1345,7 +1290,7 @@ class TACGenerator(Visitor):
         """
         if not node or not hasattr(node, 'children') or len(node.children) < 3:
             return None
-        self.visit(node.children[2])  
+        self.visit(node.body)
         return None
     def visit_repeat_statement(self, node):
         """
@@ -1356,9 +1301,9 @@ class TACGenerator(Visitor):
         end_label = self.get_label()
         self.loop_stack.append((start_label, end_label))
         self.emit('LABEL', None, None, start_label)
-        condition = self.visit(node.children[2])
+        condition = self.visit(node.condition)
         self.emit('IFFALSE', condition, None, end_label)
-        self.visit(node.children[4])  
+        self.visit(node.body)
         self.emit('GOTO', None, None, start_label)
         self.emit('LABEL', None, None, end_label)
         self.loop_stack.pop()
@@ -1373,9 +1318,9 @@ class TACGenerator(Visitor):
         end_label = self.get_label()
         self.loop_stack.append((cond_label, end_label))
         self.emit('LABEL', None, None, start_label)
-        self.visit(node.children[2])  
+        self.visit(node.body)
         self.emit('LABEL', None, None, cond_label)
-        condition = self.visit(node.children[6])
+        condition = self.visit(node.condition)
         self.emit('IFTRUE', condition, None, start_label)
         self.emit('LABEL', None, None, end_label)
         self.loop_stack.pop()
@@ -1384,7 +1329,7 @@ class TACGenerator(Visitor):
         """
         Handle exit and next statements within loops.
         """
-        stmt_type = node.children[0].value.lower()  
+        stmt_type = node.keyword.value.lower()  
         if not self.loop_stack:
             return None
         update_label, end_label = self.loop_stack[-1]
@@ -1404,23 +1349,14 @@ class TACGenerator(Visitor):
         update_label = self.get_label()  
         end_label = self.get_label()    
         self.loop_stack.append((update_label, end_label))
-        if len(node.children) > 2 and node.children[2]:
-            self.visit(node.children[2])  
+        if node.init:
+            self.visit(node.init)
         self.emit('GOTO', None, None, cond_label)
         self.emit('LABEL', None, None, body_label)
-        loop_body_found = False
-        for i, child in enumerate(node.children):
-            if hasattr(child, 'data') and child.data == 'loop_block':
-                self.visit(child)
-                loop_body_found = True
-                break
-        if not loop_body_found:
-            loop_body_index = 7  
-            if len(node.children) > loop_body_index:
-                self.visit(node.children[loop_body_index])
+        self.visit(node.body)
         self.emit('LABEL', None, None, update_label)
-        if len(node.children) > 5 and node.children[5]:
-            update_node = node.children[5]
+        if node.update:
+            update_node = node.update
             if hasattr(update_node, 'data') and update_node.data == 'id_usage':
                 var_name = update_node.children[0].value
                 for child in update_node.children[1:]:
@@ -1437,7 +1373,7 @@ class TACGenerator(Visitor):
                 self.visit(update_node)
         self.emit('GOTO', None, None, cond_label)
         self.emit('LABEL', None, None, cond_label)
-        condition_temp = self.visit(node.children[3])
+        condition_temp = self.visit(node.condition)
         self.emit('IFTRUE', condition_temp, None, body_label)
         self.emit('LABEL', None, None, end_label)
         self.loop_stack.pop()
@@ -1451,18 +1387,9 @@ class TACGenerator(Visitor):
         loop_end = self.get_label()
         self.loop_stack.append((loop_start, loop_end))
         self.emit('LABEL', None, None, loop_start)
-        condition_temp = self.visit(node.children[2])
+        condition_temp = self.visit(node.condition)
         self.emit('IFFALSE', condition_temp, None, loop_end)
-        loop_body_found = False
-        for i, child in enumerate(node.children):
-            if hasattr(child, 'data') and child.data == 'loop_block':
-                self.visit(child)
-                loop_body_found = True
-                break
-        if not loop_body_found:
-            loop_body_index = 4  
-            if len(node.children) > loop_body_index:
-                self.visit(node.children[loop_body_index])
+        self.visit(node.body)
         self.emit('GOTO', None, None, loop_start)
         self.emit('LABEL', None, None, loop_end)
         self.loop_stack.pop()
@@ -1477,19 +1404,9 @@ class TACGenerator(Visitor):
         loop_end = self.get_label()
         self.loop_stack.append((loop_start, loop_end))
         self.emit('LABEL', None, None, loop_start)
-        loop_body_found = False
-        for i, child in enumerate(node.children):
-            if hasattr(child, 'data') and child.data == 'loop_block':
-                self.visit(child)
-                loop_body_found = True
-                break
-        if not loop_body_found:
-            loop_body_index = 2  
-            if len(node.children) > loop_body_index:
-                self.visit(node.children[loop_body_index])
+        self.visit(node.body)
         self.emit('LABEL', None, None, loop_cond)
-        condition_node_index = 6  
-        condition_temp = self.visit(node.children[condition_node_index])
+        condition_temp = self.visit(node.condition)
         self.emit('IFTRUE', condition_temp, None, loop_start)
         self.emit('LABEL', None, None, loop_end)
         self.loop_stack.pop()
@@ -1506,24 +1423,15 @@ class TACGenerator(Visitor):
         end_label = self.get_label()
         self.loop_stack.append((update_label, end_label))
         self.emit('LABEL', None, None, init_label)
-        self.visit(node.children[2])  
+        self.visit(node.init)
         self.emit('GOTO', None, None, cond_label)
         self.emit('LABEL', None, None, body_label)
-        loop_body_found = False
-        for i, child in enumerate(node.children):
-            if hasattr(child, 'data') and child.data == 'func_loop_block':
-                self.visit(child)
-                loop_body_found = True
-                break
-        if not loop_body_found:
-            loop_body_index = 7  
-            if len(node.children) > loop_body_index:
-                self.visit(node.children[loop_body_index])
+        self.visit(node.body)
         self.emit('LABEL', None, None, update_label)
-        self.visit(node.children[5])  
+        self.visit(node.update)
         self.emit('GOTO', None, None, cond_label)
         self.emit('LABEL', None, None, cond_label)
-        condition_temp = self.visit(node.children[3])
+        condition_temp = self.visit(node.condition)
         self.emit('IFTRUE', condition_temp, None, body_label)
         self.emit('GOTO', None, None, end_label)  
         self.emit('LABEL', None, None, end_label)
@@ -1538,18 +1446,9 @@ class TACGenerator(Visitor):
         loop_end = self.get_label()
         self.loop_stack.append((loop_start, loop_end))
         self.emit('LABEL', None, None, loop_start)
-        condition_temp = self.visit(node.children[2])
+        condition_temp = self.visit(node.condition)
         self.emit('IFFALSE', condition_temp, None, loop_end)
-        loop_body_found = False
-        for i, child in enumerate(node.children):
-            if hasattr(child, 'data') and child.data == 'func_loop_block':
-                self.visit(child)
-                loop_body_found = True
-                break
-        if not loop_body_found:
-            loop_body_index = 4  
-            if len(node.children) > loop_body_index:
-                self.visit(node.children[loop_body_index])
+        self.visit(node.body)
         self.emit('GOTO', None, None, loop_start)
         self.emit('LABEL', None, None, loop_end)
         self.loop_stack.pop()
@@ -1564,19 +1463,9 @@ class TACGenerator(Visitor):
         loop_end = self.get_label()
         self.loop_stack.append((loop_start, loop_end))
         self.emit('LABEL', None, None, loop_start)
-        loop_body_found = False
-        for i, child in enumerate(node.children):
-            if hasattr(child, 'data') and child.data == 'func_loop_block':
-                self.visit(child)
-                loop_body_found = True
-                break
-        if not loop_body_found:
-            loop_body_index = 2  
-            if len(node.children) > loop_body_index:
-                self.visit(node.children[loop_body_index])
+        self.visit(node.body)
         self.emit('LABEL', None, None, loop_cond)
-        condition_node_index = 6  
-        condition_temp = self.visit(node.children[condition_node_index])
+        condition_temp = self.visit(node.condition)
         self.emit('IFTRUE', condition_temp, None, loop_start)
         self.emit('LABEL', None, None, loop_end)
         self.loop_stack.pop()
@@ -1588,17 +1477,15 @@ class TACGenerator(Visitor):
         """
         else_label = self.get_label()
         end_label = self.get_label()
-        condition = self.visit(node.children[2])
+        condition = self.visit(node.condition)
         self.emit('IFFALSE', condition, None, else_label)
-        self.visit(node.children[5])  
+        self.visit(node.body)
         self.emit('GOTO', None, None, end_label)
         self.emit('LABEL', None, None, else_label)
-        for child in node.children[6:]:
-            if child and hasattr(child, 'data'):
-                if child.data == 'loop_recheck_statement':
-                    self.visit_loop_recheck_statement(child, end_label)
-                elif child.data == 'loop_otherwise_statement':
-                    self.visit_loop_otherwise_statement(child)
+        if node.recheck is not None:
+            self.visit_loop_recheck_statement(node.recheck, end_label)
+        if node.otherwise is not None:
+            self.visit_loop_otherwise_statement(node.otherwise)
         self.emit('LABEL', None, None, end_label)
         return None
     def visit_loop_recheck_statement(self, node, end_label):
@@ -1608,13 +1495,13 @@ class TACGenerator(Visitor):
         if not node or not hasattr(node, 'children') or len(node.children) < 5:
             return None
         next_else_label = self.get_label()
-        condition = self.visit(node.children[2])
+        condition = self.visit(node.condition)
         self.emit('IFFALSE', condition, None, next_else_label)
-        self.visit(node.children[5])  
+        self.visit(node.body)
         self.emit('GOTO', None, None, end_label)
         self.emit('LABEL', None, None, next_else_label)
-        if len(node.children) > 7 and node.children[7]:
-            self.visit_loop_recheck_statement(node.children[7], end_label)
+        if node.recheck:
+            self.visit_loop_recheck_statement(node.recheck, end_label)
         return None
     def visit_loop_otherwise_statement(self, node):
         """
@@ -1622,7 +1509,7 @@ class TACGenerator(Visitor):
         """
         if not node or not hasattr(node, 'children') or len(node.children) < 3:
             return None
-        self.visit(node.children[2])  
+        self.visit(node.body)
         return None
     def visit_match_statement(self, node):
         """
@@ -1630,20 +1517,20 @@ class TACGenerator(Visitor):
         Structure: match LPAREN expression RPAREN LBRACE CASE literals COLON program case_tail default RBRACE
         """
         end_label = self.get_label()
-        match_expr = self.visit(node.children[2])
+        match_expr = self.visit(node.subject)
         match_expr_val = match_expr[1] if isinstance(match_expr, tuple) and len(match_expr) >= 2 else match_expr
-        case_value = self.visit(node.children[6])
+        case_value = self.visit(node.case_label)
         comp_temp = self.get_temp()
         self.emit('EQ', match_expr_val, case_value[1] if isinstance(case_value, tuple) else case_value, comp_temp)
         next_case_label = self.get_label()
         self.emit('IFFALSE', comp_temp, None, next_case_label)
-        self.visit(node.children[8])
+        self.visit(node.body)
         self.emit('GOTO', None, None, end_label)
         self.emit('LABEL', None, None, next_case_label)
-        if len(node.children) > 9 and node.children[9]:
-            self.visit_case_tail(node.children[9], match_expr_val, end_label)
-        if len(node.children) > 10 and node.children[10]:
-            self.visit(node.children[10])
+        if node.cases:
+            self.visit_case_tail(node.cases, match_expr_val, end_label)
+        if node.default:
+            self.visit(node.default)
         self.emit('LABEL', None, None, end_label)
         return None
     def visit_case_tail(self, node, match_expr, end_label):
@@ -1652,16 +1539,16 @@ class TACGenerator(Visitor):
         """
         if not node or not hasattr(node, 'children') or len(node.children) < 4:
             return None
-        case_value = self.visit(node.children[1])
+        case_value = self.visit(node.label)
         comp_temp = self.get_temp()
         self.emit('EQ', match_expr, case_value[1] if isinstance(case_value, tuple) else case_value, comp_temp)
         next_case_label = self.get_label()
         self.emit('IFFALSE', comp_temp, None, next_case_label)
-        self.visit(node.children[3])
+        self.visit(node.body)
         self.emit('GOTO', None, None, end_label)
         self.emit('LABEL', None, None, next_case_label)
-        if len(node.children) > 4 and node.children[4]:
-            self.visit_case_tail(node.children[4], match_expr, end_label)
+        if node.cases:
+            self.visit_case_tail(node.cases, match_expr, end_label)
         return None
     def visit_func_checkif_statement(self, node):
         """
@@ -1670,17 +1557,15 @@ class TACGenerator(Visitor):
         """
         else_label = self.get_label()
         end_label = self.get_label()
-        condition = self.visit(node.children[2])
+        condition = self.visit(node.condition)
         self.emit('IFFALSE', condition, None, else_label)
-        self.visit(node.children[5])  
+        self.visit(node.body)
         self.emit('GOTO', None, None, end_label)
         self.emit('LABEL', None, None, else_label)
-        for child in node.children[6:]:
-            if child and hasattr(child, 'data'):
-                if child.data == 'func_recheck_statement':
-                    self.visit_func_recheck_statement(child, end_label)
-                elif child.data == 'func_otherwise_statement':
-                    self.visit_func_otherwise_statement(child)
+        if node.recheck is not None:
+            self.visit_func_recheck_statement(node.recheck, end_label)
+        if node.otherwise is not None:
+            self.visit_func_otherwise_statement(node.otherwise)
         self.emit('LABEL', None, None, end_label)
         return None
     def visit_func_recheck_statement(self, node, end_label):
@@ -1690,13 +1575,13 @@ class TACGenerator(Visitor):
         if not node or not hasattr(node, 'children') or len(node.children) < 5:
             return None
         next_else_label = self.get_label()
-        condition = self.visit(node.children[2])
+        condition = self.visit(node.condition)
         self.emit('IFFALSE', condition, None, next_else_label)
-        self.visit(node.children[5])  
+        self.visit(node.body)
         self.emit('GOTO', None, None, end_label)
         self.emit('LABEL', None, None, next_else_label)
-        if len(node.children) > 7 and node.children[7]:
-            self.visit_func_recheck_statement(node.children[7], end_label)
+        if node.recheck:
+            self.visit_func_recheck_statement(node.recheck, end_label)
         return None
     def visit_func_otherwise_statement(self, node):
         """
@@ -1704,7 +1589,7 @@ class TACGenerator(Visitor):
         """
         if not node or not hasattr(node, 'children') or len(node.children) < 3:
             return None
-        self.visit(node.children[2])  
+        self.visit(node.body)
         return None
     def visit_func_loop_checkif_statement(self, node):
         """
@@ -1712,17 +1597,15 @@ class TACGenerator(Visitor):
         """
         else_label = self.get_label()
         end_label = self.get_label()
-        condition = self.visit(node.children[2])
+        condition = self.visit(node.condition)
         self.emit('IFFALSE', condition, None, else_label)
-        self.visit(node.children[5])  
+        self.visit(node.body)
         self.emit('GOTO', None, None, end_label)
         self.emit('LABEL', None, None, else_label)
-        for child in node.children[6:]:
-            if child and hasattr(child, 'data'):
-                if child.data == 'func_loop_recheck_statement':
-                    self.visit_func_loop_recheck_statement(child, end_label)
-                elif child.data == 'func_loop_otherwise_statement':
-                    self.visit_func_loop_otherwise_statement(child)
+        if node.recheck is not None:
+            self.visit_func_loop_recheck_statement(node.recheck, end_label)
+        if node.otherwise is not None:
+            self.visit_func_loop_otherwise_statement(node.otherwise)
         self.emit('LABEL', None, None, end_label)
         return None
     def visit_func_loop_recheck_statement(self, node, end_label):
@@ -1732,13 +1615,13 @@ class TACGenerator(Visitor):
         if not node or not hasattr(node, 'children') or len(node.children) < 5:
             return None
         next_else_label = self.get_label()
-        condition = self.visit(node.children[2])
+        condition = self.visit(node.condition)
         self.emit('IFFALSE', condition, None, next_else_label)
-        self.visit(node.children[5])  
+        self.visit(node.body)
         self.emit('GOTO', None, None, end_label)
         self.emit('LABEL', None, None, next_else_label)
-        if len(node.children) > 7 and node.children[7]:
-            self.visit_func_loop_recheck_statement(node.children[7], end_label)
+        if node.recheck:
+            self.visit_func_loop_recheck_statement(node.recheck, end_label)
         return None
     def visit_func_loop_otherwise_statement(self, node):
         """
@@ -1746,11 +1629,11 @@ class TACGenerator(Visitor):
         """
         if not node or not hasattr(node, 'children') or len(node.children) < 3:
             return None
-        self.visit(node.children[2])  
+        self.visit(node.body)
         return None
     def visit_group_declaration(self, node):
         """Handle group declarations."""
-        ident = node.children[1]
+        ident = node.name
         name = ident.value
         
         # Create a temporary for the group
@@ -1758,8 +1641,8 @@ class TACGenerator(Visitor):
         self.emit('GROUP_CREATE', None, None, temp)
         
         # Process group members
-        if len(node.children) > 3 and node.children[3]:
-            self.visit_group_members(node.children[3], temp)
+        if node.members:
+            self.visit_group_members(node.members, temp)
         
         # Assign the group to the variable
         self.emit('ASSIGN', temp, None, name)
@@ -1791,41 +1674,6 @@ class TACGenerator(Visitor):
         
         return None
 
-    def _calculate_paren_depth(self, node, current_depth=0):
-        """
-        Calculate the maximum nesting depth of parenthesized expressions in a node.
-        Higher depths should be processed first (innermost parentheses).
-        Uses caching for optimization.
-        """
-        node_id = id(node)
-        cache_key = (node_id, current_depth)
-        
-        # Check if we've already calculated this depth
-        if cache_key in self.paren_depth_cache:
-            return self.paren_depth_cache[cache_key]
-            
-        if not hasattr(node, 'data'):
-            return current_depth
-            
-        max_depth = current_depth
-        
-        # If this is a parenthesized expression, increment depth for children
-        is_paren = node.data == 'primary_expr' and len(node.children) > 1 and \
-                  hasattr(node.children[0], 'type') and node.children[0].type == 'LPAREN'
-        
-        child_depth = current_depth + 1 if is_paren else current_depth
-        
-        # Calculate max depth among all children
-        for child in node.children:
-            if hasattr(child, 'data'):
-                child_max = self._calculate_paren_depth(child, child_depth)
-                max_depth = max(max_depth, child_max)
-        
-        # Cache the result before returning
-        self.paren_depth_cache[cache_key] = max_depth
-                
-        return max_depth
-
     def get_source_position(self, node):
         """
         Extract line and column information from an AST node.
@@ -1864,13 +1712,13 @@ class TACGenerator(Visitor):
         """Handle fixed variable declarations."""
         if not node or not hasattr(node, 'children') or len(node.children) < 2:
             return None
-        var_name = node.children[1].value
+        var_name = node.name.value
         source_pos = self.get_source_position(node)
         
         if len(node.children) >= 3 and node.children[2] and node.children[2].value == '=':
             # There is an initialization expression after the equal sign
-            if len(node.children) > 3 and node.children[3]:
-                init_expr = self.visit(node.children[3])
+            if node.expr:
+                init_expr = self.visit(node.expr)
                 if isinstance(init_expr, tuple) and init_expr[0] in ('id','integer','float','bool','string','text'):
                     self.emit('ASSIGN', init_expr[1], None, var_name,
                              *(source_pos if source_pos else (None, None)))
@@ -1880,21 +1728,21 @@ class TACGenerator(Visitor):
                              *(source_pos if source_pos else (None, None)))
         
         # Process any fixed_tail for multiple declarations
-        if len(node.children) > 4 and node.children[4]:
-            self.visit(node.children[4])
+        if node.tail:
+            self.visit(node.tail)
         return None
     
     def visit_fixed_tail(self, node):
         """Handle additional fixed variable declarations."""
         if not node or not hasattr(node, 'children') or len(node.children) < 2:
             return None
-        var_name = node.children[1].value
+        var_name = node.name.value
         source_pos = self.get_source_position(node)
         
         if len(node.children) >= 3 and node.children[2] and node.children[2].value == '=':
             # There is an initialization expression after the equal sign
-            if len(node.children) > 3 and node.children[3]:
-                init_expr = self.visit(node.children[3])
+            if node.expr:
+                init_expr = self.visit(node.expr)
                 if isinstance(init_expr, tuple) and init_expr[0] in ('id','integer','float','bool','string','text'):
                     self.emit('ASSIGN', init_expr[1], None, var_name,
                              *(source_pos if source_pos else (None, None)))
@@ -0,0 +1,100 @@
+# execution_budget.py
+#
+# Limits on what one run of a TAC program may use: steps, wall-clock time,
+# output, the size of its lists and texts, and call depth. A program that
+# goes over one is stopped with a BudgetExceeded, which says which limit it
+# was; the interpreter keeps it as its termination and writes its message
+# to the output.
+#
+# Steps, time, output and call depth only change a little per instruction,
+# so the run loop calls check() every check_interval steps rather than
+# testing them on each one. A single instruction can make a list or text
+# huge (a repetition, or doubling it a few times over), so the instructions
+# that build them check their size with check_list_size() and
+# check_text_length() as they go, before they build a value over the limit
+# where they can.
+
+import time
+
+# Value of a limit that is not set
+UNLIMITED = float('inf')
+
+# Steps between checks of the step, time, output and call depth limits
+CHECK_INTERVAL = 1024
+
+
+class BudgetExceeded(Exception):
+    """
+    A run went over one of its ExecutionBudget limits. reason is 'steps',
+    'time', 'output', 'list_size', 'text_length' or 'call_depth'.
+    """
+
+    def __init__(self, reason, limit, message):
+        super().__init__(message)
+        self.reason = reason
+        self.limit = limit
+
+    def as_dict(self):
+        """The termination as execute_code reports it."""
+        return {'reason': self.reason, 'limit': self.limit, 'message': str(self)}
+
+
+class ExecutionBudget:
+    """
+    The limits of one interpreter's runs; None leaves a limit unset. A run
+    that reads input is split into segments, one per run() or
+    resume_with_input() call. The time limit applies to each segment: it
+    counts from start(), called as each segment starts, so time spent
+    waiting for input is not counted. The step and output limits apply to
+    the whole run: the step count and the output written carry over from
+    one segment to the next.
+    """
+
+    def __init__(self, max_steps=None, max_seconds=None, max_output_length=None,
+                 max_list_size=None, max_text_length=None, max_call_depth=None,
+                 check_interval=CHECK_INTERVAL):
+        self.max_steps = UNLIMITED if max_steps is None else max_steps
+        self.max_seconds = max_seconds
+        self.max_output_length = UNLIMITED if max_output_length is None else max_output_length
+        self.max_list_size = UNLIMITED if max_list_size is None else max_list_size
+        self.max_text_length = UNLIMITED if max_text_length is None else max_text_length
+        self.max_call_depth = UNLIMITED if max_call_depth is None else max_call_depth
+        self.check_interval = check_interval
+        self.deadline = UNLIMITED
+
+    def start(self):
+        """Start the clock for a run (or the part of it up to the next input)."""
+        if self.max_seconds is None:
+            self.deadline = UNLIMITED
+        else:
+            self.deadline = time.perf_counter() + self.max_seconds
+
+    def check(self, steps, output_length, call_depth):
+        """
+        Raise BudgetExceeded if a run that has executed steps instructions,
+        written output_length characters and is call_depth calls deep is
+        over a limit. Otherwise return the step count to check again at.
+        """
+        if steps >= self.max_steps:
+            raise BudgetExceeded('steps', self.max_steps, f"Max steps ({self.max_steps}) reached")
+        if output_length > self.max_output_length:
+            raise BudgetExceeded('output', self.max_output_length,
+                                 f"Output limit ({self.max_output_length} characters) reached")
+        if call_depth > self.max_call_depth:
+            raise BudgetExceeded('call_depth', self.max_call_depth,
+                                 f"Call depth limit ({self.max_call_depth} calls) reached")
+        if time.perf_counter() > self.deadline:
+            raise BudgetExceeded('time', self.max_seconds, f"Time limit ({self.max_seconds} s) reached")
+        return min(steps + self.check_interval, self.max_steps)
+
+    def check_list_size(self, size):
+        """Raise BudgetExceeded if a list of size items is over the limit."""
+        if size > self.max_list_size:
+            raise BudgetExceeded('list_size', self.max_list_size,
+                                 f"List size limit ({self.max_list_size} items) reached")
+
+    def check_text_length(self, length):
+        """Raise BudgetExceeded if a text of length characters is over the limit."""
+        if length > self.max_text_length:
+            raise BudgetExceeded('text_length', self.max_text_length,
+                                 f"Text length limit ({self.max_text_length} characters) reached")
@@ -1,33 +1,102 @@
 from backend.CodegenTAC.built_in_functions import MinimaBultins
+from backend.CodegenTAC.tac_program import TACProgram, OPCODES, OPCODE_NUMBERS, decode_literal
+from backend.CodegenTAC.closure_compiler import compile_steps
+from backend.CodegenTAC.call_stack import CallStack, UNBOUND
+from backend.CodegenTAC.execution_budget import ExecutionBudget, BudgetExceeded, UNLIMITED
 from io import StringIO
 import traceback  
 import math
+import re
 from decimal import Decimal, getcontext
 
+# Opcode X is executed by the interpreter method execute_x
+HANDLER_PREFIX = 'execute_'
+
+# The first run of three or more 9s in a fraction is float noise and is cut
+# out of printed numbers (-0.7 - 0.2 is -0.8999999999999999, printed -0.8)
+FLOAT_NOISE = re.compile(r'(-?\d+\.\d*?)9{3,}(\d*)')
+
+class InputRequest:
+    """
+    What TACInterpreter.execute() yields when the program reads input: the
+    prompt to show, and the type the value is cast to (None if it is not).
+    """
+    __slots__ = ('prompt', 'expected_type')
+
+    def __init__(self, prompt, expected_type=None):
+        self.prompt = prompt
+        self.expected_type = expected_type
+
 class TACInterpreter:
     def __init__(self):
-        self.memory_stack = [{}]  # Stack of dictionaries for scopes (global scope at index 0)
         self.functions = {}
         self.function_params = {}  
-        self.call_info_stack = []  # Stack for return information (IP, target variable)
         self.ip = 0
         self.param_stack = []
         self.output_buffer = StringIO()
-        self.instructions = []
-        self.source_positions = []  # New: Store source positions for each instruction
-        self.labels = {}
+        self.program = TACProgram()
+        self.code = self.program.link()  # What run() executes: the program without LABEL/FUNCTION
+        self.call_stack = CallStack(self.code)  # Variables, by frame (global frame at index 0)
+        self.instructions = self.program.instructions  # (op, arg1, arg2, result) view of the program
+        self.source_positions = self.program.source_positions  # (line, column) view of the program
+        self.labels = {}  # Label name -> index in self.code
         self.function_bodies = {}
         self.waiting_for_input = False
         self.input_prompt = ""
         self.input_result_var = None
         self.steps_executed = 0
-        self.max_execution_steps = 10000  
+        self.output_written = 0  # Output of the run's earlier segments, before the last input
+        self.budget = ExecutionBudget(max_steps=10000)
+        self.termination = None  # BudgetExceeded that stopped the last run, if one did
         self.max_digits = 9
         self.min_number = -999999999
         self.max_number = 999999999
         self.input_expected_type = None  
         self.builtins = MinimaBultins.get_builtin_implementations()
         self.debug_mode = False  
+        self.handlers = self.bind_handlers()  # Opcode number -> bound execute_<op> method
+        self.steps = None  # Closure per instruction of self.code, see compiled_steps()
+        self.execution = None  # execute() generator of the current run, while it can be resumed
+        self.steps_debug_mode = False
+
+    @classmethod
+    def handler_table(cls):
+        """
+        Opcode number -> execute_<op> function of cls, built on first use
+        and kept on the class. Opcodes without a handler map to None.
+        """
+        table = cls.__dict__.get('_handler_table')
+        if table is None:
+            table = [getattr(cls, HANDLER_PREFIX + op.lower(), None) for op in OPCODES]
+            cls._handler_table = table
+        return table
+
+    def bind_handlers(self):
+        """Opcode number -> handler bound to this interpreter, for run()."""
+        handlers = []
+        for op, handler in zip(OPCODES, self.handler_table()):
+            if handler is None:
+                handlers.append(self.unknown_instruction_handler(op))
+            else:
+                handlers.append(handler.__get__(self))
+        return handlers
+
+    def compiled_steps(self):
+        """
+        The closures run() calls for self.code, compiled on first use after
+        load() and again when debug_mode has changed since.
+        """
+        if self.steps is None or self.steps_debug_mode != self.debug_mode:
+            self.steps = compile_steps(self)
+            self.steps_debug_mode = self.debug_mode
+        return self.steps
+
+    @staticmethod
+    def unknown_instruction_handler(op):
+        """Handler for an opcode the interpreter does not execute (LABEL and FUNCTION are linked away)."""
+        def unknown_instruction(arg1, arg2, result, target):
+            raise ValueError(f"Unknown TAC instruction: {op}")
+        return unknown_instruction
 
     def validate_number(self, value):
         """Validate that a number is within the allowed range."""
@@ -77,6 +146,8 @@ class TACInterpreter:
 
     def format_number_for_output(self, value):
         """Format number for output according to Minima language rules."""
+        if type(value) is int and self.min_number <= value <= self.max_number:
+            return str(value)
         if not isinstance(value, (int, float)):
             return value
         try:
@@ -123,7 +194,7 @@ class TACInterpreter:
             
             # Assemble result - only include decimal point if we have a fractional part
             if frac_part:
-                return f"{sign}{int_part}.{frac_part}"
+                return FLOAT_NOISE.sub(r"\1\2", f"{sign}{int_part}.{frac_part}")
             else:
                 return f"{sign}{int_part}"
         else:
@@ -135,82 +206,53 @@ class TACInterpreter:
         Set the maximum execution steps limit.
         Use None to disable the limit entirely.
         """
-        self.max_execution_steps = limit
+        self.budget.max_steps = UNLIMITED if limit is None else limit
 
-    def find_variable_scope(self, name):
-        """Finds the innermost scope dictionary containing the variable."""
-        if not isinstance(name, str):
-            return None
-        for scope in reversed(self.memory_stack):
-            if name in scope:
-                return scope
-        return None
+    @property
+    def max_execution_steps(self):
+        """The step limit of self.budget (UNLIMITED when there is none)."""
+        return self.budget.max_steps
+
+    @max_execution_steps.setter
+    def max_execution_steps(self, limit):
+        self.set_execution_limit(limit)
+
+    def set_budget(self, budget):
+        """Run under the limits of ExecutionBudget budget from now on."""
+        self.budget = budget
+        self.steps = None  # Closures check the list and text limits they were compiled with
+
+    @property
+    def memory_stack(self):
+        """The variables of each frame as a name -> value dict, global scope first (a snapshot)."""
+        return self.call_stack.scopes()
 
     def assign_variable(self, name, value):
         """Assigns a value to a variable in the current scope."""
         if not isinstance(name, str):
             raise TypeError(f"Invalid variable name for assignment: {name}")
-        self.memory_stack[-1][name] = value
+        self.call_stack.assign(name, value)
         if self.debug_mode:
-            print(f"Assigned '{name}' = {repr(value)} in scope level {len(self.memory_stack) - 1}")
+            print(f"Assigned '{name}' = {repr(value)} in scope level {len(self.call_stack) - 1}")
 
     def resolve_variable(self, val):
         """Resolve a variable name or literal to its value using the scope stack."""
         if isinstance(val, str):
             # 1. Check scopes for variable name
-            scope = self.find_variable_scope(val)
-            if scope is not None:
-                return scope[val]
+            value = self.call_stack.lookup(val)
+            if value is not UNBOUND:
+                return value
             # 2. Check if it's a temporary variable name (t1, t2, etc.)
             if val.startswith('t') and val[1:].isdigit():
                 if self.debug_mode:
                     print(f"Warning: Temporary variable '{val}' not found in any scope.")
                 return val
-            # 3. Check for literals after checking variables
-            if val == 'empty':
-                return None
-            if val == 'YES':
-                return True
-            if val == 'NO':
-                return False
-            if val.startswith('-'):
-                num_part = val[1:]
-                if num_part.isdigit():
-                    try:
-                        return -int(num_part)
-                    except ValueError: pass
-                elif '.' in num_part or 'e' in num_part.lower():
-                    try:
-                        return -float(num_part)
-                    except ValueError: pass
-            elif val.isdigit():
-                try:
-                    return int(val)
-                except ValueError: pass
-            elif '.' in val or 'e' in val.lower():
-                try:
-                    return float(val)
-                except ValueError: pass
-            if val.startswith('"') and val.endswith('"'):
-                inner_str = val[1:-1]
-                # Handle escape sequences
-                result = ""
-                i = 0
-                while i < len(inner_str):
-                    if inner_str[i] == '\\' and i + 1 < len(inner_str):
-                        next_char = inner_str[i+1]
-                        if next_char == '\\': result += '\\'
-                        elif next_char == '"': result += '"'
-                        elif next_char == 'n': result += '\n'
-                        elif next_char == 't': result += '\t'
-                        else: result += '\\' + next_char
-                        i += 2
-                    else:
-                        result += inner_str[i]
-                        i += 1
-                return result
-            # 4. If it's not a variable in scope and not a recognized literal, return the string itself
-            return val
+            # 3. Names no instruction assigns were decoded when the program was linked
+            literal = self.code.literals.get(val, UNBOUND)
+            if literal is not UNBOUND:
+                return literal
+            # 4. Otherwise decode it as a literal; what is not one is the string itself
+            return decode_literal(val)
         elif isinstance(val, tuple) and len(val) >= 2:
             if val[0] in ('integer', 'float', 'bool', 'text', 'id', 'list', 'point', 'state', 'empty'):
                 if val[0] == 'id':
@@ -225,8 +267,7 @@ class TACInterpreter:
         return val
 
     def reset(self):
-        self.memory_stack = [{}]
-        self.call_info_stack = []
+        self.call_stack = CallStack(self.code)
         self.functions = {}
         self.function_params = {}
         self.ip = 0
@@ -234,34 +275,40 @@ class TACInterpreter:
         self.output_buffer = StringIO()
         self.function_bodies = {}
         self.labels = {}
-        self.source_positions = []  # New: Reset source positions
         self.waiting_for_input = False
         self.input_prompt = ""
         self.input_result_var = None
         self.steps_executed = 0
+        self.output_written = 0
+        self.termination = None
+        self.steps = None
+        self.execution = None
 
     def load(self, instructions, source_positions=None):
         """
         Load TAC instructions and their source positions.
         
         Args:
-            instructions: List of TAC instructions
-            source_positions: Optional list of source positions (line, column) for each instruction
+            instructions: A TACProgram, or a list of TAC instruction tuples
+            source_positions: Optional list of source positions (line, column) for each
+                instruction tuple; a TACProgram carries its own
         
         Returns:
             self (for method chaining)
         """
         self.reset()
-        self.instructions = instructions
-        
-        # Store source positions if provided, otherwise initialize with None values
-        if source_positions:
-            self.source_positions = source_positions
+        if isinstance(instructions, TACProgram):
+            self.program = instructions
         else:
-            self.source_positions = [None] * len(instructions)
+            self.program = TACProgram.from_instructions(instructions, source_positions)
+        self.code = self.program.link()
+        self.call_stack = CallStack(self.code)
+        self.labels = self.code.labels
+        self.instructions = self.program.instructions
+        self.source_positions = self.program.source_positions
             
         current_function = None
-        for i, (op, arg1, arg2, result) in enumerate(instructions):
+        for i, (op, arg1, arg2, result) in enumerate(self.instructions):
             if op == 'FUNCTION':
                 current_function = arg1
                 self.functions[current_function] = result
@@ -272,76 +319,27 @@ class TACInterpreter:
                         line, col = self.source_positions[i]
                         source_info = f" (at line {line}, col {col})"
                     print(f"Registered function '{current_function}' starting at label '{result}' with params {arg2}{source_info}")
-            elif op == 'LABEL':
-                self.labels[result] = i
-                if self.debug_mode:
-                    print(f"Registering label '{result}' at instruction index {i}")
+            elif op == 'LABEL' and self.debug_mode:
+                print(f"Registering label '{result}' at instruction index {i} (linked index {self.labels[result]})")
         if self.debug_mode:
-            print(f"Loaded {len(instructions)} instructions")
+            print(f"Loaded {len(self.program)} instructions, {len(self.code)} after linking")
             print(f"Labels defined: {list(self.labels.keys())}")
             print(f"Functions defined: {list(self.functions.keys())}")
         return self
 
-    def run(self):
-        """Execute the loaded TAC instructions."""
-        self.ip = 0
-        self.waiting_for_input = False
-        self.steps_executed = 0  
+    def run(self, steps_spent=None):
+        """
+        Execute the loaded TAC instructions, up to the end or the first
+        input, and return the output. steps_spent is for running a program
+        again after another attempt at it (see TranspiledProgram.run): the
+        steps that attempt took, which count toward the budget, whose clock
+        is then not restarted.
+        """
         self.output_buffer = StringIO()  
         if self.debug_mode:
             print("--- Starting New Execution Run ---")
-        last_ips = []  
-        loop_detection_window = 10  
-        loop_threshold = 20  
-        loop_pattern_count = 0
-        while 0 <= self.ip < len(self.instructions):
-            if self.max_execution_steps is not None and self.steps_executed >= self.max_execution_steps:
-                print(f"Execution terminated after {self.steps_executed} steps (max limit: {self.max_execution_steps}).")
-                self.output_buffer.write(f"\n[Execution stopped: Max steps ({self.max_execution_steps}) reached]\n")
-                break
-            op, arg1, arg2, result = self.instructions[self.ip]
-            last_ips.append(self.ip)
-            if len(last_ips) > loop_detection_window:
-                last_ips.pop(0)
-                if len(last_ips) == loop_detection_window:
-                    if (self.ip == 6 and  
-                        arg1 == None and 
-                        arg2 == None and 
-                        result == "L3" and
-                        self.steps_executed > 1000):  
-                        loop_pattern_count += 1
-                        if loop_pattern_count > loop_threshold:
-                            if 'i' in self.memory_stack[-1] and isinstance(self.memory_stack[-1]['i'], int):
-                                self.memory_stack[-1]['i'] -= 1
-                                if self.debug_mode:
-                                    print(f"DETECTED AND FIXED INFINITE LOOP: Decremented i to {self.memory_stack[-1]['i']}")
-                                loop_pattern_count = 0
-            if self.debug_mode:
-                current_instruction_str = f"{self.ip}: {op} {arg1}, {arg2}, {result}"
-                print(f"Step {self.steps_executed}: Executing {current_instruction_str}")
-            try:
-                prev_ip = self.ip
-                self.execute_instruction(op, arg1, arg2, result)
-                self.steps_executed += 1
-                if self.waiting_for_input:
-                    if self.debug_mode:
-                        print(f"--- Pausing for Input (IP: {self.ip}) ---")
-                    break  
-                if self.ip == prev_ip:
-                    self.ip += 1
-            except Exception as e:
-                error_line = prev_ip
-                # Get source position for error reporting
-                source_pos = self.source_positions[error_line] if error_line < len(self.source_positions) else None
-                source_info = ""
-                if source_pos:
-                    source_info = f" at line {source_pos[0]}, column {source_pos[1]}"
-                
-                error_message = f"\nRuntime Error{source_info} (instruction {error_line}: {op} {arg1} {arg2} {result}): {str(e)}\n"
-                print(error_message)
-                print(traceback.format_exc())
-                self.output_buffer.write(error_message)
-                self.ip = len(self.instructions)
+        self.execution = self.execute(steps_spent)
+        self.advance(None)
         if self.debug_mode:
             final_output = self.output_buffer.getvalue()
             print(f"--- Execution Finished (IP: {self.ip}, Steps: {self.steps_executed}) ---")
@@ -349,67 +347,124 @@ class TACInterpreter:
         return self.output_buffer.getvalue()
 
     def resume_with_input(self, user_input):
-        """Resume execution after receiving user input with validation for numeric inputs."""
+        """
+        Resume execution after receiving user input with validation for
+        numeric inputs, and return the output written since.
+        """
         if not self.waiting_for_input:
             raise ValueError("Interpreter is not waiting for input")
         if self.debug_mode:
             print(f"--- Resuming Execution with Input: '{user_input}' (IP: {self.ip}) ---")
             print(f"  Variable to store input: {self.input_result_var}")
+        self.output_written += self.output_buffer.tell()
         self.output_buffer = StringIO()
+        self.advance(user_input)
+        if self.debug_mode:
+            segment_output = self.output_buffer.getvalue()
+            print(f"--- Resumed Segment Finished (IP: {self.ip}, Steps: {self.steps_executed}) ---")
+            print(f"Segment Output Buffer Content:\n'''\n{segment_output}\n'''")
+        return self.output_buffer.getvalue()
+
+    def advance(self, value):
+        """Send value to self.execution, running it to its next input request or its end."""
         try:
-            input_val_str = str(user_input)
-            validated_input = self.validate_and_parse_input(input_val_str, self.input_expected_type)
-            self.assign_variable(self.input_result_var, validated_input)
-            if self.debug_mode:
-                print(f"  Stored validated input in '{self.input_result_var}': {repr(validated_input)} (type: {type(validated_input).__name__}) in scope level {len(self.memory_stack) - 1}")
-            self.waiting_for_input = False
-            self.input_prompt = ""
-            self.input_result_var = None
-            self.input_expected_type = None
-            self.ip += 1
-        except ValueError as e:
-            error_message = f"\nInput Error: {str(e)}\n"
-            print(error_message)
-            print(traceback.format_exc())
-            self.output_buffer.write(error_message)
-            return self.output_buffer.getvalue()
-        while 0 <= self.ip < len(self.instructions):
-            if self.max_execution_steps is not None and self.steps_executed >= self.max_execution_steps:
-                print(f"Execution terminated after {self.steps_executed} steps (max limit: {self.max_execution_steps}).")
-                self.output_buffer.write(f"\n[Execution stopped: Max steps ({self.max_execution_steps}) reached]\n")
+            self.execution.send(value)
+        except StopIteration:
+            self.execution = None
+
+    def execute(self, steps_spent=None):
+        """
+        Generator running the loaded program from the start, writing its
+        output to self.output_buffer. Each time the program reads input it
+        yields an InputRequest; send() it the text entered to go on. It
+        returns when the program ends, fails or goes over its budget.
+
+        The step, time, output and call depth limits are checked every
+        budget.check_interval steps. steps_spent is as for run().
+        """
+        self.ip = 0
+        self.waiting_for_input = False
+        self.steps_executed = 0 if steps_spent is None else steps_spent
+        self.output_written = 0
+        self.termination = None
+        code = self.code
+        instruction_count = len(code)
+        steps = self.compiled_steps()
+        budget = self.budget
+        if steps_spent is None:
+            budget.start()
+        while 0 <= self.ip < instruction_count:
+            try:
+                check_at = budget.check(self.steps_executed, self.output_written + self.output_buffer.tell(),
+                                        len(self.call_stack) - 1)
+            except BudgetExceeded as exceeded:
+                self.terminate(exceeded)
                 break
-            op, arg1, arg2, result = self.instructions[self.ip]
-            if self.debug_mode:
-                current_instruction_str = f"{self.ip}: {op} {arg1}, {arg2}, {result}"
-                print(f"Step {self.steps_executed}: Executing {current_instruction_str}")
+            while 0 <= self.ip < instruction_count and self.steps_executed < check_at:
+                ip = self.ip
+                try:
+                    # Instructions that jump overwrite this
+                    self.ip = ip + 1
+                    steps[ip]()
+                    self.steps_executed += 1
+                except BudgetExceeded as exceeded:
+                    self.terminate(exceeded)
+                except Exception as e:
+                    self.report_error(ip, e)
+                else:
+                    if self.waiting_for_input:
+                        if self.debug_mode:
+                            print(f"--- Pausing for Input (IP: {self.ip}) ---")
+                        yield from self.read_input()
+                        steps = self.compiled_steps()  # Recompiled if debug_mode changed meanwhile
+
+    def read_input(self):
+        """
+        Yield the InputRequest of the INPUT just executed until it is sent
+        a valid value, then store the value and restart the budget's clock.
+        """
+        request = InputRequest(self.input_prompt, self.input_expected_type)
+        while True:
+            user_input = yield request
             try:
-                prev_ip = self.ip
-                self.execute_instruction(op, arg1, arg2, result)
-                self.steps_executed += 1
-                if self.waiting_for_input:
-                    if self.debug_mode:
-                        print(f"--- Pausing for Input Again (IP: {self.ip}) ---")
-                    break
-                if self.ip == prev_ip:
-                    self.ip += 1
-            except Exception as e:
-                error_line = prev_ip
-                # Get source position for error reporting
-                source_pos = self.source_positions[error_line] if error_line < len(self.source_positions) else None
-                source_info = ""
-                if source_pos:
-                    source_info = f" at line {source_pos[0]}, column {source_pos[1]}"
-                
-                error_message = f"\nRuntime Error{source_info} (instruction {error_line}: {op} {arg1} {arg2} {result}): {str(e)}\n"
+                validated_input = self.validate_and_parse_input(str(user_input), self.input_expected_type)
+                break
+            except ValueError as e:
+                error_message = f"\nInput Error: {str(e)}\n"
                 print(error_message)
                 print(traceback.format_exc())
                 self.output_buffer.write(error_message)
-                self.ip = len(self.instructions)
+        self.assign_variable(self.input_result_var, validated_input)
         if self.debug_mode:
-            segment_output = self.output_buffer.getvalue()
-            print(f"--- Resumed Segment Finished (IP: {self.ip}, Steps: {self.steps_executed}) ---")
-            print(f"Segment Output Buffer Content:\n'''\n{segment_output}\n'''")
-        return self.output_buffer.getvalue()
+            print(f"  Stored validated input in '{self.input_result_var}': {repr(validated_input)} (type: {type(validated_input).__name__}) in scope level {len(self.call_stack) - 1}")
+        self.waiting_for_input = False
+        self.input_prompt = ""
+        self.input_result_var = None
+        self.input_expected_type = None
+        self.budget.start()
+
+    def report_error(self, ip, error):
+        """Stop the run for error, raised by instruction ip of the linked code, noting it in the output."""
+        error_line = self.code.origins[ip]
+        op, arg1, arg2, result = self.code.instruction(ip)
+        # Get source position for error reporting
+        source_pos = self.source_positions[error_line] if error_line < len(self.source_positions) else None
+        source_info = ""
+        if source_pos:
+            source_info = f" at line {source_pos[0]}, column {source_pos[1]}"
+
+        error_message = f"\nRuntime Error{source_info} (instruction {error_line}: {op} {arg1} {arg2} {result}): {str(error)}\n"
+        print(error_message)
+        print(traceback.format_exc())
+        self.output_buffer.write(error_message)
+        self.ip = len(self.code)
+
+    def terminate(self, exceeded):
+        """Stop the run for BudgetExceeded exceeded, noting why in the output."""
+        print(f"Execution terminated after {self.steps_executed} steps: {exceeded}.")
+        self.output_buffer.write(f"\n[Execution stopped: {exceeded}]\n")
+        self.termination = exceeded
+        self.ip = len(self.code)
 
     def validate_and_parse_input(self, input_str, expected_type=None):
         """Validates input string based on Minima rules and optional expected type."""
@@ -511,16 +566,64 @@ class TACInterpreter:
         # Note: Empty strings/lists/0 will be False, non-empty/non-zero will be True.
         return bool(value)
 
-    def execute_instruction(self, op, arg1, arg2, result):
-        if self.debug_mode and op in ('LABEL', 'GOTO', 'IFTRUE', 'IFFALSE'):
+    def execute_instruction(self, op, arg1, arg2, result, target=-1):
+        """
+        Execute one instruction given by opcode name, with the handler run()
+        dispatches it to. self.ip already points at the next instruction;
+        target is the instruction's resolved jump or call target (see
+        LinkedProgram).
+        """
+        opcode = OPCODE_NUMBERS.get(op)
+        if opcode is None:
+            raise ValueError(f"Unknown TAC instruction: {op}")
+        if self.debug_mode:
+            self.debug_instruction(op, arg1, arg2, result)
+        self.handlers[opcode](arg1, arg2, result, target)
+        if self.debug_mode:
+            self.debug_scope(op)
+
+    def debug_instruction(self, op, arg1, arg2, result):
+        """Debug trace printed before an instruction runs."""
+        if op in ('GOTO', 'IFTRUE', 'IFFALSE'):
             print(f"Executing {op} with args: {arg1}, {arg2}, {result}")
-        if self.debug_mode and op in ('LT', 'LE', 'GT', 'GE', 'EQ', 'NEQ'):
+        if op in ('LT', 'LE', 'GT', 'GE', 'EQ', 'NEQ'):
             left_val = self.resolve_variable(arg1)
             right_val = self.resolve_variable(arg2)
             print(f"Condition: {left_val} {op} {right_val}")
-            
+
+    def debug_scope(self, op):
+        """Debug trace printed after an instruction has run."""
+        print(f"  Scope after instruction {self.ip} ({op}): {self.call_stack.scope()}")
+
+    @staticmethod
+    def to_num(val):
+        """Numeric value of an arithmetic operand; "YES"/"NO" strings and empty count as 1 and 0."""
+        if isinstance(val, (int, float)):
+            return val
+        if isinstance(val, bool):
+            return 1 if val else 0
+        if val is None:
+            return 0
+        if isinstance(val, str):
+            # Try to convert strings to numbers
+            if val.upper() in ["YES", "TRUE"]:
+                return 1
+            elif val.upper() in ["NO", "FALSE", "EMPTY", ""]:
+                return 0
+            try:
+                # Handle negatives with hyphen notation
+                if val.startswith('-'):
+                    return -float(val[1:]) if '.' in val else -int(val[1:])
+                return float(val) if '.' in val else int(val)
+            except ValueError:
+                # If string can't be converted to number, explicitly throw error
+                raise TypeError(f"Cannot convert string '{val}' to a number")
+        raise TypeError(f"Cannot convert {val} (type {type(val).__name__}) to number for arithmetic operation")
+
+    def execute_call(self, arg1, arg2, result, target):
+        """CALL function, argument count, name: call a built-in or a function of the program."""
         # Built-in function call
-        if op == 'CALL' and arg1 in self.builtins:
+        if arg1 in self.builtins:
             args = []
             num_expected_params = self.builtins[arg1].__code__.co_argcount - 1
             actual_params_passed = arg2 if isinstance(arg2, int) else 0
@@ -537,18 +640,11 @@ class TACInterpreter:
                 raise ValueError(f"Error in built-in function {arg1}: {str(e)}")
                 
         # User-defined function call
-        elif op == 'CALL' and arg1 in self.functions:
-            func_label_name = self.functions[arg1]
-            if func_label_name not in self.labels:
-                raise ValueError(f"Function label '{func_label_name}' for function '{arg1}' not found.")
-            
-            # Store return info
-            self.call_info_stack.append({
-                'return_ip': self.ip + 1,
-                'target_var': result
-            })
+        elif arg1 in self.functions:
+            if target < 0:
+                raise ValueError(f"Function label '{self.functions[arg1]}' for function '{arg1}' not found.")
             
-            # Create new scope for the function
+            # Resolve the arguments before the function's frame is pushed
             new_scope = {}
             param_count = arg2 if isinstance(arg2, int) else 0
             param_names = self.function_params.get(arg1, [])
@@ -582,822 +678,643 @@ class TACInterpreter:
                     if self.debug_mode:
                         print(f"  Warning: Missing argument for param '{param_name}', assigning None.")
             
-            # Push the new scope
-            self.memory_stack.append(new_scope)
+            # Push the new frame, with the return info
+            self.call_stack.push(self.ip, result)
+            for param_name, value in new_scope.items():
+                self.call_stack.assign(param_name, value)
             if self.debug_mode:
-                print(f"Pushed new scope for '{arg1}'. Stack depth: {len(self.memory_stack)}")
+                print(f"Pushed new scope for '{arg1}'. Stack depth: {len(self.call_stack)}")
                 print(f"  New scope content: {new_scope}")
                 
-            # Jump to function label
-            self.ip = self.labels[func_label_name]
-            
-        # Return from function
-        elif op == 'RETURN':
-            if self.call_info_stack:
-                # Resolve return value in the current scope
-                return_val = self.resolve_variable(arg1)
-                
-                # Pop the function's scope
-                popped_scope = self.memory_stack.pop()
-                if self.debug_mode:
-                    print(f"Returning from function. Popped scope: {popped_scope}. Stack depth: {len(self.memory_stack)}")
-                    
-                # Pop return info
-                return_info = self.call_info_stack.pop()
-                target_var = return_info['target_var']
-                return_ip = return_info['return_ip']
-                
-                # Assign return value to the target variable in the caller's scope
-                if target_var:
-                    self.assign_variable(target_var, return_val)
-                    
-                # Set IP to return address
-                self.ip = return_ip
-            else:
-                # Return from global scope - terminate program
-                if self.debug_mode:
-                    print("RETURN from global scope. Halting execution.")
-                self.ip = len(self.instructions)
-                
-        # Function and label definitions (no runtime action)
-        elif op == 'FUNCTION' or op == 'LABEL':
-            pass
+            # Jump to function body
+            self.ip = target
+        else:
+            raise ValueError("Unknown TAC instruction: CALL")
+
+    def execute_return(self, arg1, arg2, result, target):
+        """RETURN value: return from the current function, or stop at global level."""
+        if len(self.call_stack) > 1:
+            # Resolve return value in the current scope
+            return_val = self.resolve_variable(arg1)
             
-        # Parameter for function calls
-        elif op == 'PARAM':
-            self.param_stack.append((result, arg1))
+            # Pop the function's frame, which has the return info
             if self.debug_mode:
-                print(f"Pushed param index {result} with raw value {repr(arg1)}")
-                
-        # Assignment
-        elif op == 'ASSIGN':
-            if arg1 == ']':
-                self.assign_variable(result, [])
-                if self.debug_mode:
-                    print(f"Initialized empty list: {result} = []")
-            else:
-                value = self.resolve_variable(arg1)
-                self.assign_variable(result, value)
-                if self.debug_mode and result in ('i', 'j', 'k'):
-                    print(f"Assigned {value} to {result}")
-                    
-        # Addition/concatenation
-        elif op == 'ADD':
-            left_val = self.resolve_variable(arg1)
-            right_val = self.resolve_variable(arg2)
+                print(f"Returning from function. Popped scope: {self.call_stack.scope()}. Stack depth: {len(self.call_stack) - 1}")
+            frame = self.call_stack.pop()
+            target_var = frame.target_var
+            return_ip = frame.return_ip
             
-            # Handle list concatenation
-            if isinstance(left_val, list) or isinstance(right_val, list):
-                l_list = list(left_val) if isinstance(left_val, list) else [left_val]
-                r_list = list(right_val) if isinstance(right_val, list) else [right_val]
-                self.assign_variable(result, l_list + r_list)
-                return
+            # Assign return value to the target variable in the caller's scope
+            if target_var:
+                self.assign_variable(target_var, return_val)
                 
-            # Handle string concatenation
-            is_left_str = isinstance(left_val, str)
-            is_right_str = isinstance(right_val, str)
-            if is_left_str or is_right_str:
-                str_left = "YES" if isinstance(left_val, bool) and left_val else "NO" if isinstance(left_val, bool) and not left_val else str(left_val or "")
-                str_right = "YES" if isinstance(right_val, bool) and right_val else "NO" if isinstance(right_val, bool) and not right_val else str(right_val or "")
-                self.assign_variable(result, str_left + str_right)
-            else:
-                # Numeric addition
-                try:
-                    def to_num(val):
-                        if isinstance(val, (int, float)):
-                            return val
-                        if isinstance(val, bool):
-                            return 1 if val else 0
-                        if val is None:
-                            return 0
-                        if isinstance(val, str):
-                            # Try to convert strings to numbers
-                            if val.upper() in ["YES", "TRUE"]:
-                                return 1
-                            elif val.upper() in ["NO", "FALSE", "EMPTY", ""]:
-                                return 0
-                            try:
-                                # Handle negatives with hyphen notation
-                                if val.startswith('-'):
-                                    return -float(val[1:]) if '.' in val else -int(val[1:])
-                                return float(val) if '.' in val else int(val)
-                            except ValueError:
-                                # If string can't be converted to number, explicitly throw error
-                                raise TypeError(f"Cannot convert string '{val}' to a number")
-                        raise TypeError(f"Cannot convert {val} (type {type(val).__name__}) to number for arithmetic operation")
-                    
-                    left_num = to_num(left_val)
-                    right_num = to_num(right_val)
-                    computed_result = left_num + right_num
-                    self.assign_variable(result, self.validate_number(computed_result))
-                except (ValueError, TypeError) as e:
-                    if "out of range" in str(e) or "too many digits" in str(e):
-                        raise e
-                    else:
-                        raise TypeError(f"Error during numeric addition: Cannot add {left_val} ({type(left_val).__name__}) and {right_val} ({type(right_val).__name__}): {e}")
-                        
-        # Subtraction
-        elif op == 'SUB':
-            left_val = self.resolve_variable(arg1)
-            right_val = self.resolve_variable(arg2)
+            # Set IP to return address
+            self.ip = return_ip
+        else:
+            # Return from global scope - terminate program
+            if self.debug_mode:
+                print("RETURN from global scope. Halting execution.")
+            self.ip = len(self.code)
+
+    def execute_param(self, arg1, arg2, result, target):
+        """PARAM value, -, index: push an argument for the next CALL."""
+        self.param_stack.append((result, arg1))
+        if self.debug_mode:
+            print(f"Pushed param index {result} with raw value {repr(arg1)}")
+
+    def execute_assign(self, arg1, arg2, result, target):
+        """ASSIGN value, -, name (a value of "]" assigns a new empty list)."""
+        if arg1 == ']':
+            self.assign_variable(result, [])
+            if self.debug_mode:
+                print(f"Initialized empty list: {result} = []")
+        else:
+            value = self.resolve_variable(arg1)
+            self.assign_variable(result, value)
+            if self.debug_mode and result in ('i', 'j', 'k'):
+                print(f"Assigned {value} to {result}")
+
+    def execute_add(self, arg1, arg2, result, target):
+        """ADD: numeric addition, or string or list concatenation."""
+        left_val = self.resolve_variable(arg1)
+        right_val = self.resolve_variable(arg2)
+        
+        # Handle list concatenation
+        if isinstance(left_val, list) or isinstance(right_val, list):
+            l_list = list(left_val) if isinstance(left_val, list) else [left_val]
+            r_list = list(right_val) if isinstance(right_val, list) else [right_val]
+            self.budget.check_list_size(len(l_list) + len(r_list))
+            self.assign_variable(result, l_list + r_list)
+            return
+            
+        # Handle string concatenation
+        is_left_str = isinstance(left_val, str)
+        is_right_str = isinstance(right_val, str)
+        if is_left_str or is_right_str:
+            str_left = "YES" if isinstance(left_val, bool) and left_val else "NO" if isinstance(left_val, bool) and not left_val else str(left_val or "")
+            str_right = "YES" if isinstance(right_val, bool) and right_val else "NO" if isinstance(right_val, bool) and not right_val else str(right_val or "")
+            self.budget.check_text_length(len(str_left) + len(str_right))
+            self.assign_variable(result, str_left + str_right)
+        else:
+            # Numeric addition
             try:
-                # Use the same to_num function defined in the ADD operation
-                if isinstance(left_val, (str, list)) or isinstance(right_val, (str, list)):
-                    raise TypeError(f"Cannot subtract {type(right_val).__name__} from {type(left_val).__name__}")
-                
-                def to_num(val):
-                    if isinstance(val, (int, float)):
-                        return val
-                    if isinstance(val, bool):
-                        return 1 if val else 0
-                    if val is None:
-                        return 0
-                    if isinstance(val, str):
-                        # Try to convert strings to numbers
-                        if val.upper() in ["YES", "TRUE"]:
-                            return 1
-                        elif val.upper() in ["NO", "FALSE", "EMPTY", ""]:
-                            return 0
-                        try:
-                            # Handle negatives with hyphen notation
-                            if val.startswith('-'):
-                                return -float(val[1:]) if '.' in val else -int(val[1:])
-                            return float(val) if '.' in val else int(val)
-                        except ValueError:
-                            # If string can't be converted to number, explicitly throw error
-                            raise TypeError(f"Cannot convert string '{val}' to a number")
-                    raise TypeError(f"Cannot convert {val} (type {type(val).__name__}) to number for arithmetic operation")
-                
-                left_num = to_num(left_val)
-                right_num = to_num(right_val)
-                computed_result = left_num - right_num
+                left_num = self.to_num(left_val)
+                right_num = self.to_num(right_val)
+                computed_result = left_num + right_num
                 self.assign_variable(result, self.validate_number(computed_result))
             except (ValueError, TypeError) as e:
                 if "out of range" in str(e) or "too many digits" in str(e):
                     raise e
-                raise TypeError(f"Error during numeric subtraction: Cannot subtract {right_val} ({type(right_val).__name__}) from {left_val} ({type(left_val).__name__}): {e}")
-                
-        # Multiplication
-        elif op == 'MUL':
-            left_val = self.resolve_variable(arg1)
-            right_val = self.resolve_variable(arg2)
-            try:
-                # Handle special cases for string repetition
-                if isinstance(left_val, str) and isinstance(right_val, int) and right_val >= 0:
-                    self.assign_variable(result, left_val * right_val)
-                    return
-                elif isinstance(left_val, int) and left_val >= 0 and isinstance(right_val, str):
-                    self.assign_variable(result, left_val * right_val)
-                    return
-                
-                # Use the same to_num function for numeric multiplication
-                def to_num(val):
-                    if isinstance(val, (int, float)):
-                        return val
-                    if isinstance(val, bool):
-                        return 1 if val else 0
-                    if val is None:
-                        return 0
-                    if isinstance(val, str):
-                        # Try to convert strings to numbers
-                        if val.upper() in ["YES", "TRUE"]:
-                            return 1
-                        elif val.upper() in ["NO", "FALSE", "EMPTY", ""]:
-                            return 0
-                        try:
-                            # Handle negatives with hyphen notation
-                            if val.startswith('-'):
-                                return -float(val[1:]) if '.' in val else -int(val[1:])
-                            return float(val) if '.' in val else int(val)
-                        except ValueError:
-                            # If string can't be converted to number, explicitly throw error
-                            raise TypeError(f"Cannot convert string '{val}' to a number")
-                    raise TypeError(f"Cannot convert {val} (type {type(val).__name__}) to number for arithmetic operation")
-                
-                try:
-                    left_num = to_num(left_val)
-                    right_num = to_num(right_val)
-                    computed_result = left_num * right_num
-                    self.assign_variable(result, self.validate_number(computed_result))
-                except TypeError:
-                    # If we can't convert to numbers, check for special string repetition cases first
-                    if (isinstance(left_val, str) and not isinstance(right_val, (int, float))) or \
-                       (isinstance(right_val, str) and not isinstance(left_val, (int, float))):
-                        raise TypeError(f"String repetition requires an integer count, got {type(left_val).__name__} and {type(right_val).__name__}")
-                    else:
-                        raise TypeError(f"Cannot multiply values of types {type(left_val).__name__} and {type(right_val).__name__}")
-                
-            except (ValueError, TypeError) as e:
-                if "out of range" in str(e) or "too many digits" in str(e):
-                    raise e
-                raise TypeError(f"Error during multiplication: Cannot multiply {left_val} ({type(left_val).__name__}) and {right_val} ({type(right_val).__name__}): {e}")
-                
-        # Division
-        elif op == 'DIV':
-            left_val = self.resolve_variable(arg1)
-            right_val = self.resolve_variable(arg2)
+                else:
+                    raise TypeError(f"Error during numeric addition: Cannot add {left_val} ({type(left_val).__name__}) and {right_val} ({type(right_val).__name__}): {e}")
+
+    def execute_sub(self, arg1, arg2, result, target):
+        """SUB: numeric subtraction."""
+        left_val = self.resolve_variable(arg1)
+        right_val = self.resolve_variable(arg2)
+        try:
+            if isinstance(left_val, (str, list)) or isinstance(right_val, (str, list)):
+                raise TypeError(f"Cannot subtract {type(right_val).__name__} from {type(left_val).__name__}")
+            
+            left_num = self.to_num(left_val)
+            right_num = self.to_num(right_val)
+            computed_result = left_num - right_num
+            self.assign_variable(result, self.validate_number(computed_result))
+        except (ValueError, TypeError) as e:
+            if "out of range" in str(e) or "too many digits" in str(e):
+                raise e
+            raise TypeError(f"Error during numeric subtraction: Cannot subtract {right_val} ({type(right_val).__name__}) from {left_val} ({type(left_val).__name__}): {e}")
+
+    def execute_mul(self, arg1, arg2, result, target):
+        """MUL: numeric multiplication, or string repetition."""
+        left_val = self.resolve_variable(arg1)
+        right_val = self.resolve_variable(arg2)
+        try:
+            # Handle special cases for string repetition
+            if isinstance(left_val, str) and isinstance(right_val, int) and right_val >= 0:
+                self.budget.check_text_length(len(left_val) * right_val)
+                self.assign_variable(result, left_val * right_val)
+                return
+            elif isinstance(left_val, int) and left_val >= 0 and isinstance(right_val, str):
+                self.budget.check_text_length(left_val * len(right_val))
+                self.assign_variable(result, left_val * right_val)
+                return
+            
             try:
-                # Use the same to_num function for numeric division
-                def to_num(val):
-                    if isinstance(val, (int, float)):
-                        return val
-                    if isinstance(val, bool):
-                        return 1 if val else 0
-                    if val is None:
-                        return 0
-                    if isinstance(val, str):
-                        # Try to convert strings to numbers
-                        if val.upper() in ["YES", "TRUE"]:
-                            return 1
-                        elif val.upper() in ["NO", "FALSE", "EMPTY", ""]:
-                            return 0
-                        try:
-                            # Handle negatives with hyphen notation
-                            if val.startswith('-'):
-                                return -float(val[1:]) if '.' in val else -int(val[1:])
-                            return float(val) if '.' in val else int(val)
-                        except ValueError:
-                            # If string can't be converted to number, explicitly throw error
-                            raise TypeError(f"Cannot convert string '{val}' to a number")
-                    raise TypeError(f"Cannot convert {val} (type {type(val).__name__}) to number for arithmetic operation")
-                
-                left_num = to_num(left_val)
-                right_num = to_num(right_val)
-                
-                # Check for division by zero
-                if right_num == 0:
-                    raise ValueError("Division by zero")
-                    
-                computed_result = left_num / right_num
+                left_num = self.to_num(left_val)
+                right_num = self.to_num(right_val)
+                computed_result = left_num * right_num
                 self.assign_variable(result, self.validate_number(computed_result))
+            except TypeError:
+                # If we can't convert to numbers, check for special string repetition cases first
+                if (isinstance(left_val, str) and not isinstance(right_val, (int, float))) or \
+                   (isinstance(right_val, str) and not isinstance(left_val, (int, float))):
+                    raise TypeError(f"String repetition requires an integer count, got {type(left_val).__name__} and {type(right_val).__name__}")
+                else:
+                    raise TypeError(f"Cannot multiply values of types {type(left_val).__name__} and {type(right_val).__name__}")
+            
+        except (ValueError, TypeError) as e:
+            if "out of range" in str(e) or "too many digits" in str(e):
+                raise e
+            raise TypeError(f"Error during multiplication: Cannot multiply {left_val} ({type(left_val).__name__}) and {right_val} ({type(right_val).__name__}): {e}")
+
+    def execute_div(self, arg1, arg2, result, target):
+        """DIV: numeric division."""
+        left_val = self.resolve_variable(arg1)
+        right_val = self.resolve_variable(arg2)
+        try:
+            left_num = self.to_num(left_val)
+            right_num = self.to_num(right_val)
+            
+            # Check for division by zero
+            if right_num == 0:
+                raise ValueError("Division by zero")
                 
-            except (ValueError, TypeError) as e:
-                if "Division by zero" in str(e):
-                    raise ValueError("Division by zero")
-                if "out of range" in str(e) or "too many digits" in str(e):
-                    raise e
-                raise TypeError(f"Error during division: Cannot divide {left_val} ({type(left_val).__name__}) by {right_val} ({type(right_val).__name__}): {e}")
+            computed_result = left_num / right_num
+            self.assign_variable(result, self.validate_number(computed_result))
+            
+        except (ValueError, TypeError) as e:
+            if "Division by zero" in str(e):
+                raise ValueError("Division by zero")
+            if "out of range" in str(e) or "too many digits" in str(e):
+                raise e
+            raise TypeError(f"Error during division: Cannot divide {left_val} ({type(left_val).__name__}) by {right_val} ({type(right_val).__name__}): {e}")
+
+    def execute_mod(self, arg1, arg2, result, target):
+        """MOD: numeric modulo."""
+        left_val = self.resolve_variable(arg1)
+        right_val = self.resolve_variable(arg2)
+        try:
+            left_num = self.to_num(left_val)
+            right_num = self.to_num(right_val)
+            
+            # Check for modulo by zero
+            if right_num == 0:
+                raise ValueError("Modulo by zero")
                 
-        # Modulo
-        elif op == 'MOD':
-            left_val = self.resolve_variable(arg1)
+            computed_result = left_num % right_num
+            self.assign_variable(result, self.validate_number(computed_result))
+            
+        except (ValueError, TypeError) as e:
+            if "Modulo by zero" in str(e):
+                raise ValueError("Modulo by zero")
+            if "out of range" in str(e) or "too many digits" in str(e):
+                raise e
+            raise TypeError(f"Error during modulo operation: Cannot compute {left_val} ({type(left_val).__name__}) % {right_val} ({type(right_val).__name__}): {e}")
+
+    def execute_neg(self, arg1, arg2, result, target):
+        """NEG: numeric negation."""
+        val = self.resolve_variable(arg1)
+        try:
+            if not isinstance(val, (int, float)):
+                raise ValueError(f"Cannot negate non-numeric value: {val} ({type(val).__name__})")
+            computed_result = -val
+            self.assign_variable(result, self.validate_number(computed_result))
+        except (ValueError, TypeError) as e:
+            if "out of range" in str(e) or "too many digits" in str(e):
+                raise e
+            raise ValueError(f"Cannot negate value: {val}: {e}")
+
+    def execute_not(self, arg1, arg2, result, target):
+        """NOT: logical not."""
+        val = self.resolve_variable(arg1)
+        # Handle Minima boolean strings explicitly
+        if val == "YES" or val is True:
+            self.assign_variable(result, "NO") # Use Minima's string representation
+        elif val == "NO" or val is False:
+            self.assign_variable(result, "YES") # Use Minima's string representation
+        else:
+            # Fallback to standard Python truthiness for other types
+            self.assign_variable(result, not bool(val))
+
+    def execute_and(self, arg1, arg2, result, target):
+        """AND: logical and, short-circuiting."""
+        left_val = self.resolve_variable(arg1)
+        # Short-circuit evaluation
+        if not bool(left_val):
+            self.assign_variable(result, False)
+        else:
             right_val = self.resolve_variable(arg2)
-            try:
-                # Use the same to_num function as other operations
-                def to_num(val):
-                    if isinstance(val, (int, float)):
-                        return val
-                    if isinstance(val, bool):
-                        return 1 if val else 0
-                    if val is None:
-                        return 0
-                    if isinstance(val, str):
-                        # Try to convert strings to numbers
-                        if val.upper() in ["YES", "TRUE"]:
-                            return 1
-                        elif val.upper() in ["NO", "FALSE", "EMPTY", ""]:
-                            return 0
-                        try:
-                            # Handle negatives with hyphen notation
-                            if val.startswith('-'):
-                                return -float(val[1:]) if '.' in val else -int(val[1:])
-                            return float(val) if '.' in val else int(val)
-                        except ValueError:
-                            # If string can't be converted to number, explicitly throw error
-                            raise TypeError(f"Cannot convert string '{val}' to a number")
-                    raise TypeError(f"Cannot convert {val} (type {type(val).__name__}) to number for arithmetic operation")
-                
-                left_num = to_num(left_val)
-                right_num = to_num(right_val)
-                
-                # Check for modulo by zero
-                if right_num == 0:
-                    raise ValueError("Modulo by zero")
-                    
-                computed_result = left_num % right_num
-                self.assign_variable(result, self.validate_number(computed_result))
-                
-            except (ValueError, TypeError) as e:
-                if "Modulo by zero" in str(e):
-                    raise ValueError("Modulo by zero")
-                if "out of range" in str(e) or "too many digits" in str(e):
-                    raise e
-                raise TypeError(f"Error during modulo operation: Cannot compute {left_val} ({type(left_val).__name__}) % {right_val} ({type(right_val).__name__}): {e}")
-                
-        # Negation
-        elif op == 'NEG':
-            val = self.resolve_variable(arg1)
-            try:
-                if not isinstance(val, (int, float)):
-                    raise ValueError(f"Cannot negate non-numeric value: {val} ({type(val).__name__})")
-                computed_result = -val
-                self.assign_variable(result, self.validate_number(computed_result))
-            except (ValueError, TypeError) as e:
-                if "out of range" in str(e) or "too many digits" in str(e):
-                    raise e
-                raise ValueError(f"Cannot negate value: {val}: {e}")
-                
-        # Logical NOT
-        elif op == 'NOT':
-            val = self.resolve_variable(arg1)
-            # Handle Minima boolean strings explicitly
-            if val == "YES" or val is True:
-                self.assign_variable(result, "NO") # Use Minima's string representation
-            elif val == "NO" or val is False:
-                self.assign_variable(result, "YES") # Use Minima's string representation
-            else:
-                # Fallback to standard Python truthiness for other types
-                self.assign_variable(result, not bool(val))
+            self.assign_variable(result, bool(right_val))
 
-        # Logical AND
-        elif op == 'AND':
-            left_val = self.resolve_variable(arg1)
-            # Short-circuit evaluation
-            if not bool(left_val):
+    def execute_or(self, arg1, arg2, result, target):
+        """OR: logical or, short-circuiting."""
+        left_val = self.resolve_variable(arg1)
+        # Short-circuit evaluation
+        if bool(left_val):
+            self.assign_variable(result, True)
+        else:
+            right_val = self.resolve_variable(arg2)
+            self.assign_variable(result, bool(right_val))
+
+    def execute_eq(self, arg1, arg2, result, target):
+        """EQ: equality; empty equals None and the empty string."""
+        left_val = self.resolve_variable(arg1)
+        right_val = self.resolve_variable(arg2)
+        if right_val == 'empty' or right_val is None:
+            self.assign_variable(result, (left_val is None or left_val == ''))
+        elif left_val == 'empty' or left_val is None:
+            self.assign_variable(result, (right_val is None or right_val == ''))
+        else:
+            self.assign_variable(result, (left_val == right_val))
+
+    def execute_neq(self, arg1, arg2, result, target):
+        """NEQ: inequality; empty equals None and the empty string."""
+        left_val = self.resolve_variable(arg1)
+        right_val = self.resolve_variable(arg2)
+        if right_val == 'empty' or right_val is None:
+            self.assign_variable(result, (left_val is not None and left_val != ''))
+        elif left_val == 'empty' or left_val is None:
+            self.assign_variable(result, (right_val is not None and right_val != ''))
+        else:
+            self.assign_variable(result, (left_val != right_val))
+
+    def execute_lt(self, arg1, arg2, result, target):
+        """LT: less than; empty is below any value."""
+        left_val = self.resolve_variable(arg1)
+        right_val = self.resolve_variable(arg2)
+        try:
+            if left_val is None and right_val is None:
+                self.assign_variable(result, False)
+            elif left_val is None:
+                self.assign_variable(result, True)
+            elif right_val is None:
                 self.assign_variable(result, False)
             else:
-                right_val = self.resolve_variable(arg2)
-                self.assign_variable(result, bool(right_val))
-                
-        # Logical OR
-        elif op == 'OR':
-            left_val = self.resolve_variable(arg1)
-            # Short-circuit evaluation
-            if bool(left_val):
+                if isinstance(left_val, str) and left_val.isdigit():
+                    left_val = int(left_val)
+                if isinstance(right_val, str) and right_val.isdigit():
+                    right_val = int(right_val)
+                self.assign_variable(result, (left_val < right_val))
+            if self.debug_mode:
+                print(f"LT: {left_val} < {right_val} = {self.call_stack.lookup(result)}")
+        except Exception as e:
+            raise ValueError(f"Error in LT comparison: {str(e)}")
+
+    def execute_le(self, arg1, arg2, result, target):
+        """LE: less than or equal; empty is below any value."""
+        left_val = self.resolve_variable(arg1)
+        right_val = self.resolve_variable(arg2)
+        try:
+            if left_val is None and right_val is None:
+                self.assign_variable(result, True)
+            elif left_val is None:
                 self.assign_variable(result, True)
+            elif right_val is None:
+                self.assign_variable(result, False)
             else:
-                right_val = self.resolve_variable(arg2)
-                self.assign_variable(result, bool(right_val))
-                
-        # Equality comparison
-        elif op == 'EQ':
-            left_val = self.resolve_variable(arg1)
-            right_val = self.resolve_variable(arg2)
-            if right_val == 'empty' or right_val is None:
-                self.assign_variable(result, (left_val is None or left_val == ''))
-            elif left_val == 'empty' or left_val is None:
-                self.assign_variable(result, (right_val is None or right_val == ''))
+                if isinstance(left_val, str) and left_val.isdigit():
+                    left_val = int(left_val)
+                if isinstance(right_val, str) and right_val.isdigit():
+                    right_val = int(right_val)
+                self.assign_variable(result, (left_val <= right_val))
+        except Exception as e:
+            raise ValueError(f"Error in LE comparison: {str(e)}")
+
+    def execute_gt(self, arg1, arg2, result, target):
+        """GT: greater than; empty is below any value."""
+        left_val = self.resolve_variable(arg1)
+        right_val = self.resolve_variable(arg2)
+        try:
+            if left_val is None and right_val is None:
+                self.assign_variable(result, False)
+            elif left_val is None:
+                self.assign_variable(result, False)
+            elif right_val is None:
+                self.assign_variable(result, True)
             else:
-                self.assign_variable(result, (left_val == right_val))
-                
-        # Inequality comparison
-        elif op == 'NEQ':
-            left_val = self.resolve_variable(arg1)
-            right_val = self.resolve_variable(arg2)
-            if right_val == 'empty' or right_val is None:
-                self.assign_variable(result, (left_val is not None and left_val != ''))
-            elif left_val == 'empty' or left_val is None:
-                self.assign_variable(result, (right_val is not None and right_val != ''))
+                if isinstance(left_val, str) and left_val.isdigit():
+                    left_val = int(left_val)
+                if isinstance(right_val, str) and right_val.isdigit():
+                    right_val = int(right_val)
+                self.assign_variable(result, (left_val > right_val))
+        except Exception as e:
+            raise ValueError(f"Error in GT comparison: {str(e)}")
+
+    def execute_ge(self, arg1, arg2, result, target):
+        """GE: greater than or equal; empty is below any value."""
+        left_val = self.resolve_variable(arg1)
+        right_val = self.resolve_variable(arg2)
+        try:
+            if left_val is None and right_val is None:
+                self.assign_variable(result, True)
+            elif left_val is None:
+                self.assign_variable(result, False)
+            elif right_val is None:
+                self.assign_variable(result, True)
             else:
-                self.assign_variable(result, (left_val != right_val))
-                
-        # Less than comparison
-        elif op == 'LT':
-            left_val = self.resolve_variable(arg1)
-            right_val = self.resolve_variable(arg2)
-            try:
-                if left_val is None and right_val is None:
-                    self.assign_variable(result, False)
-                elif left_val is None:
-                    self.assign_variable(result, True)
-                elif right_val is None:
-                    self.assign_variable(result, False)
-                else:
-                    if isinstance(left_val, str) and left_val.isdigit():
-                        left_val = int(left_val)
-                    if isinstance(right_val, str) and right_val.isdigit():
-                        right_val = int(right_val)
-                    self.assign_variable(result, (left_val < right_val))
-                if self.debug_mode:
-                    print(f"LT: {left_val} < {right_val} = {self.memory_stack[-1][result]}")
-            except Exception as e:
-                raise ValueError(f"Error in LT comparison: {str(e)}")
-                
-        # Less than or equal comparison
-        elif op == 'LE':
-            left_val = self.resolve_variable(arg1)
-            right_val = self.resolve_variable(arg2)
-            try:
-                if left_val is None and right_val is None:
-                    self.assign_variable(result, True)
-                elif left_val is None:
-                    self.assign_variable(result, True)
-                elif right_val is None:
-                    self.assign_variable(result, False)
-                else:
-                    if isinstance(left_val, str) and left_val.isdigit():
-                        left_val = int(left_val)
-                    if isinstance(right_val, str) and right_val.isdigit():
-                        right_val = int(right_val)
-                    self.assign_variable(result, (left_val <= right_val))
-            except Exception as e:
-                raise ValueError(f"Error in LE comparison: {str(e)}")
-                
-        # Greater than comparison
-        elif op == 'GT':
-            left_val = self.resolve_variable(arg1)
-            right_val = self.resolve_variable(arg2)
-            try:
-                if left_val is None and right_val is None:
-                    self.assign_variable(result, False)
-                elif left_val is None:
-                    self.assign_variable(result, False)
-                elif right_val is None:
-                    self.assign_variable(result, True)
-                else:
-                    if isinstance(left_val, str) and left_val.isdigit():
-                        left_val = int(left_val)
-                    if isinstance(right_val, str) and right_val.isdigit():
-                        right_val = int(right_val)
-                    self.assign_variable(result, (left_val > right_val))
-            except Exception as e:
-                raise ValueError(f"Error in GT comparison: {str(e)}")
-                
-        # Greater than or equal comparison
-        elif op == 'GE':
-            left_val = self.resolve_variable(arg1)
-            right_val = self.resolve_variable(arg2)
-            try:
-                if left_val is None and right_val is None:
-                    self.assign_variable(result, True)
-                elif left_val is None:
-                    self.assign_variable(result, False)
-                elif right_val is None:
-                    self.assign_variable(result, True)
-                else:
-                    if isinstance(left_val, str) and left_val.isdigit():
-                        left_val = int(left_val)
-                    if isinstance(right_val, str) and right_val.isdigit():
-                        right_val = int(right_val)
-                    self.assign_variable(result, (left_val >= right_val))
-            except Exception as e:
-                raise ValueError(f"Error in GE comparison: {str(e)}")
-                
-        # Unconditional jump
-        elif op == 'GOTO':
-            if result in self.labels:
-                self.ip = self.labels[result]
+                if isinstance(left_val, str) and left_val.isdigit():
+                    left_val = int(left_val)
+                if isinstance(right_val, str) and right_val.isdigit():
+                    right_val = int(right_val)
+                self.assign_variable(result, (left_val >= right_val))
+        except Exception as e:
+            raise ValueError(f"Error in GE comparison: {str(e)}")
+
+    def execute_goto(self, arg1, arg2, result, target):
+        """GOTO label: jump to target."""
+        if target >= 0:
+            self.ip = target
+        else:
+            raise ValueError(f"Label not found: {result}")
+
+    def execute_iffalse(self, arg1, arg2, result, target):
+        """IFFALSE condition, -, label: jump to target if the condition is false."""
+        cond_val = self.resolve_variable(arg1)
+        if not self.evaluate_condition(cond_val):  # Use the helper method
+            if target >= 0:
+                self.ip = target
             else:
                 raise ValueError(f"Label not found: {result}")
-                
-        # Conditional jump if false
-        elif op == 'IFFALSE':
-            cond_val = self.resolve_variable(arg1)
-            if not self.evaluate_condition(cond_val):  # Use the helper method
-                if result in self.labels:
-                    self.ip = self.labels[result]
-                else:
-                    raise ValueError(f"Label not found: {result}")
-                    
-        # Conditional jump if true
-        elif op == 'IFTRUE':
-            cond_val = self.resolve_variable(arg1)
-            if self.evaluate_condition(cond_val):  # Use the helper method
-                if result in self.labels:
-                    self.ip = self.labels[result]
-                else:
-                    raise ValueError(f"Label not found: {result}")
-                    
-        # Print to output
-        elif op == 'PRINT':
-            val = self.resolve_variable(arg1)
-            if isinstance(val, list):
-                formatted_elements = []
-                for item in val:
-                    if isinstance(item, bool):
-                        formatted_elements.append("YES" if item else "NO")
-                    elif isinstance(item, (int, float)):
-                        formatted_elements.append(self.format_number_for_output(item))
-                    elif item is None:
-                        formatted_elements.append("empty")
-                    else:
-                        # Process escapes within list elements if they are strings
-                        item_str = str(item)
-                        processed_item = ""
-                        i = 0
-                        while i < len(item_str):
-                            if item_str[i] == '\\' and i + 1 < len(item_str):
-                                next_char = item_str[i+1]
-                                if next_char == 'n': processed_item += '\n'; i += 2
-                                elif next_char == 't': processed_item += '\t'; i += 2
-                                elif next_char == '"': processed_item += '"'; i += 2
-                                elif next_char == '\\': processed_item += '\\'; i += 2
-                                else: processed_item += '\\' + next_char; i += 2
-                            else:
-                                processed_item += item_str[i]; i += 1
-                        formatted_elements.append(processed_item)
-                self.output_buffer.write("[" + ", ".join(formatted_elements) + "]")
-            elif isinstance(val, bool):
-                self.output_buffer.write("YES" if val else "NO")
-            elif isinstance(val, (int, float)):
-                self.output_buffer.write(self.format_number_for_output(val))
-            elif val is None:
-                self.output_buffer.write("empty")
+
+    def execute_iftrue(self, arg1, arg2, result, target):
+        """IFTRUE condition, -, label: jump to target if the condition is true."""
+        cond_val = self.resolve_variable(arg1)
+        if self.evaluate_condition(cond_val):  # Use the helper method
+            if target >= 0:
+                self.ip = target
             else:
-                # Convert to string and explicitly process escapes before writing
-                str_val = str(val)
-                processed_val = ""
-                i = 0
-                while i < len(str_val):
-                    if str_val[i] == '\\' and i + 1 < len(str_val):
-                        next_char = str_val[i+1]
-                        if next_char == 'n':
-                            processed_val += '\n'
-                            i += 2
-                        elif next_char == 't':
-                            processed_val += '\t'
-                            i += 2
-                        elif next_char == '"':
-                            processed_val += '"'
-                            i += 2
-                        elif next_char == '\\':
-                            processed_val += '\\'
-                            i += 2
-                        else: # Keep unrecognized escapes literal
-                            processed_val += '\\' + next_char
-                            i += 2
+                raise ValueError(f"Label not found: {result}")
+
+    def execute_print(self, arg1, arg2, result, target):
+        """PRINT value: write a value to the output."""
+        self.output_buffer.write(self.format_output(self.resolve_variable(arg1)))
+
+    def format_output(self, value):
+        """Text PRINT writes for a value. Text is written as is: literals had their escapes decoded at load."""
+        if type(value) is str:
+            return value
+        if isinstance(value, list):
+            return "[" + ", ".join([self.format_item(item) for item in value]) + "]"
+        return self.format_item(value)
+
+    def format_item(self, value):
+        """Text PRINT writes for a value that is not a list, or for a list element."""
+        if isinstance(value, bool):
+            return "YES" if value else "NO"
+        if isinstance(value, (int, float)):
+            return self.format_number_for_output(value)
+        if value is None:
+            return "empty"
+        return str(value)
+
+    def execute_concat(self, arg1, arg2, result, target):
+        """CONCAT: string concatenation of any two values."""
+        val1 = self.resolve_variable(arg1)
+        val2 = self.resolve_variable(arg2)
+        if type(val1) is not str:
+            val1 = self.concat_text(val1)
+        if type(val2) is not str:
+            val2 = self.concat_text(val2)
+        self.budget.check_text_length(len(val1) + len(val2))
+        self.assign_variable(result, val1 + val2)
+
+    def concat_text(self, value):
+        """Text a value contributes to CONCAT: as PRINT writes it, except that empty is nothing."""
+        if isinstance(value, bool):
+            return "YES" if value else "NO"
+        if isinstance(value, (int, float)):
+            return self.format_number_for_output(value)
+        return "" if value is None else str(value)
+
+    def execute_input(self, arg1, arg2, result, target):
+        """INPUT prompt, -, name: pause until the value is sent to execute()."""
+        self.waiting_for_input = True
+        self.input_result_var = result
+        prompt = self.resolve_variable(arg1)
+        self.input_prompt = str(prompt if prompt is not None else "")
+        
+        # Check next instruction for TYPECAST hint
+        self.input_expected_type = None
+        next_ip = self.code.origins[self.ip - 1] + 1
+        if next_ip < len(self.instructions):
+            next_op, next_arg1, next_arg2, next_result = self.instructions[next_ip]
+            if next_op == 'TYPECAST' and next_arg1 == result:
+                self.input_expected_type = next_arg2
+                if self.debug_mode:
+                    print(f"  Input for '{result}' expects type '{self.input_expected_type}' due to next instruction.")
+
+    def execute_typecast(self, arg1, arg2, result, target):
+        """TYPECAST value, type, name: convert to integer, point, text or state."""
+        val = self.resolve_variable(arg1)
+        target_type = arg2
+        casted_value = val  # Default if cast fails
+        
+        try:
+            if target_type == 'integer':
+                if isinstance(val, bool):
+                    casted_value = 1 if val else 0
+                elif isinstance(val, str):
+                    if val.startswith('-'):
+                        casted_value = int(float(val[1:])) * -1
                     else:
-                        processed_val += str_val[i]
-                        i += 1
-                self.output_buffer.write(processed_val)
-                
-        # String concatenation
-        elif op == 'CONCAT':
-            val1 = self.resolve_variable(arg1)
-            val2 = self.resolve_variable(arg2)
-            
-            if isinstance(val1, bool):
-                str_val1 = "YES" if val1 else "NO"
-            elif isinstance(val1, (int, float)):
-                str_val1 = self.format_number_for_output(val1)
-            else:
-                str_val1 = "" if val1 is None else str(val1)
-                
-            if isinstance(val2, bool):
-                str_val2 = "YES" if val2 else "NO"
-            elif isinstance(val2, (int, float)):
-                str_val2 = self.format_number_for_output(val2)
-            else:
-                str_val2 = "" if val2 is None else str(val2)
+                        casted_value = int(float(val))
+                elif isinstance(val, float):
+                    casted_value = int(val)
+                elif isinstance(val, int):
+                    casted_value = val
+                else:
+                    casted_value = 0
+                casted_value = self.validate_number(casted_value)
                 
-            # Process escape sequences
-            for i, str_val in enumerate([str_val1, str_val2]):
-                if isinstance(str_val, str) and str_val:
-                    processed = str_val.replace('\\\\', '\\')
-                    processed = processed.replace('\\"', '"')
-                    processed = processed.replace('\\n', '\n')
-                    processed = processed.replace('\\t', '\t')
-                    if i == 0:
-                        str_val1 = processed
-                    else:
-                        str_val2 = processed
-                        
-            self.assign_variable(result, str_val1 + str_val2)
-            
-        # User input
-        elif op == 'INPUT':
-            self.waiting_for_input = True
-            self.input_result_var = result
-            prompt = self.resolve_variable(arg1)
-            self.input_prompt = str(prompt if prompt is not None else "")
-            
-            # Check next instruction for TYPECAST hint
-            self.input_expected_type = None
-            next_ip = self.ip + 1
-            if next_ip < len(self.instructions):
-                next_op, next_arg1, next_arg2, next_result = self.instructions[next_ip]
-                if next_op == 'TYPECAST' and next_arg1 == result:
-                    self.input_expected_type = next_arg2
-                    if self.debug_mode:
-                        print(f"  Input for '{result}' expects type '{self.input_expected_type}' due to next instruction.")
-                        
-        # Type conversion
-        elif op == 'TYPECAST':
-            val = self.resolve_variable(arg1)
-            target_type = arg2
-            casted_value = val  # Default if cast fails
-            
-            try:
-                if target_type == 'integer':
-                    if isinstance(val, bool):
-                        casted_value = 1 if val else 0
-                    elif isinstance(val, str):
-                        if val.startswith('-'):
-                            casted_value = int(float(val[1:])) * -1
-                        else:
-                            casted_value = int(float(val))
-                    elif isinstance(val, float):
-                        casted_value = int(val)
-                    elif isinstance(val, int):
-                        casted_value = val
+            elif target_type == 'point':
+                if isinstance(val, bool):
+                    casted_value = 1.0 if val else 0.0
+                elif isinstance(val, str):
+                    if val.startswith('-'):
+                        casted_value = float(val[1:]) * -1.0
                     else:
-                        casted_value = 0
-                    casted_value = self.validate_number(casted_value)
-                    
-                elif target_type == 'point':
-                    if isinstance(val, bool):
-                        casted_value = 1.0 if val else 0.0
-                    elif isinstance(val, str):
-                        if val.startswith('-'):
-                            casted_value = float(val[1:]) * -1.0
-                        else:
-                            casted_value = float(val)
-                    elif isinstance(val, int):
                         casted_value = float(val)
-                    elif isinstance(val, float):
-                        casted_value = val
-                    else:
-                        casted_value = 0.0
-                    casted_value = self.validate_number(casted_value)
+                elif isinstance(val, int):
+                    casted_value = float(val)
+                elif isinstance(val, float):
+                    casted_value = val
+                else:
+                    casted_value = 0.0
+                casted_value = self.validate_number(casted_value)
+                
+            elif target_type == 'text':
+                if isinstance(val, bool):
+                    casted_value = "YES" if val else "NO"
+                elif isinstance(val, (int, float)):
+                    casted_value = self.format_number_for_output(val)
+                elif val is None:
+                    casted_value = "empty"
+                else:
+                    casted_value = str(val)
                     
-                elif target_type == 'text':
-                    if isinstance(val, bool):
-                        casted_value = "YES" if val else "NO"
-                    elif isinstance(val, (int, float)):
-                        casted_value = self.format_number_for_output(val)
-                    elif val is None:
-                        casted_value = "empty"
-                    else:
-                        casted_value = str(val)
-                        
-                elif target_type == 'state':
-                    if isinstance(val, (int, float)):
-                        casted_value = (val != 0)
-                    elif isinstance(val, str):
-                        upper_val = val.upper()
-                        if upper_val in ["YES", "TRUE", "1"]:
-                            casted_value = True
-                        elif upper_val in ["NO", "FALSE", "0", "", "EMPTY"]:
-                            casted_value = False
-                        else:
-                            raise ValueError(f"Cannot convert '{val}' to state, expected YES, NO, TRUE, FALSE, 1, or 0")
-                    elif isinstance(val, list):
-                        casted_value = bool(val)
-                    elif val is None:
+            elif target_type == 'state':
+                if isinstance(val, (int, float)):
+                    casted_value = (val != 0)
+                elif isinstance(val, str):
+                    upper_val = val.upper()
+                    if upper_val in ["YES", "TRUE", "1"]:
+                        casted_value = True
+                    elif upper_val in ["NO", "FALSE", "0", "", "EMPTY"]:
                         casted_value = False
                     else:
-                        casted_value = bool(val)
-            except (ValueError, TypeError) as e:
-                if target_type in ['integer', 'point']:
-                    # For numeric conversions, raise an error when conversion fails
-                    raise ValueError(f"Cannot convert '{val}' to {target_type}: {e}")
+                        raise ValueError(f"Cannot convert '{val}' to state, expected YES, NO, TRUE, FALSE, 1, or 0")
+                elif isinstance(val, list):
+                    casted_value = bool(val)
+                elif val is None:
+                    casted_value = False
                 else:
-                    if self.debug_mode:
-                        print(f"Warning: Typecast failed for {val} to {target_type}: {e}")
-                    if target_type == 'text': casted_value = str(val)
-                    elif target_type == 'state': casted_value = False
-                    else: casted_value = val
-                
-            self.assign_variable(result, casted_value)
-            
-        # List creation
-        elif op == 'LIST_CREATE':
-            self.assign_variable(result, [])
-            
-        # List append
-        elif op == 'LIST_APPEND':
-            list_scope = self.find_variable_scope(arg1)
-            if list_scope is None or not isinstance(list_scope[arg1], list):
-                if self.debug_mode:
-                    print(f"Warning: LIST_APPEND target '{arg1}' not found or not a list. Creating new list.")
-                self.assign_variable(arg1, [])
-                list_scope = self.memory_stack[-1]
-            item = self.resolve_variable(arg2)
-            list_scope[arg1].append(item)
-            if self.debug_mode:
-                print(f"Appended {repr(item)} to list '{arg1}'")
-                
-        # List extend
-        elif op == 'LIST_EXTEND':
-            list_scope = self.find_variable_scope(arg1)
-            if list_scope is None or not isinstance(list_scope[arg1], list):
-                if self.debug_mode:
-                    print(f"Warning: LIST_EXTEND target '{arg1}' not found or not a list. Creating new list.")
-                self.assign_variable(arg1, [])
-                list_scope = self.memory_stack[-1]
-            extension_val = self.resolve_variable(arg2)
-            if isinstance(extension_val, list):
-                list_scope[arg1].extend(extension_val)
-                if self.debug_mode:
-                    print(f"Extended list '{arg1}' with {repr(extension_val)}")
+                    casted_value = bool(val)
+        except (ValueError, TypeError) as e:
+            if target_type in ['integer', 'point']:
+                # For numeric conversions, raise an error when conversion fails
+                raise ValueError(f"Cannot convert '{val}' to {target_type}: {e}")
             else:
-                list_scope[arg1].append(extension_val)
                 if self.debug_mode:
-                    print(f"Extended list '{arg1}' with single item {repr(extension_val)}")
-            if result:
-                self.assign_variable(result, list_scope[arg1])
-                
-        # List access (get element)
-        elif op == 'LIST_ACCESS':
-            list_var = self.resolve_variable(arg1)
-            index_raw = arg2
-            access_result = None
+                    print(f"Warning: Typecast failed for {val} to {target_type}: {e}")
+                if target_type == 'text': casted_value = str(val)
+                elif target_type == 'state': casted_value = False
+                else: casted_value = val
             
+        self.assign_variable(result, casted_value)
+
+    def execute_list_create(self, arg1, arg2, result, target):
+        """LIST_CREATE -, -, name: new empty list."""
+        self.assign_variable(result, [])
+
+    def execute_list_append(self, arg1, arg2, result, target):
+        """LIST_APPEND list, item: append, creating the list if needed."""
+        list_var = self.call_stack.lookup(arg1)
+        if not isinstance(list_var, list):
+            if self.debug_mode:
+                print(f"Warning: LIST_APPEND target '{arg1}' not found or not a list. Creating new list.")
+            list_var = []
+            self.assign_variable(arg1, list_var)
+        item = self.resolve_variable(arg2)
+        self.budget.check_list_size(len(list_var) + 1)
+        list_var.append(item)
+        if self.debug_mode:
+            print(f"Appended {repr(item)} to list '{arg1}'")
+
+    def execute_list_extend(self, arg1, arg2, result, target):
+        """LIST_EXTEND list, items, name: extend, creating the list if needed."""
+        list_var = self.call_stack.lookup(arg1)
+        if not isinstance(list_var, list):
+            if self.debug_mode:
+                print(f"Warning: LIST_EXTEND target '{arg1}' not found or not a list. Creating new list.")
+            list_var = []
+            self.assign_variable(arg1, list_var)
+        extension_val = self.resolve_variable(arg2)
+        if isinstance(extension_val, list):
+            self.budget.check_list_size(len(list_var) + len(extension_val))
+            list_var.extend(extension_val)
+            if self.debug_mode:
+                print(f"Extended list '{arg1}' with {repr(extension_val)}")
+        else:
+            self.budget.check_list_size(len(list_var) + 1)
+            list_var.append(extension_val)
+            if self.debug_mode:
+                print(f"Extended list '{arg1}' with single item {repr(extension_val)}")
+        if result:
+            self.assign_variable(result, list_var)
+
+    def execute_list_access(self, arg1, arg2, result, target):
+        """LIST_ACCESS list, index, name: read a list element or character."""
+        list_var = self.resolve_variable(arg1)
+        index_raw = arg2
+        access_result = None
+        
+        try:
+            index = self.resolve_variable(index_raw)
             try:
-                index = self.resolve_variable(index_raw)
-                try:
-                    if isinstance(index, float) and index.is_integer():
-                        index_int = int(index)
-                    elif isinstance(index, str) and index.startswith('-'):
-                        index_int = -int(index[1:])
-                    else:
-                        index_int = int(index)
-                except (ValueError, TypeError):
-                    raise ValueError(f"Invalid index type: {type(index).__name__} ({index})")
-                    
-                if not isinstance(list_var, (list, str)):
-                    raise ValueError(f"Cannot access index on non-list/non-string: {type(list_var).__name__}")
-                
-                actual_index = index_int
-                if index_int < 0:
-                    actual_index = len(list_var) + index_int
-                if 0 <= actual_index < len(list_var):
-                    access_result = list_var[actual_index]
+                if isinstance(index, float) and index.is_integer():
+                    index_int = int(index)
+                elif isinstance(index, str) and index.startswith('-'):
+                    index_int = -int(index[1:])
                 else:
-                    raise ValueError(f"Index {index_int} out of range for {type(list_var).__name__} of length {len(list_var)}")
-            except Exception as e:
-                raise ValueError(f"Error during LIST_ACCESS for '{arg1}' at index '{index_raw}': {e}")
+                    index_int = int(index)
+            except (ValueError, TypeError):
+                raise ValueError(f"Invalid index type: {type(index).__name__} ({index})")
                 
-            self.assign_variable(result, access_result)
+            if not isinstance(list_var, (list, str)):
+                raise ValueError(f"Cannot access index on non-list/non-string: {type(list_var).__name__}")
             
-        # List set (modify element)
-        elif op == 'LIST_SET':
-            list_name = arg1
-            index_raw = arg2
-            value_raw = result  # Note: result holds the value here
+            actual_index = index_int
+            if index_int < 0:
+                actual_index = len(list_var) + index_int
+            if 0 <= actual_index < len(list_var):
+                access_result = list_var[actual_index]
+            else:
+                raise ValueError(f"Index {index_int} out of range for {type(list_var).__name__} of length {len(list_var)}")
+        except Exception as e:
+            raise ValueError(f"Error during LIST_ACCESS for '{arg1}' at index '{index_raw}': {e}")
             
-            list_scope = self.find_variable_scope(list_name)
-            if list_scope is None or not isinstance(list_scope[list_name], list):
-                raise ValueError(f"Cannot perform LIST_SET: '{list_name}' is not a list or not found.")
-                
-            list_var = list_scope[list_name]
-            value = self.resolve_variable(value_raw)
+        self.assign_variable(result, access_result)
+
+    def execute_list_set(self, arg1, arg2, result, target):
+        """LIST_SET list, index, value: replace a list element."""
+        list_name = arg1
+        index_raw = arg2
+        value_raw = result  # Note: result holds the value here
+        
+        list_var = self.call_stack.lookup(list_name)
+        if not isinstance(list_var, list):
+            raise ValueError(f"Cannot perform LIST_SET: '{list_name}' is not a list or not found.")
             
+        value = self.resolve_variable(value_raw)
+        
+        try:
+            index = self.resolve_variable(index_raw)
             try:
-                index = self.resolve_variable(index_raw)
-                try:
-                    if isinstance(index, float) and index.is_integer():
-                        index_int = int(index)
-                    elif isinstance(index, str) and index.startswith('-'):
-                        index_int = -int(index[1:])
-                    else:
-                        index_int = int(index)
-                except (ValueError, TypeError):
-                    raise ValueError(f"Invalid index type for LIST_SET: {type(index).__name__} ({index})")
-                    
-                actual_index = index_int
-                if index_int < 0:
-                    actual_index = len(list_var) + index_int
-                    
-                if 0 <= actual_index < len(list_var):
-                    list_var[actual_index] = value
-                    if self.debug_mode:
-                        print(f"Set list '{list_name}' index {actual_index} to {repr(value)}")
+                if isinstance(index, float) and index.is_integer():
+                    index_int = int(index)
+                elif isinstance(index, str) and index.startswith('-'):
+                    index_int = -int(index[1:])
                 else:
-                    raise ValueError(f"List index {index_int} (actual: {actual_index}) out of range for assignment (length {len(list_var)})")
-            except Exception as e:
-                raise ValueError(f"Error during LIST_SET for '{list_name}' at index '{index_raw}': {e}")
+                    index_int = int(index)
+            except (ValueError, TypeError):
+                raise ValueError(f"Invalid index type for LIST_SET: {type(index).__name__} ({index})")
                 
-        # Dictionary creation
-        elif op == 'GROUP_CREATE':
-            self.assign_variable(result, {})
-            
-        # Dictionary access
-        elif op == 'GROUP_ACCESS':
-            group = self.resolve_variable(arg1)
-            key = self.resolve_variable(arg2)
-            if isinstance(group, dict):
-                if key in group:
-                    self.assign_variable(result, group[key])
-                else:
-                    raise ValueError(f"Key {key} not found in group {arg1}")
-            else:
-                raise ValueError(f"Cannot access key in non-group: {arg1}")
-                
-        # Dictionary set
-        elif op == 'GROUP_SET':
-            group_name = arg1
-            group_scope = self.find_variable_scope(group_name)
-            if group_scope is None or not isinstance(group_scope[group_name], dict):
-                self.assign_variable(group_name, {})
-                group_scope = self.memory_stack[-1]
-                
-            key = self.resolve_variable(arg2)
-            value = self.resolve_variable(result)
-            group_scope[group_name][key] = value
-            
-            if self.debug_mode:
-                print(f"Set group {group_name}[{key}] = {value}")
+            actual_index = index_int
+            if index_int < 0:
+                actual_index = len(list_var) + index_int
                 
-        # Runtime error
-        elif op == 'ERROR':
-            error_msg = self.resolve_variable(arg1)
-            raise ValueError(f"Explicit runtime error: {error_msg}")
-            
-        # Unknown instruction
+            if 0 <= actual_index < len(list_var):
+                list_var[actual_index] = value
+                if self.debug_mode:
+                    print(f"Set list '{list_name}' index {actual_index} to {repr(value)}")
+            else:
+                raise ValueError(f"List index {index_int} (actual: {actual_index}) out of range for assignment (length {len(list_var)})")
+        except Exception as e:
+            raise ValueError(f"Error during LIST_SET for '{list_name}' at index '{index_raw}': {e}")
+
+    def execute_group_create(self, arg1, arg2, result, target):
+        """GROUP_CREATE -, -, name: new empty group."""
+        self.assign_variable(result, {})
+
+    def execute_group_access(self, arg1, arg2, result, target):
+        """GROUP_ACCESS group, key, name: read a group member."""
+        group = self.resolve_variable(arg1)
+        key = self.resolve_variable(arg2)
+        if isinstance(group, dict):
+            if key in group:
+                self.assign_variable(result, group[key])
+            else:
+                raise ValueError(f"Key {key} not found in group {arg1}")
         else:
-            raise ValueError(f"Unknown TAC instruction: {op}")
+            raise ValueError(f"Cannot access key in non-group: {arg1}")
+
+    def execute_group_set(self, arg1, arg2, result, target):
+        """GROUP_SET group, key, value: set a group member, creating the group if needed."""
+        group_name = arg1
+        group = self.call_stack.lookup(group_name)
+        if not isinstance(group, dict):
+            group = {}
+            self.assign_variable(group_name, group)
             
-        # Debug output
+        key = self.resolve_variable(arg2)
+        value = self.resolve_variable(result)
+        group[key] = value
+        
         if self.debug_mode:
-            print(f"  Scope after instruction {self.ip} ({op}): {self.memory_stack[-1]}")
\ No newline at end of file
+            print(f"Set group {group_name}[{key}] = {value}")
+
+    def execute_error(self, arg1, arg2, result, target):
+        """ERROR message: raise a runtime error."""
+        error_msg = self.resolve_variable(arg1)
+        raise ValueError(f"Explicit runtime error: {error_msg}")
@@ -0,0 +1,337 @@
+# tac_program.py
+#
+# Compact storage for generated TAC. TACGenerator emits a list of
+# (op, arg1, arg2, result) tuples plus a parallel list of source positions;
+# TACProgram keeps the same program as columns: opcodes as small ints in an
+# array('B'), each operand as an int reference into the constant, name or
+# label table, and source lines/columns in array('i'). The tuple form is
+# still available through the instructions/source_positions views, for
+# format_tac_instructions and the JSON sent to the frontend.
+#
+# link() turns a program into the stream the interpreter executes, with
+# jump and call targets resolved to instruction indexes and the LABEL and
+# FUNCTION markers left out and every variable name given the slot it is
+# stored in (see call_stack). Names that no instruction assigns are never
+# variables, so link() decodes what they stand for (a number, text with its
+# escapes processed, ...) once, into LinkedProgram.literals, instead of the
+# interpreter parsing them on every read. closure_compiler turns a linked
+# program into the closures the interpreter's run loop calls.
+
+import re
+from array import array
+from collections.abc import Sequence
+
+# Every opcode TACGenerator emits; an opcode's number is its index here
+OPCODES = (
+    'LABEL', 'GOTO', 'IFFALSE', 'IFTRUE', 'FUNCTION', 'CALL', 'PARAM', 'RETURN',
+    'ASSIGN', 'ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'NEG', 'NOT', 'AND', 'OR',
+    'EQ', 'NEQ', 'LT', 'LE', 'GT', 'GE', 'PRINT', 'CONCAT', 'INPUT', 'TYPECAST',
+    'LIST_CREATE', 'LIST_APPEND', 'LIST_EXTEND', 'LIST_ACCESS', 'LIST_SET',
+    'GROUP_CREATE', 'GROUP_ACCESS', 'GROUP_SET', 'ERROR',
+)
+OPCODE_NUMBERS = {name: number for number, name in enumerate(OPCODES)}
+
+# Opcodes whose result operand is a label name rather than a variable
+LABEL_RESULT_OPCODES = {'LABEL', 'GOTO', 'IFFALSE', 'IFTRUE', 'FUNCTION'}
+
+# Opcodes that only mark a position and do nothing when executed
+MARKER_OPCODES = {'LABEL', 'FUNCTION'}
+JUMP_OPCODES = {'GOTO', 'IFFALSE', 'IFTRUE'}
+
+# Opcodes that may assign their arg1 operand (a new list or group)
+CONTAINER_OPCODES = {'LIST_APPEND', 'LIST_EXTEND', 'GROUP_SET'}
+
+# An operand reference is (table index << 2) | kind, where kind picks the
+# table: no operand, constant (any non-string literal), name (any string,
+# resolved at runtime as a variable before falling back to a literal), label
+NO_OPERAND = 0
+CONSTANT = 1
+NAME = 2
+LABEL = 3
+KIND_BITS = 2
+KIND_MASK = 3
+
+
+# Escape sequences of Minima text; a backslash before anything else is kept
+ESCAPES = {'\\': '\\', '"': '"', 'n': '\n', 't': '\t'}
+ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+
+
+def decode_escapes(text):
+    """text with its escape sequences replaced by the characters they stand for."""
+    if '\\' not in text:
+        return text
+    return ESCAPE_PATTERN.sub(lambda match: ESCAPES.get(match.group(1), match.group(0)), text)
+
+
+def decode_literal(text):
+    """
+    Value of a name operand that is not a variable: empty, YES and NO, a
+    number, or text (quoted or not) with its escapes processed.
+    """
+    if text == 'empty':
+        return None
+    if text == 'YES':
+        return True
+    if text == 'NO':
+        return False
+    if text.startswith('-'):
+        digits = text[1:]
+        if digits.isdigit():
+            try:
+                return -int(digits)
+            except ValueError: pass
+        elif '.' in digits or 'e' in digits.lower():
+            try:
+                return -float(digits)
+            except ValueError: pass
+    elif text.isdigit():
+        try:
+            return int(text)
+        except ValueError: pass
+    elif '.' in text or 'e' in text.lower():
+        try:
+            return float(text)
+        except ValueError: pass
+    if text.startswith('"') and text.endswith('"'):
+        return decode_escapes(text[1:-1])
+    return decode_escapes(text)
+
+
+class TACProgram:
+    """
+    A TAC program in struct-of-arrays form. Instruction i is
+    OPCODES[opcodes[i]] with operands arg1[i], arg2[i] and result[i]
+    (references decoded by operand()), generated from source line
+    lines[i], column columns[i] (-1 when there is no position).
+    """
+    __slots__ = ('opcodes', 'arg1', 'arg2', 'result', 'lines', 'columns',
+                 'constants', 'names', 'labels', 'operand_tables')
+
+    def __init__(self):
+        self.opcodes = array('B')
+        self.arg1 = array('i')
+        self.arg2 = array('i')
+        self.result = array('i')
+        self.lines = array('i')
+        self.columns = array('i')
+        self.constants = []
+        self.names = []
+        self.labels = []
+        # Indexed by operand kind, so operand(ref) needs no branches
+        self.operand_tables = ((None,), self.constants, self.names, self.labels)
+
+    @classmethod
+    def from_instructions(cls, instructions, source_positions=None):
+        """Build a program from TACGenerator's instruction tuples and source positions."""
+        program = cls()
+        constant_refs, name_refs, label_refs = {}, {}, {}
+
+        def ref(value, key, kind, table, refs):
+            index = refs.get(key)
+            if index is None:
+                index = refs[key] = len(table)
+                table.append(value)
+            return (index << KIND_BITS) | kind
+
+        def operand_ref(value, is_label=False):
+            if value is None:
+                return NO_OPERAND
+            if is_label:
+                return ref(value, value, LABEL, program.labels, label_refs)
+            if isinstance(value, str):
+                return ref(value, value, NAME, program.names, name_refs)
+            if isinstance(value, list):
+                # Function parameter lists are not shared, so none is aliased
+                program.constants.append(value)
+                return ((len(program.constants) - 1) << KIND_BITS) | CONSTANT
+            # Keyed by repr so that 1, 1.0, True and -0.0, 0.0 stay distinct
+            return ref(value, (type(value), repr(value)), CONSTANT, program.constants, constant_refs)
+
+        for op, arg1, arg2, result in instructions:
+            opcode = OPCODE_NUMBERS.get(op)
+            if opcode is None:
+                raise ValueError(f"Unknown TAC instruction: {op}")
+            program.opcodes.append(opcode)
+            program.arg1.append(operand_ref(arg1))
+            program.arg2.append(operand_ref(arg2))
+            program.result.append(operand_ref(result, op in LABEL_RESULT_OPCODES))
+
+        positions = source_positions or ()
+        for index in range(len(program.opcodes)):
+            position = positions[index] if index < len(positions) else None
+            if position:
+                program.lines.append(position[0])
+                program.columns.append(position[1])
+            else:
+                program.lines.append(-1)
+                program.columns.append(-1)
+        return program
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def operand(self, ref):
+        """The operand value a reference stands for."""
+        return self.operand_tables[ref & KIND_MASK][ref >> KIND_BITS]
+
+    def instruction(self, index):
+        """Instruction index as an (op, arg1, arg2, result) tuple."""
+        tables = self.operand_tables
+        arg1, arg2, result = self.arg1[index], self.arg2[index], self.result[index]
+        return (OPCODES[self.opcodes[index]],
+                tables[arg1 & KIND_MASK][arg1 >> KIND_BITS],
+                tables[arg2 & KIND_MASK][arg2 >> KIND_BITS],
+                tables[result & KIND_MASK][result >> KIND_BITS])
+
+    def position(self, index):
+        """(line, column) instruction index was generated from, or None."""
+        line = self.lines[index]
+        if line < 0:
+            return None
+        return (line, self.columns[index])
+
+    @property
+    def instructions(self):
+        """The instructions as a sequence of (op, arg1, arg2, result) tuples."""
+        return _ProgramView(self, self.instruction)
+
+    @property
+    def source_positions(self):
+        """The source positions as a sequence of (line, column) tuples or None."""
+        return _ProgramView(self, self.position)
+
+    def to_tuples(self):
+        """(instruction tuples, source positions) as plain lists, e.g. for JSON."""
+        return list(self.instructions), list(self.source_positions)
+
+    def link(self):
+        """The LinkedProgram the interpreter executes for this program."""
+        return LinkedProgram(self)
+
+
+class LinkedProgram:
+    """
+    The executable form of a TACProgram. LABEL and FUNCTION instructions
+    are left out; every other instruction keeps its opcode and operand
+    references (decoded with the program's operand tables), and
+    origins[i] is its instruction number in the program, for error
+    messages and the TAC view.
+
+    targets[i] is where instruction i goes: for GOTO, IFFALSE and IFTRUE
+    the index of the first instruction after the label, for CALL of a
+    function defined in the program the index its body starts at, and -1
+    when the label does not exist or the instruction does not jump.
+    labels maps each label name to the index it resolves to; as with the
+    old label table, a label defined twice resolves to its last definition.
+
+    variables lists every name the program may use as a variable, in slot
+    order: first the local_slots names an instruction can assign (function
+    parameters included), then the names that are only ever read. Those
+    are never bound to a variable, so literals maps each of them (except
+    temporaries) to the value it always resolves to, its decode_literal().
+    """
+    __slots__ = ('program', 'opcodes', 'arg1', 'arg2', 'result', 'targets', 'origins',
+                 'operand_tables', 'labels', 'variables', 'local_slots', 'literals')
+
+    def __init__(self, program):
+        self.program = program
+        self.operand_tables = program.operand_tables
+        self.opcodes = array('B')
+        self.arg1 = array('i')
+        self.arg2 = array('i')
+        self.result = array('i')
+        self.targets = array('i')
+        self.origins = array('i')
+        self.labels = {}
+
+        markers = {OPCODE_NUMBERS[op] for op in MARKER_OPCODES}
+        label_opcode = OPCODE_NUMBERS['LABEL']
+        function_opcode = OPCODE_NUMBERS['FUNCTION']
+        function_labels = {}
+        kept = 0
+        for index, opcode in enumerate(program.opcodes):
+            if opcode == label_opcode:
+                self.labels[program.operand(program.result[index])] = kept
+            elif opcode == function_opcode:
+                function_labels[program.operand(program.arg1[index])] = \
+                    program.operand(program.result[index])
+            if opcode not in markers:
+                kept += 1
+
+        jumps = {OPCODE_NUMBERS[op] for op in JUMP_OPCODES}
+        call_opcode = OPCODE_NUMBERS['CALL']
+        for index, opcode in enumerate(program.opcodes):
+            if opcode in markers:
+                continue
+            if opcode in jumps:
+                target = self.labels.get(program.operand(program.result[index]), -1)
+            elif opcode == call_opcode:
+                label = function_labels.get(program.operand(program.arg1[index]))
+                target = self.labels.get(label, -1)
+            else:
+                target = -1
+            self.opcodes.append(opcode)
+            self.arg1.append(program.arg1[index])
+            self.arg2.append(program.arg2[index])
+            self.result.append(program.result[index])
+            self.targets.append(target)
+            self.origins.append(index)
+
+        assigned = {}
+        containers = {OPCODE_NUMBERS[op] for op in CONTAINER_OPCODES}
+        label_results = {OPCODE_NUMBERS[op] for op in LABEL_RESULT_OPCODES}
+        for index, opcode in enumerate(program.opcodes):
+            refs = []
+            if opcode not in label_results:
+                refs.append(program.result[index])
+            if opcode in containers:
+                refs.append(program.arg1[index])
+            for ref in refs:
+                if ref & KIND_MASK == NAME:
+                    assigned[program.operand(ref)] = None
+            if opcode == function_opcode:
+                for param in program.operand(program.arg2[index]) or ():
+                    if isinstance(param, str):
+                        assigned[param] = None
+        self.local_slots = len(assigned)
+        self.variables = tuple(assigned) + tuple(name for name in program.names if name not in assigned)
+        # A temporary read before it is assigned is left to the interpreter, which warns about it
+        self.literals = {name: decode_literal(name) for name in self.variables[self.local_slots:]
+                         if not (name.startswith('t') and name[1:].isdigit())}
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def instruction(self, index):
+        """Linked instruction index as an (op, arg1, arg2, result) tuple."""
+        tables = self.operand_tables
+        arg1, arg2, result = self.arg1[index], self.arg2[index], self.result[index]
+        return (OPCODES[self.opcodes[index]],
+                tables[arg1 & KIND_MASK][arg1 >> KIND_BITS],
+                tables[arg2 & KIND_MASK][arg2 >> KIND_BITS],
+                tables[result & KIND_MASK][result >> KIND_BITS])
+
+
+class _ProgramView(Sequence):
+    """Read-only sequence over a TACProgram, building each item with get(index)."""
+    __slots__ = ('program', 'get')
+
+    def __init__(self, program, get):
+        self.program = program
+        self.get = get
+
+    def __len__(self):
+        return len(self.program)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.get(i) for i in range(*index.indices(len(self.program)))]
+        if index < 0:
+            index += len(self.program)
+        if not 0 <= index < len(self.program):
+            raise IndexError("TAC program index out of range")
+        return self.get(index)
+
+    def __iter__(self):
+        return map(self.get, range(len(self.program)))
@@ -0,0 +1,644 @@
+# tac_transpiler.py
+#
+# Optional backend that runs a TAC program as generated Python code instead
+# of stepping through it with TACInterpreter. TACTranspiler writes one Python
+# function for the top level of the program and one per TAC function; each
+# is a "while True" loop over the function's basic blocks, laid out in
+# program order under nested "if pc <= block" guards. Falling through to the
+# next block passes every guard below it, and a jump sets pc and continues
+# the loop, costing a few comparisons to get back to its block.
+#
+# TAC variables become Python locals wherever that cannot be told apart from
+# the interpreter's scope stack: names in a function are locals when every
+# read of them comes after an assignment in the same call, names at the top
+# level when no function reads them. Other top-level variables are kept in
+# their slots of the interpreter's global frame. Programs for which this does not hold,
+# or that read input, are left to the interpreter (transpile() returns None).
+#
+# The common cases of the hot instructions (int arithmetic and comparisons,
+# branches, list reads and writes, printing ints and plain text) are written
+# out inline. Everything else, and every case the inline code does not cover,
+# calls the instruction's execute_<op> handler in a frame holding its
+# operands, so range checks and output formatting are the interpreter's own.
+# Each line is marked with a "# ip" comment naming the instruction it runs,
+# so a runtime error is reported as the interpreter would, for the
+# instruction of the innermost generated frame it went through. Only a
+# recursion too deep for Python's stack is left to the interpreter, which
+# runs the program again from the start, within what is left of the budget.
+#
+# The generated functions count steps a block at a time in a variable they
+# share, and check the interpreter's ExecutionBudget at every backward jump
+# and function entry once check_at steps have run, so every loop and every
+# recursion passes a check. A run that goes over its budget is stopped and
+# reported as the interpreter would, but the step limit is only as exact as
+# the checks: a run can be stopped a block or so past it, and one that ends
+# that close to it is not stopped at all.
+
+from functools import partial
+from io import StringIO
+
+from backend.CodegenTAC.call_stack import CallStack, UNBOUND
+from backend.CodegenTAC.closure_compiler import operand_name
+from backend.CodegenTAC.execution_budget import BudgetExceeded
+from backend.CodegenTAC.interpreter import TACInterpreter
+
+# Operand positions (1 = arg1, 2 = arg2, 3 = result) each opcode resolves as values
+VALUE_OPERANDS = {
+    'IFFALSE': (1,), 'IFTRUE': (1,), 'PARAM': (1,), 'RETURN': (1,), 'ASSIGN': (1,),
+    'ADD': (1, 2), 'SUB': (1, 2), 'MUL': (1, 2), 'DIV': (1, 2), 'MOD': (1, 2),
+    'NEG': (1,), 'NOT': (1,), 'AND': (1, 2), 'OR': (1, 2),
+    'EQ': (1, 2), 'NEQ': (1, 2), 'LT': (1, 2), 'LE': (1, 2), 'GT': (1, 2), 'GE': (1, 2),
+    'PRINT': (1,), 'CONCAT': (1, 2), 'TYPECAST': (1,),
+    'LIST_APPEND': (1, 2), 'LIST_EXTEND': (1, 2), 'LIST_ACCESS': (1, 2), 'LIST_SET': (1, 2, 3),
+    'GROUP_ACCESS': (1, 2), 'GROUP_SET': (1, 2, 3), 'ERROR': (1,),
+}
+
+# Opcodes that assign their result operand whenever they complete
+RESULT_OPCODES = {
+    'ASSIGN', 'ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'NEG', 'NOT', 'AND', 'OR',
+    'EQ', 'NEQ', 'LT', 'LE', 'GT', 'GE', 'CONCAT', 'TYPECAST',
+    'LIST_CREATE', 'LIST_ACCESS', 'GROUP_CREATE', 'GROUP_ACCESS',
+}
+
+# Opcodes that assign their result operand only when it is given
+OPTIONAL_RESULT_OPCODES = {'CALL', 'LIST_EXTEND'}
+
+# Opcodes that look their arg1 up as a variable and may assign it a new list or group
+CONTAINER_OPCODES = {'LIST_APPEND', 'LIST_EXTEND', 'LIST_SET', 'GROUP_SET'}
+
+BRANCH_OPCODES = {'IFFALSE', 'IFTRUE'}
+TERMINATOR_OPCODES = {'GOTO', 'IFFALSE', 'IFTRUE', 'RETURN'}
+
+ARITHMETIC_OPERATORS = {'ADD': '+', 'SUB': '-', 'MUL': '*'}
+COMPARISON_OPERATORS = {'EQ': '==', 'NEQ': '!=', 'LT': '<', 'LE': '<=', 'GT': '>', 'GE': '>='}
+
+# Blocks per level of the pc guard tree
+GUARD_FAN_OUT = 4
+
+
+class NotTranspilable(Exception):
+    """The program uses something the transpiler leaves to the interpreter."""
+
+
+class Region:
+    """
+    The instructions one generated Python function runs: the top level of
+    the program (function is None) or the body of a TAC function, entered
+    at instruction entry.
+    """
+
+    def __init__(self, entry, function=None, params=()):
+        self.entry = entry
+        self.function = function
+        self.params = list(params)
+        self.instructions = set()
+        self.blocks = []           # (start, end) instruction indexes, in program order
+        self.block_ids = {}        # block start -> position in blocks
+        self.assigned = set(params)  # names the region may assign
+        self.reads = []            # (name, assigned on every path to the read)
+        self.kinds = {}            # name -> 'local', 'global' or 'literal'
+
+    @property
+    def python_name(self):
+        return 'main' if self.function is None else f'fn_{self.entry}'
+
+
+class TACTranspiler:
+    """
+    Translates TAC programs that qualify into TranspiledPrograms. See the
+    module comment for what qualifies and how the code is laid out.
+    """
+
+    def __init__(self):
+        # Resolves operands with no variables in scope, i.e. as literals
+        self.literals = TACInterpreter()
+        self.builtins = self.literals.builtins
+
+    def transpile(self, program):
+        """TranspiledProgram running program, or None when it does not qualify."""
+        try:
+            return self.generate(program)
+        except NotTranspilable:
+            return None
+
+    def generate(self, program):
+        self.program = program
+        self.code = code = program.link()
+        self.instructions = [code.instruction(ip) for ip in range(len(code))]
+        self.slots = {name: slot for slot, name in enumerate(code.variables)}
+        self.constants = []
+        self.constant_refs = {}
+        self.fallbacks = []
+        self.builtin_names = []
+        self.block_ends = {}
+
+        if any(op == 'INPUT' for op, _, _, _ in program.instructions):
+            raise NotTranspilable("reads input")
+        self.function_params = {}
+        for op, arg1, arg2, result in program.instructions:
+            if op == 'FUNCTION':
+                self.function_params[arg1] = arg2 or []
+
+        self.find_regions()
+        for region in self.regions:
+            self.find_blocks(region)
+            self.find_assignments(region)
+        self.classify_names()
+
+        lines = ["def make(interp, stack, K, F, B):",
+                 "    g = stack.frames[0].values",
+                 "    unbound = UNBOUND",
+                 "    push, pop, store = stack.push, stack.pop, stack.store",
+                 "    low = interp.min_number",
+                 "    high = interp.max_number",
+                 "    evaluate = interp.evaluate_condition",
+                 "    write = interp.output_buffer.write",
+                 "    budget = interp.budget",
+                 "    max_text = budget.max_text_length",
+                 "    steps = check_at = depth = 0",
+                 "    def checkpoint():",
+                 "        nonlocal check_at",
+                 "        interp.steps_executed = steps",
+                 "        check_at = budget.check(steps, interp.output_buffer.tell(), depth)"]
+        functions = []
+        for region in self.regions:
+            functions.extend(self.function_source(region))
+        lines.extend(f"    k{index} = K[{index}]" for index in range(len(self.constants)))
+        lines.extend(f"    f{ip} = F[{ip}]" for ip in self.fallbacks)
+        lines.extend(f"    b{index} = B[{index}]" for index in range(len(self.builtin_names)))
+        lines.extend(functions)
+        lines.append("    return main, lambda: steps")
+        source = '\n'.join(lines) + '\n'
+        return TranspiledProgram(program, source, self.constants, self.fallbacks, self.builtin_names,
+                                 self.block_ends)
+
+    # --- analysis -------------------------------------------------------
+
+    def successors(self, ip):
+        """Instructions that can run after ip in the same function; len(code) is the end of the program."""
+        op, arg1, arg2, result = self.instructions[ip]
+        target = self.code.targets[ip]
+        if op in ('GOTO', 'IFFALSE', 'IFTRUE') and target < 0:
+            raise NotTranspilable(f"jumps to missing label {result}")
+        if op == 'GOTO':
+            return (target,)
+        if op in BRANCH_OPCODES:
+            return (target, ip + 1)
+        if op == 'RETURN':
+            return ()
+        return (ip + 1,)
+
+    def find_regions(self):
+        """The top level and every function it can call, each instruction belonging to one of them."""
+        end = len(self.code)
+        owners = {}
+        self.regions = []
+        self.function_regions = {}
+        pending = [Region(0)]
+        while pending:
+            region = pending.pop()
+            self.regions.append(region)
+            stack = [region.entry]
+            while stack:
+                ip = stack.pop()
+                if ip == end:
+                    if region.function is not None:
+                        raise NotTranspilable("a function runs past the end of the program")
+                    continue
+                if ip in region.instructions:
+                    continue
+                if ip in owners:
+                    raise NotTranspilable("instructions shared between functions")
+                owners[ip] = region
+                region.instructions.add(ip)
+                stack.extend(self.successors(ip))
+                op, arg1, arg2, result = self.instructions[ip]
+                if op == 'CALL':
+                    pending.extend(self.called_region(ip))
+
+    def called_region(self, ip):
+        """[Region] for the function CALL ip starts, when it has not been seen yet."""
+        op, name, count, result = self.instructions[ip]
+        if not isinstance(count, int):
+            raise NotTranspilable("CALL without an argument count")
+        if name in self.builtins:
+            return []
+        if name not in self.function_params:
+            raise NotTranspilable(f"call of unknown function {name}")
+        entry = self.code.targets[ip]
+        if entry < 0:
+            raise NotTranspilable(f"function {name} has no body")
+        params = self.function_params[name]
+        if count != len(params) or not all(isinstance(param, str) for param in params):
+            raise NotTranspilable(f"call of {name} with {count} arguments")
+        region = self.function_regions.get(entry)
+        if region is not None:
+            if region.function != name:
+                raise NotTranspilable("two functions share a body")
+            return []
+        region = self.function_regions[entry] = Region(entry, name, params)
+        return [region]
+
+    def find_blocks(self, region):
+        leaders = {region.entry}
+        for ip in region.instructions:
+            op = self.instructions[ip][0]
+            if op in TERMINATOR_OPCODES:
+                leaders.update(self.successors(ip))
+                leaders.add(ip + 1)
+        for start in sorted(leaders & region.instructions):
+            end = start
+            while (self.instructions[end][0] not in TERMINATOR_OPCODES and
+                   end + 1 in region.instructions and end + 1 not in leaders):
+                end += 1
+            region.block_ids[start] = len(region.blocks)
+            region.blocks.append((start, end))
+        self.check_calls(region)
+
+    def check_calls(self, region):
+        """Every PARAM must directly precede, in the same block, the CALL taking it."""
+        for start, end in region.blocks:
+            params = []
+            for ip in range(start, end + 1):
+                op, arg1, arg2, result = self.instructions[ip]
+                if op == 'PARAM':
+                    if result != len(params):
+                        raise NotTranspilable("PARAMs out of order")
+                    params.append(arg1)
+                elif op == 'CALL':
+                    if len(params) != arg2:
+                        raise NotTranspilable("CALL does not take the PARAMs before it")
+                    params = []
+                elif params:
+                    raise NotTranspilable("PARAM not followed by its CALL")
+            if params:
+                raise NotTranspilable("PARAM not followed by its CALL")
+
+    def written_names(self, ip):
+        """(names instruction ip assigns when it completes, names it may assign)."""
+        op, arg1, arg2, result = self.instructions[ip]
+        assigned = ()
+        if op in RESULT_OPCODES or (op in OPTIONAL_RESULT_OPCODES and result):
+            if not isinstance(result, str):
+                raise NotTranspilable(f"{op} into a non-variable")
+            assigned = (result,)
+        maybe_assigned = ()
+        if op in CONTAINER_OPCODES:
+            if not isinstance(arg1, str):
+                raise NotTranspilable(f"{op} on a non-variable")
+            if op != 'LIST_SET':
+                maybe_assigned = (arg1,)
+        return assigned, maybe_assigned
+
+    def read_names(self, ip):
+        """Names instruction ip resolves as variables."""
+        instruction = self.instructions[ip]
+        if instruction[0] == 'ASSIGN' and instruction[1] == ']':
+            return []
+        names = []
+        for position in VALUE_OPERANDS.get(instruction[0], ()):
+            name = operand_name(instruction[position])
+            if name is not None and name not in names:
+                names.append(name)
+        return names
+
+    def find_assignments(self, region):
+        """
+        Fill in region.assigned and region.reads, with whether each read
+        comes after an assignment of the name on every path from the entry.
+        """
+        for start, end in region.blocks:
+            for ip in range(start, end + 1):
+                assigned, maybe_assigned = self.written_names(ip)
+                region.assigned.update(assigned, maybe_assigned)
+
+        predecessors = {start: [] for start, end in region.blocks}
+        for start, end in region.blocks:
+            for successor in self.successors(end):
+                if successor in predecessors:
+                    predecessors[successor].append(start)
+        entry_names = frozenset(region.params)
+        block_out = {}  # block start -> names assigned on every path out; missing: every name
+        changed = True
+        while changed:
+            changed = False
+            for start, end in region.blocks:
+                names = self.block_in(region, start, predecessors, block_out, entry_names)
+                if names is None:
+                    continue
+                for ip in range(start, end + 1):
+                    names = names.union(self.written_names(ip)[0])
+                if block_out.get(start) != names:
+                    block_out[start] = names
+                    changed = True
+
+        for start, end in region.blocks:
+            names = self.block_in(region, start, predecessors, block_out, entry_names) or frozenset()
+            for ip in range(start, end + 1):
+                for name in self.read_names(ip):
+                    region.reads.append((name, name in names))
+                names = names.union(self.written_names(ip)[0])
+
+    @staticmethod
+    def block_in(region, start, predecessors, block_out, entry_names):
+        """Names assigned on every path into block start, or None while that is every name."""
+        names = entry_names if start == region.entry else None
+        for predecessor in predecessors[start]:
+            out = block_out.get(predecessor)
+            if out is not None:
+                names = out if names is None else names & out
+        return names
+
+    def classify_names(self):
+        """Decide where each region keeps the names it reads and writes."""
+        top = self.regions[0]
+        functions = self.regions[1:]
+        function_assigned = set().union(*(region.assigned for region in functions))
+        function_globals = set()
+        for region in functions:
+            for name, assigned_before in region.reads:
+                if name in region.assigned:
+                    if not assigned_before:
+                        raise NotTranspilable(f"{name} may be read before it is assigned")
+                    region.kinds[name] = 'local'
+                elif name in function_assigned:
+                    raise NotTranspilable(f"{name} may be read from a caller's scope")
+                else:
+                    function_globals.add(name)
+            for name in region.assigned:
+                region.kinds[name] = 'local'
+
+        unassigned_reads = {name for name, assigned_before in top.reads if not assigned_before}
+        for name in top.assigned:
+            if name in function_globals or name in unassigned_reads:
+                top.kinds[name] = 'global'
+            else:
+                top.kinds[name] = 'local'
+        for region in functions:
+            for name in function_globals:
+                if name in top.assigned and name not in region.assigned:
+                    region.kinds[name] = 'global'
+        for region in self.regions:
+            for name, kind in region.kinds.items():
+                if kind == 'local' and not ('v_' + name).isidentifier():
+                    raise NotTranspilable(f"{name} is not an identifier")
+
+    # --- code generation -------------------------------------------------
+
+    def constant(self, value):
+        """Name of the make() local holding value."""
+        key = id(value) if isinstance(value, (list, dict)) else (type(value), repr(value))
+        index = self.constant_refs.get(key)
+        if index is None:
+            index = self.constant_refs[key] = len(self.constants)
+            self.constants.append(value)
+        return f"k{index}"
+
+    def read(self, region, operand):
+        """Expression for the value operand resolves to in region."""
+        name = operand_name(operand)
+        if name is None:
+            return self.constant(self.literals.resolve_variable(operand))
+        kind = region.kinds.get(name)
+        if kind == 'local':
+            return f"v_{name}"
+        literal = self.constant(self.literals.resolve_variable(name))
+        if kind == 'global':
+            return f"(_g if (_g := g[{self.slots[name]}]) is not unbound else {literal})"
+        return literal
+
+    def store(self, region, name, expression):
+        if region.kinds[name] == 'local':
+            return f"v_{name} = {expression}"
+        return f"g[{self.slots[name]}] = {expression}"
+
+    def fallback(self, region, ip):
+        """Lines running instruction ip through its handler, in a frame holding its local operands."""
+        self.fallbacks.append(ip)
+        lines = ["_s = push().values"]
+        for name in self.read_names(ip):
+            if region.kinds.get(name) == 'local':
+                lines.append(f"store({self.slots[name]}, v_{name})")
+        lines.append(f"f{ip}()")
+        assigned, maybe_assigned = self.written_names(ip)
+        for name in assigned:
+            lines.append(self.store(region, name, f"_s[{self.slots[name]}]"))
+        for name in maybe_assigned:
+            lines.append(f"if (_v := _s[{self.slots[name]}]) is not unbound: {self.store(region, name, '_v')}")
+        lines.append("pop()")
+        return lines
+
+    def guarded(self, region, ip, condition, lines):
+        """lines when condition holds, and the handler for ip otherwise."""
+        return ([f"if {condition}:"] + ["    " + line for line in lines] +
+                ["else:"] + ["    " + line for line in self.fallback(region, ip)])
+
+    def jump(self, region, target, next_block):
+        """Lines continuing at instruction target, from the end of the block before next_block."""
+        if target == len(self.code):
+            return ["break"]
+        block = region.block_ids[target]
+        if block == next_block:
+            return []
+        if block < next_block:
+            return ["if steps >= check_at: checkpoint()", f"pc = {block}", "continue"]
+        return [f"pc = {block}", "continue"]
+
+    def call_lines(self, region, ip, params):
+        op, name, count, result = self.instructions[ip]
+        args = ', '.join(self.read(region, param) for param in params)
+        if name in self.builtins:
+            if name not in self.builtin_names:
+                self.builtin_names.append(name)
+            call = f"b{self.builtin_names.index(name)}(interp, [{args}])"
+        else:
+            call = f"{self.function_regions[self.code.targets[ip]].python_name}({args})"
+        return [self.store(region, result, call) if result else call]
+
+    def instruction_lines(self, region, ip, params, next_block):
+        op, arg1, arg2, result = self.instructions[ip]
+        read = partial(self.read, region)
+        if op == 'PARAM':
+            params.append(arg1)
+            return []
+        if op == 'CALL':
+            lines = self.call_lines(region, ip, params)
+            params.clear()
+            return lines
+        if op == 'GOTO':
+            return self.jump(region, self.code.targets[ip], next_block)
+        if op in BRANCH_OPCODES:
+            taken = 'True' if op == 'IFTRUE' else 'False'
+            jump = self.jump(region, self.code.targets[ip], next_block)
+            if not jump:
+                return []
+            return [f"_c = {read(arg1)}",
+                    "if _c is not True and _c is not False:",
+                    "    _c = evaluate(_c)",
+                    f"if _c is {taken}:"] + ["    " + line for line in jump]
+        if op == 'RETURN':
+            if region.function is None:
+                return ["break"]
+            return ["depth -= 1", f"return {read(arg1)}"]
+        if op == 'ASSIGN':
+            return [self.store(region, result, '[]' if arg1 == ']' else read(arg1))]
+        if op == 'LIST_CREATE':
+            return [self.store(region, result, '[]')]
+        if op == 'GROUP_CREATE':
+            return [self.store(region, result, '{}')]
+        if op not in ARITHMETIC_OPERATORS and op not in COMPARISON_OPERATORS and \
+                op not in ('MOD', 'CONCAT', 'LIST_ACCESS', 'LIST_SET', 'PRINT'):
+            return self.fallback(region, ip)
+        operands = [f"_a = {read(arg1)}", f"_b = {read(arg2)}"]
+        if op in ARITHMETIC_OPERATORS:
+            return operands + self.guarded(
+                region, ip,
+                f"type(_a) is int and type(_b) is int and low <= (_r := _a {ARITHMETIC_OPERATORS[op]} _b) <= high",
+                [self.store(region, result, "_r")])
+        if op == 'MOD':
+            return operands + self.guarded(region, ip, "type(_a) is int and type(_b) is int and _b",
+                                           [self.store(region, result, "_a % _b")])
+        if op in COMPARISON_OPERATORS:
+            return operands + self.guarded(region, ip, "type(_a) is int and type(_b) is int",
+                                           [self.store(region, result, f"_a {COMPARISON_OPERATORS[op]} _b")])
+        if op == 'CONCAT':
+            return operands + self.guarded(
+                region, ip, "type(_a) is str and type(_b) is str and len(_r := _a + _b) <= max_text",
+                [self.store(region, result, "_r")])
+        if op == 'LIST_ACCESS':
+            return operands + self.guarded(region, ip, "type(_a) is list and type(_b) is int and 0 <= _b < len(_a)",
+                                           [self.store(region, result, "_a[_b]")])
+        if op == 'LIST_SET':
+            return operands + [f"_c = {read(result)}"] + self.guarded(
+                region, ip, "type(_a) is list and type(_b) is int and 0 <= _b < len(_a)", ["_a[_b] = _c"])
+        return [f"_a = {read(arg1)}",
+                "if type(_a) is str:",
+                "    write(_a)",
+                "elif type(_a) is int and low <= _a <= high:",
+                "    write(str(_a))",
+                "else:"] + ["    " + line for line in self.fallback(region, ip)]
+
+    def block_lines(self, region, start, end):
+        lines = [f"steps += {end - start + 1}"]
+        next_block = region.block_ids[start] + 1
+        params = []
+        for ip in range(start, end + 1):
+            lines.extend(f"{line}  # {ip}" for line in self.instruction_lines(region, ip, params, next_block))
+            self.block_ends[ip] = end
+        op = self.instructions[end][0]
+        if op not in ('GOTO', 'RETURN') and end + 1 == len(self.code):
+            lines.append("break")
+        return lines
+
+    def guard_tree(self, region, blocks):
+        """Lines running blocks (consecutive (id, start, end)) from the one pc names."""
+        lines = []
+        if len(blocks) <= GUARD_FAN_OUT:
+            for block, start, end in blocks:
+                lines.append(f"if pc <= {block}:")
+                lines.extend("    " + line for line in self.block_lines(region, start, end))
+            return lines
+        size = -(-len(blocks) // GUARD_FAN_OUT)
+        for index in range(0, len(blocks), size):
+            group = blocks[index:index + size]
+            lines.append(f"if pc <= {group[-1][0]}:")
+            lines.extend("    " + line for line in self.guard_tree(region, group))
+        return lines
+
+    def function_source(self, region):
+        if not region.blocks:
+            return ["    def main():", "        pass"]
+        params = ', '.join(f"v_{param}" for param in region.params)
+        lines = [f"def {region.python_name}({params}):"]
+        if region.function is None:
+            lines.append("    nonlocal steps")
+        else:
+            lines.extend(["    nonlocal steps, depth",
+                          "    depth += 1",
+                          "    if steps >= check_at: checkpoint()"])
+        lines.extend([f"    pc = {region.block_ids[region.entry]}",
+                      "    while True:"])
+        blocks = [(block, start, end) for block, (start, end) in enumerate(region.blocks)]
+        lines.extend("        " + line for line in self.guard_tree(region, blocks))
+        return ["    " + line for line in lines]
+
+
+class TranspiledProgram:
+    """A TAC program compiled to Python by TACTranspiler, run with run()."""
+
+    def __init__(self, program, source, constants, fallbacks, builtin_names, block_ends):
+        self.program = program
+        self.source = source
+        self.constants = constants
+        self.fallbacks = fallbacks
+        self.builtin_names = builtin_names
+        self.block_ends = block_ends    # ip -> last instruction of its block
+        # Line number in the source -> instruction the line runs
+        self.line_ips = {number: int(line.rpartition('  # ')[2])
+                         for number, line in enumerate(source.splitlines(), 1) if '  # ' in line}
+        namespace = {'UNBOUND': UNBOUND}
+        exec(compile(source, '<transpiled TAC>', 'exec'), namespace)
+        self.make = namespace['make']
+
+    def run(self, interpreter):
+        """
+        Run the program for interpreter, which has it loaded, and return the
+        output as interpreter.run() would, under interpreter.budget.
+        """
+        interpreter.output_buffer = StringIO()
+        interpreter.waiting_for_input = False
+        interpreter.steps_executed = 0
+        interpreter.output_written = 0
+        interpreter.termination = None
+        code = interpreter.code
+        interpreter.call_stack = CallStack(code)
+        interpreter.steps = None  # Compiled for the call stack replaced above
+        fallbacks = {ip: partial(interpreter.handlers[code.opcodes[ip]], *code.instruction(ip)[1:], code.targets[ip])
+                     for ip in self.fallbacks}
+        builtins = [interpreter.builtins[name] for name in self.builtin_names]
+        main, executed = self.make(interpreter, interpreter.call_stack, self.constants, fallbacks, builtins)
+        interpreter.budget.start()
+        try:
+            main()
+        except BudgetExceeded as exceeded:
+            interpreter.steps_executed = executed()
+            interpreter.terminate(exceeded)
+            return interpreter.output_buffer.getvalue()
+        except RecursionError:
+            pass  # Deeper than Python's stack allows; the interpreter keeps its own
+        except Exception as error:
+            ips = self.active_instructions(error.__traceback__)
+            if ips:
+                self.report_error(interpreter, ips, executed(), error)
+                return interpreter.output_buffer.getvalue()
+        else:
+            interpreter.steps_executed = executed()
+            interpreter.ip = len(code)
+            return interpreter.output_buffer.getvalue()
+        steps_spent = executed()
+        interpreter.load(self.program)
+        return interpreter.run(steps_spent)
+
+    def active_instructions(self, tb):
+        """The instruction each generated frame in traceback tb was running, outermost first."""
+        ips = []
+        while tb is not None:
+            if tb.tb_frame.f_code.co_filename == '<transpiled TAC>' and tb.tb_lineno in self.line_ips:
+                ips.append(self.line_ips[tb.tb_lineno])
+            tb = tb.tb_next
+        return ips
+
+    def report_error(self, interpreter, ips, steps, error):
+        """
+        Report error, raised running instructions ips (as from
+        active_instructions) after steps steps, as the interpreter does.
+        """
+        # Each block counts its steps on entry: take back those of the
+        # instructions not run, the failing one included
+        for ip in ips:
+            steps -= self.block_ends[ip] - ip
+        interpreter.steps_executed = steps - 1
+        op, arg1, arg2, result = interpreter.code.instruction(ips[-1])
+        if op == 'CALL' and arg1 in interpreter.builtins:
+            error = ValueError(f"Error in built-in function {arg1}: {str(error)}")
+        interpreter.report_error(ips[-1], error)
@@ -117,4 +117,46 @@ valid_delimiters_symbol_dict = {
             + list('abcdefghijklmnopqrstuvwxyz0123456789'),
     ';':  [' ', '\n', '\t', '#', '}','{']
             + list('abcdefghijklmnopqrstuvwxyz'),
-}
\ No newline at end of file
+}
+#------------------------------------------------------------------------------
+# Compiled delimiter tables (built once at import time)
+#------------------------------------------------------------------------------
+
+# token class -> frozenset of single characters allowed after the token.
+# Token classes are 'IDENTIFIER', 'NUMERIC', the keyword token types
+# ('var', 'STATELITERAL', ...) and the symbols ('+', '==', ...).
+DELIMITERS = {}
+
+# token class -> frozenset of two-character sequences allowed after the
+# token, only for the few classes that list any
+TWO_CHAR_DELIMITERS = {}
+
+NO_DELIMITERS = frozenset()
+
+def compile_delimiters(token_class, delimiters):
+    """
+    Register the delimiter list of a token class in the compiled tables.
+    Returns the frozenset of single-character delimiters.
+    """
+    DELIMITERS[token_class] = frozenset(delim for delim in delimiters if len(delim) == 1)
+    two_char = frozenset(delim for delim in delimiters if len(delim) == 2)
+    if two_char:
+        TWO_CHAR_DELIMITERS[token_class] = two_char
+    return DELIMITERS[token_class]
+
+def is_valid_delimiter(token_class, current_char, next_char=None):
+    """
+    Whether current_char (followed by next_char) may follow a token of the
+    given class.
+    """
+    if current_char in DELIMITERS.get(token_class, NO_DELIMITERS):
+        return True
+    two_char = TWO_CHAR_DELIMITERS.get(token_class)
+    return two_char is not None and next_char is not None and current_char + next_char in two_char
+
+compile_delimiters('IDENTIFIER', valid_delimiters_identifier)
+compile_delimiters('NUMERIC', valid_delimiters_numeric)
+for _token_class, _delimiters in valid_delimiters_keywords_dict.items():
+    compile_delimiters(_token_class, _delimiters)
+for _token_class, _delimiters in valid_delimiters_symbol_dict.items():
+    compile_delimiters(_token_class, _delimiters)
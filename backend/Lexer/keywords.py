@@ -0,0 +1,61 @@
+# keywords.py
+#
+# One keyword/builtin table, built once at import time from the grammar's
+# keyword terminals and the interpreter's built-in functions. Lookups are
+# single dict/frozenset probes, so their cost does not grow with the number
+# of keywords.
+
+import os
+import re
+
+from .delims import DELIMITERS, compile_delimiters
+from ..CodegenTAC.built_in_functions import MinimaBultins
+
+GRAMMAR_PATH = os.path.join(os.path.dirname(__file__), "..", "Syntax", "grammar.lark")
+
+# Delimiters for a reserved word missing from valid_delimiters_keywords_dict,
+# the same as those of the built-in functions
+DEFAULT_KEYWORD_DELIMITERS = (' ', '(', '#', '\n', '\t')
+
+def load_grammar_keywords(grammar_path=GRAMMAR_PATH):
+    """
+    Read the keyword terminals (NAME: "word") and the state literals
+    (STATELITERAL: "YES" | "NO") from the grammar.
+    Returns ({word: terminal}, [state literals]).
+    """
+    with open(grammar_path, encoding="utf-8") as grammar_file:
+        grammar = grammar_file.read()
+    keyword_terminals = dict(
+        (word, terminal)
+        for terminal, word in re.findall(r'^([A-Z_]+):\s*"([a-z]+)"\s*$', grammar, re.MULTILINE)
+    )
+    state_line = re.search(r'^STATELITERAL:(.*)$', grammar, re.MULTILINE)
+    state_literals = re.findall(r'"([A-Za-z]+)"', state_line.group(1)) if state_line else []
+    return keyword_terminals, state_literals
+
+KEYWORD_TERMINALS, _state_literals = load_grammar_keywords()
+
+# Built-in functions are reserved words even if the grammar lacks a terminal
+for _name in MinimaBultins.BUILTIN_FUNCTIONS:
+    KEYWORD_TERMINALS.setdefault(_name, _name.upper())
+
+BUILTIN_FUNCTIONS = frozenset(MinimaBultins.BUILTIN_FUNCTIONS)
+RESERVED_WORDS = frozenset(KEYWORD_TERMINALS)
+KEYWORDS = RESERVED_WORDS - BUILTIN_FUNCTIONS
+STATE_LITERALS = frozenset(_state_literals)
+
+# Grammar terminal -> built-in function name (e.g. 'ABS' -> 'abs')
+BUILTIN_TERMINALS = {KEYWORD_TERMINALS[name]: name for name in BUILTIN_FUNCTIONS}
+
+# Word -> lexer token type. Keywords and built-ins use the word itself,
+# YES/NO become STATELITERAL.
+KEYWORD_TYPES = {word: word for word in RESERVED_WORDS}
+KEYWORD_TYPES.update((literal, 'STATELITERAL') for literal in STATE_LITERALS)
+
+# Reserved words without delimiters of their own get the built-in ones
+for _token_type in set(KEYWORD_TYPES.values()):
+    if _token_type not in DELIMITERS:
+        compile_delimiters(_token_type, DEFAULT_KEYWORD_DELIMITERS)
+
+# Lexer token type -> characters allowed right after it
+KEYWORD_DELIMITERS = {token_type: DELIMITERS[token_type] for token_type in set(KEYWORD_TYPES.values())}
@@ -1,4 +1,7 @@
-from .tokens import Token as T
+import re
+from bisect import bisect_left, bisect_right
+
+from .tokens import Token as T, TokenBuffer, WhitespaceToken
 from .errors import (
     InvalidIdentifierError,
     LexerError,
@@ -10,9 +13,48 @@ from .errors import (
 from .states import LexerState
 from .delims import *
 from .constants import ATOMS
+from .keywords import KEYWORD_TYPES, KEYWORD_DELIMITERS
+
+#------------------------------------------------------------------------------
+# Tables for the fast (table-driven) scanner
+#------------------------------------------------------------------------------
+
+# Character classes for the first character of a token
+CHAR_SLOW = 0        # anything the fast scanner hands to the FSM
+CHAR_BLANK = 1       # ' ' and '\t'
+CHAR_NEWLINE = 2
+CHAR_COMMENT = 3
+CHAR_LETTER = 4
+CHAR_DIGIT = 5
+CHAR_QUOTE = 6
+CHAR_DASH = 7
+CHAR_SYMBOL = 8
+
+CHAR_CLASS = {' ': CHAR_BLANK, '\t': CHAR_BLANK, '\n': CHAR_NEWLINE, '#': CHAR_COMMENT,
+              '"': CHAR_QUOTE, '-': CHAR_DASH}
+CHAR_CLASS.update(dict.fromkeys(ATOMS['alphabet'], CHAR_LETTER))
+CHAR_CLASS.update(dict.fromkeys(ATOMS['digit'], CHAR_DIGIT))
+CHAR_CLASS.update(dict.fromkeys('+*/%=!><&|{}()[]:,;', CHAR_SYMBOL))
+
+# Two-character operators that do not start with '-' (those are handled with
+# negative number detection)
+TWO_CHAR_SYMBOLS = frozenset({'++', '+=', '*=', '/=', '==', '!=', '>=', '<=', '&&', '||'})
+
+# Compiled single-character delimiter sets; the fast scanner only uses them to
+# confirm the common valid case and defers anything else to the finish_* routines
+IDENTIFIER_DELIMITERS = DELIMITERS['IDENTIFIER']
+NUMERIC_DELIMITERS = DELIMITERS['NUMERIC']
+SYMBOL_DELIMITERS = DELIMITERS
+
+IDENTIFIER_RE = re.compile(r'[A-Za-z][A-Za-z0-9_]*')
+NUMBER_RE = re.compile(r'([0-9]+)(?:\.([0-9]+))?')
+# Strings stop at the closing quote or an unescaped newline. An escaped newline
+# or a trailing backslash is left to the FSM, which tracks the line change.
+STRING_RE = re.compile(r'"(?:[^"\\\n]|\\.)*')
+WHITESPACE_RUN_RE = re.compile(r'[ \t\n]+')
 
 class Lexer:
-    def __init__(self, input_code):
+    def __init__(self, input_code, fast=True, coalesce_whitespace=False):
         # Normalize newlines
         self.code = input_code.replace('\r\n', '\n').replace('\r', '\n')
         self.position = 0
@@ -26,6 +68,9 @@ class Lexer:
         self.errors = []           # Collect errors here
         self.token_buffer = []
 
+        # Last token handed out; negative number detection looks back at it
+        self.previous_token = None
+
         # Map each distinct identifier name to a unique label
         self.identifier_map = {}
         
@@ -40,6 +85,16 @@ class Lexer:
 
         self.current_char = self.code[self.position] if self.code else None
 
+        # Use the table-driven scanner; the FSM remains the reference engine
+        # and handles every case the fast scanner does not
+        self.fast = fast
+        self.scanner = None
+
+        # Fold runs of spaces, tabs and newlines into one WhitespaceToken
+        # instead of one WHITESPACE token per character
+        self.coalesce_whitespace = coalesce_whitespace
+        self.length = len(self.code)
+
     #--------------------------------------------------------------------------
     # Low-level helpers
     #--------------------------------------------------------------------------
@@ -86,185 +141,237 @@ class Lexer:
     # Keyword checking
     #--------------------------------------------------------------------------
     def keyword_check(self, value: str):
-        
-        # ----- Starts with 'a' -----
-        if value[0] == 'a':
-            # Could be "abs"
-            if len(value) == 3 and value[1] == 'b' and value[2] == 's':
-                return 'abs'
-
-        # ----- Check if it starts with 'c' -----
-        if value[0] == 'c':
-            if len(value) == 4 and value[1] == 'a' and value[2] == 's' and value[3] == 'e':
-                return 'case'
-            elif len(value) == 7 and value[1] == 'h' and value[2] == 'e' and value[3] == 'c' and value[4] == 'k' and value[5] == 'i' and value[6] == 'f':
-                return 'checkif'
-            elif len(value) == 8 and value[1] == 'o' and value[2] == 'n' and value[3] == 't' and value[4] == 'a' and value[5] == 'i' and value[6] == 'n' and value[7] == 's':
-                return 'contains'
-            elif len(value) == 4 and value[1] == 'e' and value[2] == 'i' and value[3] == 'l':
-                return 'ceil'
-
-        # ----- Starts with 'd' -----
-        if value[0] == 'd':
-            # Could be "default" or "do"
-            if len(value) == 7 and value[1] == 'e' and value[2] == 'f' and value[3] == 'a' and value[4] == 'u' and value[5] == 'l' and value[6] == 't':
-                return 'default'
-            elif len(value) == 2 and value[1] == 'o':
-                return 'do'
-
-        # ----- Starts with 'e' -----
-        if value[0] == 'e':
-            # Could be "each", "empty", or "exit"
-            if len(value) == 4 and value[1] == 'a' and value[2] == 'c' and value[3] == 'h':
-                return 'each'
-            elif len(value) == 5 and value[1] == 'm' and value[2] == 'p' and value[3] == 't' and value[4] == 'y':
-                return 'empty'
-            elif len(value) == 4 and value[1] == 'x' and value[2] == 'i' and value[3] == 't':
-                return 'exit'
-
-        # ----- Starts with 'f' -----
-        if value[0] == 'f':
-            # Could be "fixed", "func", "factorial", "floor"
-            if len(value) == 5 and value[1] == 'i' and value[2] == 'x' and value[3] == 'e' and value[4] == 'd':
-                return 'fixed'
-            elif len(value) == 4 and value[1] == 'u' and value[2] == 'n' and value[3] == 'c':
-                return 'func'
-            elif len(value) == 9 and value[1] == 'a' and value[2] == 'c' and value[3] == 't' and value[4] == 'o' and value[5] == 'r' and value[6] == 'i' and value[7] == 'a' and value[8] == 'l':
-                return 'factorial'
-            elif len(value) == 5 and value[1] == 'l' and value[2] == 'o' and value[3] == 'o' and value[4] == 'r':
-                return 'floor'
-
-        # ----- Starts with 'g' -----
-        if value[0] == 'g':
-            # Could be "get", "group"
-            if len(value) == 3 and value[1] == 'e' and value[2] == 't':
-                return 'get'
-            elif len(value) == 5 and value[1] == 'r' and value[2] == 'o' and value[3] == 'u' and value[4] == 'p':
-                return 'group'
-
-        # ----- Starts with 'i' -----
-        if value[0] == 'i':
-            # Could be "integer", "indexOf", "isqrt"
-            if len(value) == 7 and value[1] == 'n' and value[2] == 't' and value[3] == 'e' and value[4] == 'g' and value[5] == 'e' and value[6] == 'r':
-                return 'integer'
-            elif len(value) == 5 and value[1] == 's' and value[2] == 'q' and value[3] == 'r' and value[4] == 't':
-                return 'isqrt'
-
-        # ----- Starts with 'j' -----
-        if value[0] == 'j':
-            if len(value) == 4 and value[1] == 'o' and value[2] == 'i' and value[3] == 'n':
-                return 'join'
-
-        # ----- Starts with 'l' -----
-        if value[0] == 'l':
-            if len(value) == 6 and value[1] == 'e' and value[2] == 'n' and value[3] == 'g' and value[4] == 't' and value[5] == 'h':
-                return 'length'
-            elif len(value) == 9 and value[1] == 'o' and value[2] == 'w' and value[3] == 'e' and value[4] == 'r' and value[5] == 'c' and value[6] == 'a' and value[7] == 's' and value[8] == 'e':
-                return 'lowercase'
-
-        # ----- Starts with 'm' -----
-        if value[0] == 'm':
-            if len(value) == 3 and value[1] == 'a' and value[2] == 'x':
-                return 'max'
-            elif len(value) == 3 and value[1] == 'i' and value[2] == 'n':
-                return 'min'
-            elif len(value) == 5 and value[1] == 'a' and value[2] == 't' and value[3] == 'c' and value[4] == 'h':
-                return 'match'
-
-        # ----- Starts with 'n' -----
-        if value[0] == 'n':
-            # Could be "next"
-            if len(value) == 4 and value[1] == 'e' and value[2] == 'x' and value[3] == 't':
-                return 'next'
-
-        # ----- Starts with 'o' -----
-        if value[0] == 'o':
-            # Could be "otherwise"
-            if len(value) == 9 and value[1] == 't' and value[2] == 'h' and value[3] == 'e' and value[4] == 'r' and value[5] == 'w' and value[6] == 'i' and value[7] == 's' and value[8] == 'e':
-                return 'otherwise'
-
-        # ----- Starts with 'p' -----
-        if value[0] == 'p':
-            # Could be "point", "pow"
-            if len(value) == 5 and value[1] == 'o' and value[2] == 'i' and value[3] == 'n' and value[4] == 't':
-                return 'point'
-            elif len(value) == 3 and value[1] == 'o' and value[2] == 'w':
-                return 'pow'
-
-        # ----- Starts with 'r' -----
-        if value[0] == 'r':
-            # Could be "recheck", "repeat", "reverse", "round"
-            if len(value) == 7 and value[1] == 'e' and value[2] == 'c' and value[3] == 'h' and value[4] == 'e' and value[5] == 'c' and value[6] == 'k':
-                return 'recheck'
-            elif len(value) == 6 and value[1] == 'e' and value[2] == 'p' and value[3] == 'e' and value[4] == 'a' and value[5] == 't':
-                return 'repeat'
-            elif len(value) == 7 and value[1] == 'e' and value[2] == 'v' and value[3] == 'e' and value[4] == 'r' and value[5] == 's' and value[6] == 'e':
-                return 'reverse'
-            elif len(value) == 5 and value[1] == 'o' and value[2] == 'u' and value[3] == 'n' and value[4] == 'd':
-                return 'round'
-
-        # ----- Starts with 's' -----
-        if value[0] == 's':
-            # Could be "show", "state", "sorted", "sum", "slice"
-            if len(value) == 4 and value[1] == 'h' and value[2] == 'o' and value[3] == 'w':
-                return 'show'
-            elif len(value) == 5 and value[1] == 't' and value[2] == 'a' and value[3] == 't' and value[4] == 'e':
-                return 'state'
-            elif len(value) == 6 and value[1] == 'o' and value[2] == 'r' and value[3] == 't' and value[4] == 'e' and value[5] == 'd':
-                return 'sorted'
-            elif len(value) == 3 and value[1] == 'u' and value[2] == 'm':
-                return 'sum'
-            elif len(value) == 5 and value[1] == 'l' and value[2] == 'i' and value[3] == 'c' and value[4] == 'e':
-                return 'slice'
-
-        # ----- Starts with 't' -----
-        if value[0] == 't':
-            # Could be "text", "throw", "type"
-            if len(value) == 4 and value[1] == 'e' and value[2] == 'x' and value[3] == 't':
-                return 'text'
-            elif len(value) == 5 and value[1] == 'h' and value[2] == 'r' and value[3] == 'o' and value[4] == 'w':
-                return 'throw'
-            elif len(value) == 4 and value[1] == 'y' and value[2] == 'p' and value[3] == 'e':
-                return 'type'
-        
-           # ----- Starts with 'u' -----
-        if value[0] == 'u':
-            # Could be "unique" or "uppercase"
-            if len(value) == 6 and value[1] == 'n' and value[2] == 'i' and value[3] == 'q' and value[4] == 'u' and value[5] == 'e':
-                return 'unique'
-            elif len(value) == 9 and value[1] == 'p' and value[2] == 'p' and value[3] == 'e' and value[4] == 'r' and value[5] == 'c' and value[6] == 'a' and value[7] == 's' and value[8] == 'e':
-                return 'uppercase'
-            
-        # ----- Starts with 'v' -----
-        if value[0] == 'v':
-            #could be "var"
-            if len(value) == 3 and value[1] == 'a' and value[2] == 'r':
-                return 'var'
-            
-        # ----- Starts with 'Y' -----
-        if value[0] == 'Y':
-            # Could be "YES"
-            if len(value) == 3 and value[1] == 'E' and value[2] == 'S':
-                return 'STATELITERAL'
-
-        # ----- Starts with 'N' -----
-        if value[0] == 'N':
-            # Could be "NO"
-            if len(value) == 2 and value[1] == 'O':
-                return 'STATELITERAL'
-
-        # If nothing matched, it's not a recognized keyword
-        return None
+        """
+        Returns the token type of a reserved word ('var', 'abs', ...,
+        'STATELITERAL' for YES/NO), or None for anything else.
+        """
+        return KEYWORD_TYPES.get(value)
 
     #--------------------------------------------------------------------------
     # Main public method: get_next_token (or the main loop)
     #--------------------------------------------------------------------------
     def get_next_token(self):
+        """
+        Return the next token, or None at the end of the input.
+        """
+        if self.fast:
+            if self.scanner is None:
+                self.scanner = self.scan_fast()
+            return next(self.scanner, None)
+        token = self.next_token_fsm()
+        if token is not None:
+            self.previous_token = token
+        return token
+
+    def scan_fast(self):
+        """
+        Table-driven scanner, yielding tokens from the current position.
+
+        Common tokens are matched with precomputed character classes and
+        compiled patterns and sliced out of the source. Rare or irregular
+        input (non-ASCII characters, negative numbers, stray '.', escaped
+        newlines, invalid delimiters, ...) is handed to the FSM routines at
+        the same point, so both engines produce the same tokens and errors.
+
+        position/line/column/current_char are kept in locals and only written
+        back when the FSM takes over and at the end of the input.
+        """
+        code = self.code
+        length = self.length
+        # Module-level tables bound to locals for the scanning loop
+        char_classes = CHAR_CLASS
+        make_token = T
+        keyword_types = KEYWORD_TYPES
+        keyword_delimiters = KEYWORD_DELIMITERS
+        symbol_delimiters = SYMBOL_DELIMITERS
+        identifier_delimiters = IDENTIFIER_DELIMITERS
+        numeric_delimiters = NUMERIC_DELIMITERS
+        two_char_symbols = TWO_CHAR_SYMBOLS
+        match_identifier = IDENTIFIER_RE.match
+        match_number = NUMBER_RE.match
+        identifier_map = self.identifier_map
+        coalesce = self.coalesce_whitespace
+        pos = self.position
+        line = self.line
+        column = self.column
+
+        while pos < length:
+            char = code[pos]
+            char_class = char_classes.get(char, CHAR_SLOW)
+
+            if coalesce and (char_class == CHAR_BLANK or char_class == CHAR_NEWLINE):
+                end = WHITESPACE_RUN_RE.match(code, pos).end()
+                run = code[pos:end]
+                newlines = run.count('\n')
+                if newlines:
+                    end_line = line + newlines
+                    end_column = len(run) - run.rfind('\n')
+                else:
+                    end_line = line
+                    end_column = column + len(run)
+                self.previous_token = token = WhitespaceToken(
+                    run.replace('\n', "\\n"), line, column, end_line, end_column, newlines)
+                yield token
+                pos = end
+                line = end_line
+                column = end_column
+                continue
+
+            if char_class == CHAR_BLANK:
+                self.previous_token = token = make_token('WHITESPACE', char, line, column)
+                yield token
+                pos += 1
+                column += 1
+                continue
+
+            if char_class == CHAR_NEWLINE:
+                self.previous_token = token = make_token('WHITESPACE', "\\n", line, column)
+                yield token
+                pos += 1
+                line += 1
+                column = 1
+                continue
+
+            # Either a token is produced here, or `finish` is set to the FSM
+            # routine (and its arguments) that completes the token at `end`
+            token = None
+            finish = None
+            end = pos
+
+            if char_class == CHAR_LETTER:
+                end = match_identifier(code, pos).end()
+                next_char = code[end] if end < length else None
+                value = code[pos:end]
+                keyword_type = keyword_types.get(value)
+                if next_char is not None and next_char >= '\x80':
+                    end = pos
+                elif keyword_type is not None:
+                    if next_char is None or next_char in keyword_delimiters[keyword_type]:
+                        token = make_token(keyword_type, value, line, column)
+                elif ('a' <= char <= 'z' and len(value) <= 20 and
+                        (next_char is None or next_char in identifier_delimiters)):
+                    label = identifier_map.get(value) or self.get_identifier_label(value)
+                    token = make_token(label, value, line, column)
+                if token is None and end != pos:
+                    finish = (self.finish_identifier, value)
+
+            elif char_class == CHAR_SYMBOL:
+                symbol = code[pos:pos + 2]
+                if symbol not in two_char_symbols:
+                    symbol = char
+                # A lone '&' or '|' is an invalid symbol, left to the FSM
+                if symbol != '&' and symbol != '|':
+                    end = pos + len(symbol)
+                    next_char = code[end] if end < length else None
+                    if next_char is None or next_char in symbol_delimiters[symbol]:
+                        token = make_token(symbol, symbol, line, column)
+                    else:
+                        finish = (self.finish_symbol, symbol)
+
+            elif char_class == CHAR_DIGIT:
+                match = match_number(code, pos)
+                int_part, fractional_digits = match.groups()
+                end = match.end()
+                next_char = code[end] if end < length else None
+                if next_char is not None and (next_char >= '\x80' or
+                                              (next_char == '.' and fractional_digits is None)):
+                    end = pos
+                elif fractional_digits is not None:
+                    finish = (self.finish_point, int_part, fractional_digits)
+                elif len(int_part) <= 9 and (next_char is None or next_char in numeric_delimiters):
+                    token = make_token('INTEGERLITERAL', int_part.lstrip('0') or '0', line, column)
+                else:
+                    finish = (self.finish_int, int_part)
+
+            elif char_class == CHAR_COMMENT:
+                end = code.find('\n', pos)
+                if end == -1:
+                    end = length
+                token = make_token('COMMENT', code[pos:end], line, column)
+
+            elif char_class == CHAR_QUOTE:
+                end = STRING_RE.match(code, pos).end()
+                next_char = code[end] if end < length else None
+                if next_char == '"':
+                    end += 1
+                    token = make_token('TEXTLITERAL', code[pos:end], line, column)
+                elif next_char == '\\':
+                    end = pos
+                else:
+                    # Unterminated string (newline or end of input)
+                    value = code[pos:end]
+                    warning_msg = f"Unterminated string literal: {value}"
+                    warning = LexerWarning(warning_msg, line, column, 'Invalid String Literal')
+                    self.errors.append(warning)
+                    token = make_token('INVALID', value, line, column, warning=warning_msg)
+
+            elif char_class == CHAR_DASH:
+                peek = code[pos + 1] if pos + 1 < length else None
+                if peek == '-' or peek == '=':
+                    end = pos + 2
+                    token = make_token('-' + peek, '-' + peek, line, column)
+                else:
+                    previous_token = self.previous_token
+                    prev_token_type = previous_token.type if previous_token is not None else ""
+                    if (prev_token_type.startswith('IDENTIFIER_') or
+                        prev_token_type in ('INTEGERLITERAL', 'POINTLITERAL', 'NEGINTEGERLITERAL', 'NEGPOINTLITERAL') or
+                        prev_token_type in (')', ']', '}') or
+                            (peek is not None and peek < '\x80' and not peek.isdigit())):
+                        end = pos + 1
+                        token = make_token('-', '-', line, column)
+                    # Negative numbers, a trailing '-' and non-ASCII lookahead
+                    # are left to the FSM
+
+            if token is not None:
+                self.previous_token = token
+                yield token
+                column += end - pos
+                pos = end
+                continue
+
+            # Hand over to the FSM, either at the token start or, with
+            # `finish`, just after the scanned lexeme
+            self.position = end
+            self.line = line
+            self.column = column + end - pos
+            self.current_char = code[end] if end < length else None
+            if finish is None:
+                token = self.next_token_fsm()
+            else:
+                token = finish[0](*finish[1:], line, column)
+            pos = self.position
+            line = self.line
+            column = self.column
+            if token is not None:
+                self.previous_token = token
+                yield token
+
+        self.position = pos
+        self.line = line
+        self.column = column
+        self.current_char = None
+
+    def next_token_fsm(self):
         """
         MAIN LOOP: 
         🟢 GOES BACK TO INITIAL STATE AFTER EACH TOKEN
+
+        Skipped input (stray whitespace characters, invalid delimiters, ...)
+        makes read_token_fsm() return None; reading then restarts from the
+        current position in this loop instead of recursing, so long runs of
+        skipped characters cannot hit the recursion limit.
+        """
+        while self.current_char is not None:
+            token = self.read_token_fsm()
+            if token is not None:
+                return token
+        return None  # No more tokens
+
+    def read_token_fsm(self):
+        """
+        Read one token from the current position. Returns None when input
+        was skipped without producing a token.
         """
-        
         start_line = self.line
         start_column = self.column
 
@@ -292,7 +399,7 @@ class Lexer:
                         return T('-=', '-=', start_line, start_column)
                     
                     # Check context to determine if this is a negative number or minus operator
-                    prev_token_type = self.token_buffer[-1].type if len(self.token_buffer) > 0 else ""
+                    prev_token_type = self.previous_token.type if self.previous_token is not None else ""
                     
                     # After an identifier, number, or closing bracket/brace/parenthesis, it's a minus operator
                     if (prev_token_type.startswith('IDENTIFIER_') or 
@@ -322,8 +429,9 @@ class Lexer:
                     elif self.current_char == '\t':
                         self.current_state = LexerState.READING_SPACE
                     else:
+                        # Other whitespace characters are skipped
                         self.advance()
-                        return self.get_next_token()
+                        return None
                 elif self.current_char == '#':
                     self.current_state = LexerState.READING_COMMENT
                 elif self.current_char.isalpha():
@@ -383,17 +491,34 @@ class Lexer:
     #--------------------------------------------------------------------------
 
     def handle_state_reading_space(self, start_line, start_column):
+        if self.coalesce_whitespace:
+            return self.handle_state_reading_whitespace_run(start_line, start_column)
         single_char = self.current_char
         self.advance()
         self.current_state = LexerState.INITIAL
         return T('WHITESPACE', single_char, start_line, start_column)
 
     def handle_state_reading_newline(self, start_line, start_column):
+        if self.coalesce_whitespace:
+            return self.handle_state_reading_whitespace_run(start_line, start_column)
         value = "\\n"
         self.advance()  # consume '\n'
         self.current_state = LexerState.INITIAL
         return T('WHITESPACE', value, start_line, start_column)
 
+    def handle_state_reading_whitespace_run(self, start_line, start_column):
+        value = ""
+        newlines = 0
+        while self.current_char is not None and self.current_char in ' \t\n':
+            if self.current_char == '\n':
+                value += "\\n"
+                newlines += 1
+            else:
+                value += self.current_char
+            self.advance()
+        self.current_state = LexerState.INITIAL
+        return WhitespaceToken(value, start_line, start_column, self.line, self.column, newlines)
+
     def handle_state_reading_comment(self, start_line, start_column):
         comment_value = ""
         #self.advance()  # skip '#'
@@ -431,22 +556,24 @@ class Lexer:
             else:
                 break
 
+        return self.finish_identifier(value, start_line, start_column)
+
+    def finish_identifier(self, value, start_line, start_column):
+        """
+        Classify a scanned identifier lexeme (state literal, keyword or
+        identifier) and validate the delimiter at current_char.
+        """
         # Special check for YES and NO literals before keyword check
         if value == "YES" or value == "NO":
             if self.current_char is not None:
-                valid_delims = valid_delimiters_keywords_dict.get('STATELITERAL', [])
-                two_char = self.current_char
-                if self.peek_next_char():
-                    two_char += self.peek_next_char()
-                
                 # Delimiter check after state literal
-                if self.current_char not in valid_delims and two_char not in valid_delims:
+                if not is_valid_delimiter('STATELITERAL', self.current_char, self.peek_next_char()):
                     msg = f"Invalid delimiter after state literal '{value}': '{self.current_char}'"
                     warning = InvalidSymbolError(self.current_char, self.line, self.column)
                     warning.message = msg
                     self.errors.append(warning)
                     self.current_state = LexerState.INITIAL
-                    return self.get_next_token()
+                    return None
             
             self.current_state = LexerState.INITIAL
             return T('STATELITERAL', value, start_line, start_column)
@@ -459,19 +586,14 @@ class Lexer:
         if token_type: #check if token_type has a value
             # -- It's a keyword -- 
             if self.current_char is not None:
-                valid_delims = valid_delimiters_keywords_dict.get(token_type, [])
-                two_char = self.current_char
-                if self.peek_next_char():
-                    two_char += self.peek_next_char()
-                
                 # Delimiter check after a keyword
-                if self.current_char not in valid_delims and two_char not in valid_delims:
+                if not is_valid_delimiter(token_type, self.current_char, self.peek_next_char()):
                     msg = f"Invalid delimiter after keyword '{value}': '{self.current_char}'"
                     warning = InvalidSymbolError(self.current_char, self.line, self.column)
                     warning.message = msg
                     self.errors.append(warning)
                     self.current_state = LexerState.INITIAL
-                    return self.get_next_token()
+                    return None
 
             self.current_state = LexerState.INITIAL
             return T(token_type, value, start_line, start_column)
@@ -497,19 +619,14 @@ class Lexer:
 
             # Check delimiter for a valid identifier
             if self.current_char is not None:
-                two_char = self.current_char
-                if self.peek_next_char():
-                    two_char += self.peek_next_char()
-                
-                if (self.current_char not in valid_delimiters_identifier and
-                    two_char not in valid_delimiters_identifier):
+                if not is_valid_delimiter('IDENTIFIER', self.current_char, self.peek_next_char()):
                     warning_msg = f"Invalid delimiter after identifier '{value}': '{self.current_char}'"
                     warning = InvalidSymbolError(self.current_char, self.line, self.column)
                     warning.message = warning_msg
                     self.errors.append(warning)
                     self.advance()
                     self.current_state = LexerState.INITIAL
-                    return self.get_next_token()
+                    return None
 
             # We have a valid identifier and a valid delimiter.
             identifier_label = self.get_identifier_label(value)
@@ -524,6 +641,12 @@ class Lexer:
             value += self.current_char
             self.advance()
 
+        return self.finish_int(value, start_line, start_column)
+
+    def finish_int(self, value, start_line, start_column):
+        """
+        Validate a scanned integer lexeme and the delimiter at current_char.
+        """
         lexeme = value.lstrip('0') or '0'
         if len(lexeme) > 9:
             warning_msg = f"Integer literal '{value}' exceeds max of 9 digits."
@@ -534,11 +657,7 @@ class Lexer:
 
         # Check delimiter
         if self.current_char is not None:
-            two_char = self.current_char
-            if self.peek_next_char():
-                two_char += self.peek_next_char()
-            if (self.current_char not in valid_delimiters_numeric and
-                two_char not in valid_delimiters_numeric):
+            if not is_valid_delimiter('NUMERIC', self.current_char, self.peek_next_char()):
                 warning_msg = f"Invalid delimiter after integer '{lexeme}': '{self.current_char}'"
                 warning = InvalidSymbolError(self.current_char, self.line, self.column)
                 warning.message = warning_msg
@@ -566,7 +685,13 @@ class Lexer:
         while self.current_char is not None and self.current_char.isdigit():
             fractional_digits += self.current_char
             self.advance()
-        
+
+        return self.finish_point(int_part, fractional_digits, start_line, start_column)
+
+    def finish_point(self, int_part, fractional_digits, start_line, start_column):
+        """
+        Validate a scanned point literal and the delimiter at current_char.
+        """
         # Full value for display in error messages
         full_value = int_part + '.' + fractional_digits
         
@@ -588,7 +713,7 @@ class Lexer:
         lexeme = integer_part + '.' + fractional_part
     
         # Check delimiter
-        if self.current_char is not None and self.current_char not in valid_delimiters_numeric:
+        if self.current_char is not None and not is_valid_delimiter('NUMERIC', self.current_char, self.peek_next_char()):
             warning_msg = f"Invalid delimiter after point literal '{lexeme}': '{self.current_char}'"
             error = InvalidSymbolError(self.current_char, self.line, self.column)
             error.message = warning_msg
@@ -635,11 +760,7 @@ class Lexer:
     
             # Check delimiter block remains the same
             if self.current_char is not None:
-                two_char = self.current_char
-                if self.peek_next_char():
-                    two_char += self.peek_next_char()
-                if (self.current_char not in valid_delimiters_numeric and
-                    two_char not in valid_delimiters_numeric):
+                if not is_valid_delimiter('NUMERIC', self.current_char, self.peek_next_char()):
                     warning_msg = f"Invalid delimiter after negative integer '{full_lexeme}': '{self.current_char}'"
                     warning = InvalidSymbolError(self.current_char, self.line, self.column)
                     warning.message = warning_msg
@@ -700,7 +821,7 @@ class Lexer:
             lexeme = f"-{integer_part}.{fractional_part}"
             token_type = 'NEGPOINTLITERAL'
         
-        if self.current_char is not None and self.current_char not in valid_delimiters_numeric:
+        if self.current_char is not None and not is_valid_delimiter('NUMERIC', self.current_char, self.peek_next_char()):
             warning_msg = f"Invalid delimiter after point literal '{lexeme}': '{self.current_char}'"
             error = InvalidSymbolError(self.current_char, self.line, self.column)
             error.message = warning_msg
@@ -773,7 +894,7 @@ class Lexer:
                 self.column -= 1
                 self.current_char = '-'
                 self.current_state = LexerState.INITIAL
-                return self.get_next_token()
+                return None
             else:
                 # Regular subtraction operator
                 symbol = '-'
@@ -845,15 +966,15 @@ class Lexer:
             self.current_state = LexerState.INITIAL
             return T('INVALID', first_char, start_line, start_column, warning=warning_msg)
 
-        # Now we have the symbol. Validate the delimiter
+        return self.finish_symbol(symbol, start_line, start_column)
+
+    def finish_symbol(self, symbol, start_line, start_column):
+        """
+        Validate the delimiter at current_char after a scanned symbol.
+        """
         if symbol:
-            valid_delims = valid_delimiters_symbol_dict.get(symbol, [])
             if self.current_char is not None:
-                two_char = self.current_char
-                if self.peek_next_char():
-                    two_char += self.peek_next_char()
-                if (self.current_char not in valid_delims and
-                    two_char not in valid_delims):
+                if not is_valid_delimiter(symbol, self.current_char, self.peek_next_char()):
                     # We'll be more permissive with dash sequences to accommodate user's requirements
                     if symbol in ['-', '--']:
                         self.current_state = LexerState.INITIAL
@@ -873,18 +994,162 @@ class Lexer:
         return None
 
     #--------------------------------------------------------------------------
-    # Utility: token generator
+    # Incremental re-lexing
     #--------------------------------------------------------------------------
-    def tokenize_all(self):
+    def relex(self, previous_tokens, start, deleted_length, inserted_text):
         """
-        Repeatedly calls get_next_token until None is returned.
-        Returns a list of tokens.
+        Re-lex after an edit to the source this lexer last tokenized.
+
+        The edit replaces `deleted_length` characters at offset `start` with
+        `inserted_text`. Lexing restarts after the last newline token before
+        the edit (a newline leaves the FSM in a clean state) and stops at the
+        first newline token after the edit that lines up with a newline token
+        in `previous_tokens`. Tokens and errors past that point are reused,
+        with their line numbers shifted.
+
+        Tokens from `previous_tokens` are reused, and updated in place when
+        lines or identifier labels change. Returns the new token list;
+        code, errors, identifier_map and token_buffer describe the new source.
+
+        With coalesce_whitespace there are no single newline tokens to restart
+        or stop at, so the whole source is lexed again.
         """
-        self.token_buffer = [] #empty token_buffer to store tokens
-        while True: 
+        old_code = self.code
+        inserted_text = inserted_text.replace('\r\n', '\n').replace('\r', '\n')
+        edit_end = start + deleted_length
+        new_code = old_code[:start] + inserted_text + old_code[edit_end:]
+        token_line = lambda token: token.line
+
+        # Find the restart point: the start of the edited line, or of an
+        # earlier line if the previous line break is not a newline token
+        # (e.g. an escaped newline inside a string)
+        line_start = old_code.rfind('\n', 0, start) + 1
+        restart_line = old_code.count('\n', 0, line_start) + 1
+        restart_index = bisect_left(previous_tokens, restart_line, key=token_line)
+        while restart_line > 1 and not (
+                restart_index > 0 and
+                self.is_newline_token(previous_tokens[restart_index - 1], restart_line - 1)):
+            line_start = old_code.rfind('\n', 0, line_start - 1) + 1
+            restart_line -= 1
+            restart_index = bisect_left(previous_tokens, restart_line, key=token_line, hi=restart_index)
+        if restart_line == 1:
+            line_start = 0
+            restart_index = 0
+
+        # Lines past the edit move by the difference in line breaks
+        line_shift = inserted_text.count('\n') - old_code.count('\n', start, edit_end)
+        edit_end_line = new_code.count('\n', 0, start + len(inserted_text)) + 1
+
+        old_errors = self.errors
+        old_identifier_map = self.identifier_map
+
+        # Lex the new source from the restart point
+        self.code = new_code
+        self.length = len(new_code)
+        self.position = line_start
+        self.line = restart_line
+        self.column = 1
+        self.current_char = new_code[line_start] if line_start < self.length else None
+        self.current_state = LexerState.INITIAL
+        self.errors = []
+        self.identifier_map = dict(old_identifier_map)
+        self.scanner = None
+        self.previous_token = previous_tokens[restart_index - 1] if restart_index else None
+
+        region = []
+        resume_index = len(previous_tokens)
+        synced_line = None
+        while True:
             token = self.get_next_token()
             if token is None:
-                # End of input
                 break
-            self.token_buffer.append(token)
-        return self.token_buffer
\ No newline at end of file
+            region.append(token)
+            if token.line >= edit_end_line and self.is_newline_token(token, token.line):
+                old_line = token.line - line_shift
+                index = bisect_right(previous_tokens, old_line, key=token_line, lo=restart_index)
+                if index > restart_index and self.is_newline_token(previous_tokens[index - 1], old_line):
+                    resume_index = index
+                    synced_line = old_line
+                    break
+        region_errors = self.errors
+
+        # Reuse everything after the sync point
+        tail = previous_tokens[resume_index:]
+        if line_shift:
+            for token in tail:
+                token.line += line_shift
+        tail_errors = []
+        if synced_line is not None:
+            tail_errors = [error for error in old_errors if error.line > synced_line]
+            if line_shift:
+                for error in tail_errors:
+                    error.line += line_shift
+        self.errors = ([error for error in old_errors if error.line < restart_line] +
+                       region_errors + tail_errors)
+
+        tokens = previous_tokens[:restart_index] + region + tail
+
+        # Labels follow the order of first occurrence, so they only change
+        # when the identifiers in the re-lexed region change
+        old_names = [token.value for token in previous_tokens[restart_index:resume_index]
+                     if token.type.startswith('IDENTIFIER_')]
+        new_names = [token.value for token in region if token.type.startswith('IDENTIFIER_')]
+        if old_names == new_names:
+            self.identifier_map = old_identifier_map
+        else:
+            self.identifier_map = {}
+            for token in tokens:
+                if token.type.startswith('IDENTIFIER_'):
+                    token.type = self.identifier_map.setdefault(
+                        token.value, f"IDENTIFIER_{len(self.identifier_map) + 1}")
+        self.identifier_count = len(self.identifier_map)
+
+        # Leave the lexer at the end of the new source
+        self.scanner = None
+        self.position = self.length
+        self.line = new_code.count('\n') + 1
+        self.column = self.length - new_code.rfind('\n') if '\n' in new_code else self.length + 1
+        self.current_char = None
+        self.token_buffer = tokens
+        return tokens
+
+    @staticmethod
+    def is_newline_token(token, line):
+        """Whether token is the newline WHITESPACE token ending the given line."""
+        return token.type == 'WHITESPACE' and token.value == "\\n" and token.line == line
+
+    #--------------------------------------------------------------------------
+    # Utility: token generators
+    #--------------------------------------------------------------------------
+    def iter_tokens(self):
+        """
+        Yield tokens lazily until the end of the input. Nothing is buffered;
+        only the previous token is kept for negative number detection.
+        """
+        if self.fast:
+            if self.scanner is None:
+                self.scanner = self.scan_fast()
+            yield from self.scanner
+            return
+        while True:
+            token = self.get_next_token()
+            if token is None:
+                # End of input
+                return
+            yield token
+
+    def tokenize_all(self):
+        """
+        Collects every token from iter_tokens into token_buffer.
+        Returns a list of tokens.
+        """
+        self.token_buffer = list(self.iter_tokens())
+        return self.token_buffer
+
+    def tokenize_compact(self):
+        """
+        Like tokenize_all, but stores the tokens in a compact TokenBuffer.
+        Returns the TokenBuffer, which yields Token objects on access.
+        """
+        self.token_buffer = TokenBuffer(self.code, self.iter_tokens())
+        return self.token_buffer
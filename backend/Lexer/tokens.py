@@ -1,4 +1,8 @@
+from array import array
+
 class Token:
+    __slots__ = ('type', 'value', 'line', 'column', 'error', 'warning')
+
     def __init__(self, type, value, line, column, error=None, warning=None):
         self.type = type
         self.value = value
@@ -6,11 +10,143 @@ class Token:
         self.column = column
         self.error = error
         self.warning = warning
-        
+
     def __str__(self):
         if self.error:
             return f"Token({self.type}, {self.value}, {self.line}, {self.column}, {self.error})"
         elif self.warning:
             return f"Token({self.type}, {self.value}, {self.line}, {self.column}, warning: {self.warning})"
         else:
-            return f"Token({self.type}, {self.value}, {self.line}, {self.column})"
\ No newline at end of file
+            return f"Token({self.type}, {self.value}, {self.line}, {self.column})"
+
+class WhitespaceToken(Token):
+    """
+    A run of spaces, tabs and newlines folded into a single WHITESPACE token
+    (Lexer coalesce_whitespace mode). Newlines in the value are escaped as
+    "\\n" like single newline tokens; end_line/end_column point just past
+    the run.
+    """
+    __slots__ = ('end_line', 'end_column', 'newlines')
+
+    def __init__(self, value, line, column, end_line, end_column, newlines):
+        super().__init__('WHITESPACE', value, line, column)
+        self.end_line = end_line
+        self.end_column = end_column
+        self.newlines = newlines
+
+class TokenBuffer:
+    """
+    Compact struct-of-arrays token storage.
+
+    Each token is a row across parallel array('i') columns: type id, line,
+    column and start/end offsets into the source. Lexemes are sliced from
+    the source when read; only values that differ from the source slice
+    (normalized numbers, tokens after a skipped character, ...) are kept in
+    a sparse side table, next to the sparse error and warning tables.
+
+    Indexing and iteration return Token objects built on demand, so the
+    buffer can stand in for the list returned by Lexer.tokenize_all().
+    """
+
+    def __init__(self, code, tokens=()):
+        self.code = code
+        self.type_names = []        # type id -> token type
+        self.type_ids = {}          # token type -> type id
+        self.types = array('i')
+        self.lines = array('i')
+        self.columns = array('i')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.values = {}            # index -> value that is not a source slice
+        self.errors = {}            # index -> error
+        self.warnings = {}          # index -> warning
+        self.coalesced = False      # whitespace runs are WhitespaceTokens
+
+        # Offset of the first character of each line, to turn line/column into offsets
+        self.line_starts = array('i', [0])
+        newline = code.find('\n')
+        while newline != -1:
+            self.line_starts.append(newline + 1)
+            newline = code.find('\n', newline + 1)
+
+        self.extend(tokens)
+
+    def append(self, token):
+        index = len(self.types)
+        type_id = self.type_ids.get(token.type)
+        if type_id is None:
+            type_id = self.type_ids[token.type] = len(self.type_names)
+            self.type_names.append(token.type)
+
+        value = token.value
+        if token.type == 'WHITESPACE':
+            # Whitespace values carry newlines escaped as "\n"
+            value = value.replace("\\n", '\n')
+        start = self.line_starts[token.line - 1] + token.column - 1
+        if isinstance(token, WhitespaceToken):
+            # Locate runs by their end, which is exact even when the start
+            # column was carried over from a skipped character
+            self.coalesced = True
+            end = self.line_starts[token.end_line - 1] + token.end_column - 1
+            start = end - len(value)
+        else:
+            end = start + len(value)
+        if self.code[start:end] != value:
+            self.values[index] = token.value
+            end = start
+
+        self.types.append(type_id)
+        self.lines.append(token.line)
+        self.columns.append(token.column)
+        self.starts.append(start)
+        self.ends.append(end)
+        if token.error is not None:
+            self.errors[index] = token.error
+        if token.warning is not None:
+            self.warnings[index] = token.warning
+
+    def extend(self, tokens):
+        for token in tokens:
+            self.append(token)
+
+    def type_at(self, index):
+        return self.type_names[self.types[index]]
+
+    def value_at(self, index):
+        value = self.values.get(index)
+        if value is not None:
+            return value
+        lexeme = self.code[self.starts[index]:self.ends[index]]
+        if self.types[index] == self.type_ids.get('WHITESPACE'):
+            # Whitespace tokens carry newlines escaped as "\n"
+            return lexeme.replace('\n', "\\n")
+        return lexeme
+
+    def token_at(self, index):
+        token_type = self.type_names[self.types[index]]
+        line = self.lines[index]
+        column = self.columns[index]
+        if token_type == 'WHITESPACE' and self.coalesced:
+            value = self.value_at(index)
+            newlines = value.count("\\n")
+            end_line = line + newlines
+            end_column = self.ends[index] - self.line_starts[end_line - 1] + 1
+            return WhitespaceToken(value, line, column, end_line, end_column, newlines)
+        return Token(token_type, self.value_at(index), line, column,
+                     error=self.errors.get(index), warning=self.warnings.get(index))
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.token_at(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("token index out of range")
+        return self.token_at(index)
+
+    def __iter__(self):
+        for index in range(len(self.types)):
+            yield self.token_at(index)
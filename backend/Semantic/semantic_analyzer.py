@@ -3,6 +3,8 @@ from lark import Visitor
 from .symbol_table import SymbolTable
 from .semantic_errors import InvalidListOperandError, ListIndexOutOfRangeError, SemanticError, FunctionRedefinedError, ParameterMismatchError, FunctionNotDefinedError, UndefinedIdentifierError, RedeclarationError, FixedVarReassignmentError, ControlFlowError, TypeMismatchError, UnreachableCodeError, InvalidListAccessError, InvalidGroupAccessError, NegationError, BuiltinFunctionWithoutParensError, UninitializedVariableError
 from ..CodegenTAC.built_in_functions import MinimaBultins
+from ..Syntax.ast_nodes import UNSET, clear_annotation
+from ..visitor_dispatch import bind_handlers
 def convert_state_to_int(state):
     return 1 if state == "YES" else 0
 def convert_state_to_point(state):
@@ -13,7 +15,6 @@ class SemanticAnalyzer(Visitor):
         self.global_scope = SymbolTable()
         self.current_scope = self.global_scope
         self.errors = []
-        self.values = {}
         self.current_function = None
         self.loop_depth = 0
         self.match_depth = 0
@@ -29,6 +30,9 @@ class SemanticAnalyzer(Visitor):
         
         # Add tracking for function scopes
         self.function_scopes = {}
+        
+        # Rule name -> bound visit_<rule> method
+        self.handlers = bind_handlers(self)
     def push_scope(self):
         new_scope = SymbolTable(parent=self.current_scope)
         self.current_scope = new_scope
@@ -46,7 +50,7 @@ class SemanticAnalyzer(Visitor):
     def analyze(self, tree):
         """Main entry point to analyze the parse tree"""
         self.errors = []  
-        self.values = {}  
+        clear_annotation(tree, 'semantic_value')
         self.visit(tree)
         unique_errors = []
         error_signatures = set()
@@ -63,19 +67,21 @@ class SemanticAnalyzer(Visitor):
                 return self.visit_token(tree)
             else:
                 return None
-        method_name = f"visit_{tree.data}"
-        if hasattr(self, method_name):
-            method = getattr(self, method_name)
-            return method(tree)
-        else:
-            for child in tree.children:
-                if hasattr(child, "data") or hasattr(child, "type"):
-                    self.visit(child)
-            return None
+        handler = self.handlers.get(tree.data)
+        if handler is not None:
+            return handler(tree)
+        return self.__default__(tree)
+    def __default__(self, tree):
+        """Visit the children of a rule without a visit_<rule> method."""
+        for child in tree.children:
+            if hasattr(child, "data") or hasattr(child, "type"):
+                self.visit(child)
+        return None
     def get_value(self, node):
         """Retrieve a value for a node, visiting it if needed"""
-        if id(node) in self.values:
-            return self.values[id(node)]
+        value = getattr(node, 'semantic_value', UNSET)
+        if value is not UNSET:
+            return value
         if hasattr(node, 'data'):
             result = self.visit(node)
             return result
@@ -100,7 +106,6 @@ class SemanticAnalyzer(Visitor):
             result = ("empty", None)
         else:
             result = token.value
-        self.values[id(token)] = result
         return result
     def infer_type_and_value(self, raw_value):
         """
@@ -214,7 +219,7 @@ class SemanticAnalyzer(Visitor):
     def visit_list_value(self, node):
         """Visit a list_value node, properly handling empty lists."""
         if not node.children:
-            self.values[id(node)] = ("list", [])
+            node.semantic_value = ("list", [])
             return ("list", [])
         children = node.children
         result = [self.get_value(children[0])]
@@ -224,7 +229,7 @@ class SemanticAnalyzer(Visitor):
                 result.extend(list_tail)
             else:
                 result.append(list_tail)
-        self.values[id(node)] = ("list", result)
+        node.semantic_value = ("list", result)
         return ("list", result)
     def visit_list_tail(self, node):
         children = node.children
@@ -237,7 +242,7 @@ class SemanticAnalyzer(Visitor):
                 result.extend(list_tail)
             else:
                 result.append(list_tail)
-        self.values[id(node)] = result
+        node.semantic_value = result
         return result
     def to_numeric(self, typ, value, target="int"):
         if typ == "unknown":
@@ -460,7 +465,7 @@ class SemanticAnalyzer(Visitor):
                 self.errors.append(BuiltinFunctionWithoutParensError(func_name, line, column))
         
         result = self.get_value(node.children[0])
-        self.values[id(node)] = result
+        node.semantic_value = result
         if result and isinstance(result, tuple) and len(result) > 0:
             self._check_invalid_access_in_expr(node)
         return result
@@ -500,7 +505,7 @@ class SemanticAnalyzer(Visitor):
             result_bool = self.to_state(result) or self.to_state(right)
             result = ("state", "YES" if result_bool else "NO")
             i += 2
-        self.values[id(node)] = result
+        node.semantic_value = result
         return result
     def visit_logical_and_expr(self, node):
         children = node.children
@@ -512,7 +517,7 @@ class SemanticAnalyzer(Visitor):
             result_bool = self.to_state(result) and self.to_state(right)
             result = ("state", "YES" if result_bool else "NO")
             i += 2
-        self.values[id(node)] = result
+        node.semantic_value = result
         return result
     def visit_equality_expr(self, node):
         children = node.children
@@ -563,7 +568,7 @@ class SemanticAnalyzer(Visitor):
                     self.errors.append(SemanticError(
                         f"Error in equality comparison: {str(e)}", line, column))
                     result = ("unknown", None)
-            self.values[id(node)] = result
+            node.semantic_value = result
             return result
     def visit_relational_expr(self, node):
         children = node.children
@@ -621,7 +626,7 @@ class SemanticAnalyzer(Visitor):
                     self.errors.append(SemanticError(
                         f"Error in comparison: {str(e)}", line, column))
                     result = ("unknown", None)
-            self.values[id(node)] = result
+            node.semantic_value = result
             return result
     def visit_add_expr(self, node):
         children = node.children
@@ -633,7 +638,7 @@ class SemanticAnalyzer(Visitor):
             right = self.get_value(children[i+1])
             result = self.evaluate_binary(op, result, right, op_token.line, op_token.column)
             i += 2
-        self.values[id(node)] = result
+        node.semantic_value = result
         return result
     def visit_mul_expr(self, node):
         children = node.children
@@ -645,7 +650,7 @@ class SemanticAnalyzer(Visitor):
             right = self.get_value(children[i+1])
             result = self.evaluate_binary(op, result, right, op_token.line, op_token.column)
             i += 2
-        self.values[id(node)] = result
+        node.semantic_value = result
         return result
     def visit_pre_expr(self, node):
         children = node.children
@@ -685,7 +690,7 @@ class SemanticAnalyzer(Visitor):
                     column = op_token.column if hasattr(op_token, 'column') else 0
                     self.errors.append(NegationError(typ, line, column))
                     result = ("unknown", None)
-        self.values[id(node)] = result
+        node.semantic_value = result
         return result
     def visit_primary_expr(self, node):
         children = node.children
@@ -693,7 +698,7 @@ class SemanticAnalyzer(Visitor):
             result = self.get_value(children[0])
         else:
             result = self.get_value(children[1])
-        self.values[id(node)] = result
+        node.semantic_value = result
         return result
     def visit_operand(self, node):
         # Check if this is a direct built-in function reference
@@ -711,7 +716,7 @@ class SemanticAnalyzer(Visitor):
         else:
             result = self.get_value(node.children[0])
             
-        self.values[id(node)] = result
+        node.semantic_value = result
         return result
     def visit_typecast_expression(self, node):
         children = node.children
@@ -726,7 +731,7 @@ class SemanticAnalyzer(Visitor):
             current_type, current_value = "unknown", None
         if current_type == "get" or str(current_type).startswith("g"):
             result = (target, None)  
-            self.values[id(node)] = result
+            node.semantic_value = result
             return result
         try:
             if target == "integer":
@@ -771,7 +776,7 @@ class SemanticAnalyzer(Visitor):
         except Exception as e:
             self.errors.append(SemanticError(f"Custom Error in typecasting: {str(e)}", line, column))
             result = ("unknown", None)
-        self.values[id(node)] = result
+        node.semantic_value = result
         return result
     def visit_varlist_declaration(self, node):
         children = node.children
@@ -1298,7 +1303,7 @@ class SemanticAnalyzer(Visitor):
         if is_builtin and not has_func_call:
             self.errors.append(BuiltinFunctionWithoutParensError(name, line, column))
             result = ("unknown", None)
-            self.values[id(node)] = result
+            node.semantic_value = result
             return result
         
         if has_func_call:
@@ -1380,7 +1385,7 @@ class SemanticAnalyzer(Visitor):
                         if access_result is not None:
                             result = access_result
                             
-        self.values[id(node)] = result
+        node.semantic_value = result
         return result
 
     def validate_builtin_function_args(self, func_name, arg_values, line, column):
@@ -1612,10 +1617,10 @@ class SemanticAnalyzer(Visitor):
                     arg_val = self.get_value(child)
                     if arg_val is not None:
                         args.append(arg_val)
-            self.values[id(node)] = args
+            node.semantic_value = args
         else:
-            self.values[id(node)] = []
-        return self.values[id(node)]
+            node.semantic_value = []
+        return node.semantic_value
     def visit_func_definition(self, node):
         """
         Handles function definitions with syntax:
@@ -1705,7 +1710,7 @@ class SemanticAnalyzer(Visitor):
             self.errors.append(ControlFlowError(
                 "throw", "functions", line, column))
             return None
-        expr_node = node.children[1]
+        expr_node = node.expr
         thrown_value = self.get_value(expr_node)
         self.function_returns[self.current_function] = thrown_value
         self.function_throw_expressions[self.current_function] = expr_node
@@ -1737,7 +1742,7 @@ class SemanticAnalyzer(Visitor):
         Semantic analysis for show_statement.
         Syntax: SHOW LPAREN expression RPAREN
         """
-        expr = node.children[2]
+        expr = node.expr
         expr_value = self.get_value(expr)
         return None
     def visit_control_flow(self, node):
@@ -1745,7 +1750,7 @@ class SemanticAnalyzer(Visitor):
         Semantic analysis for control flow statements (EXIT, NEXT).
         These should only be used inside loops.
         """
-        stmt_token = node.children[0]
+        stmt_token = node.keyword
         stmt_type = stmt_token.value.lower()  
         line = stmt_token.line
         column = stmt_token.column
@@ -1763,13 +1768,13 @@ class SemanticAnalyzer(Visitor):
             if len(children) >= 3:
                 prompt_expr = self.get_value(children[2])
                 result = ("get", prompt_expr)
-                self.values[id(node)] = result
+                node.semantic_value = result
                 return result
         if (len(children) >= 2 and 
             hasattr(children[0], "type") and children[0].type == "LSQB" and
             hasattr(children[1], "type") and children[1].type == "RSQB"):
             result = ("list", [])
-            self.values[id(node)] = result
+            node.semantic_value = result
             return result
         if not children:
             result = ("empty", None)
@@ -1777,7 +1782,7 @@ class SemanticAnalyzer(Visitor):
             result = self.get_value(children[1])
         else:
             result = self.get_value(children[0])
-        self.values[id(node)] = result
+        node.semantic_value = result
         return result
     def visit_get_operand(self, node):
         """
@@ -1843,11 +1848,11 @@ class SemanticAnalyzer(Visitor):
         """
         self.push_scope()
         self.enter_loop()
-        self.visit(node.children[2])  
-        condition_expr = node.children[3]
+        self.visit(node.init)
+        condition_expr = node.condition
         self.check_boolean_expr(condition_expr, "each loop condition")
         self.visit(condition_expr)
-        self.visit(node.children[5])  
+        self.visit(node.update)
         self.visit(node.children[7])  
         self.exit_loop()
         self.pop_scope()
@@ -1857,7 +1862,7 @@ class SemanticAnalyzer(Visitor):
         Semantic analysis for repeat_statement (while loop).
         Syntax: REPEAT LPAREN expression RPAREN LBRACE loop_block RBRACE
         """
-        condition_expr = node.children[2]
+        condition_expr = node.condition
         self.check_boolean_expr(condition_expr, "repeat loop condition")
         self.visit(condition_expr)
         self.push_scope()
@@ -1873,8 +1878,8 @@ class SemanticAnalyzer(Visitor):
         """
         self.push_scope()
         self.enter_loop()
-        self.visit(node.children[2])
-        condition_expr = node.children[6]
+        self.visit(node.body)
+        condition_expr = node.condition
         self.check_boolean_expr(condition_expr, "do-repeat loop condition")
         self.visit(condition_expr)
         self.exit_loop()
@@ -1885,14 +1890,14 @@ class SemanticAnalyzer(Visitor):
         Semantic analysis for checkif_statement (if statement).
         Syntax: CHECKIF LPAREN expression RPAREN LBRACE program RBRACE recheck_statement otherwise_statement
         """
-        condition_expr = node.children[2]
+        condition_expr = node.condition
         self.check_boolean_expr(condition_expr, "checkif condition")
         self.visit(condition_expr)
         self.push_scope()
-        self.visit(node.children[5])
+        self.visit(node.body)
         self.pop_scope()
-        for child in node.children[6:]:
-            if child and hasattr(child, 'data'):
+        for child in (node.recheck, node.otherwise):
+            if child is not None:
                 self.visit(child)
         return None
     def visit_recheck_statement(self, node):
@@ -1903,14 +1908,14 @@ class SemanticAnalyzer(Visitor):
         children = node.children
         if len(children) < 7:
             return None
-        condition_expr = children[2]
+        condition_expr = node.condition
         self.check_boolean_expr(condition_expr, "recheck condition")
         self.visit(condition_expr)
         self.push_scope()
-        self.visit(children[5])
+        self.visit(node.body)
         self.pop_scope()
-        if len(children) > 7 and children[7]:
-            self.visit(children[7])
+        if node.recheck:
+            self.visit(node.recheck)
         return None
     def visit_otherwise_statement(self, node):
         """
@@ -1920,7 +1925,7 @@ class SemanticAnalyzer(Visitor):
         if not node or not hasattr(node, 'children') or len(node.children) < 3:
             return None
         self.push_scope()
-        self.visit(node.children[2])
+        self.visit(node.body)
         self.pop_scope()
         return None
     def visit_match_statement(self, node):
@@ -1928,18 +1933,18 @@ class SemanticAnalyzer(Visitor):
         Semantic analysis for match_statement.
         Syntax: match LPAREN expression RPAREN LBRACE CASE literals COLON program case_tail default RBRACE
         """
-        self.visit(node.children[2])
+        self.visit(node.subject)
         self.push_scope()
         self.enter_match()
         case_values = set()
-        case_value = self.get_value(node.children[6])
+        case_value = self.get_value(node.case_label)
         if case_value and case_value[0] != "unknown":
             case_values.add(str(case_value))
-        self.visit(node.children[8])
-        if len(node.children) > 9 and node.children[9]:
-            self.visit_case_values(node.children[9], case_values)
-        if len(node.children) > 10 and node.children[10]:
-            self.visit(node.children[10])
+        self.visit(node.body)
+        if node.cases:
+            self.visit_case_values(node.cases, case_values)
+        if node.default:
+            self.visit(node.default)
         self.exit_match()
         self.pop_scope()
         return None
@@ -1948,12 +1953,12 @@ class SemanticAnalyzer(Visitor):
             return
         if len(case_tail_node.children) < 2:
             return
-        case_value = self.get_value(case_tail_node.children[1])
+        case_value = self.get_value(case_tail_node.label)
         if case_value and case_value[0] != "unknown":
             str_val = str(case_value)
             if str_val in case_values:
                 line, column = 0, 0
-                literal_token = case_tail_node.children[1]
+                literal_token = case_tail_node.label
                 if hasattr(literal_token, 'line'):
                     line = literal_token.line
                     column = literal_token.column
@@ -1961,10 +1966,10 @@ class SemanticAnalyzer(Visitor):
                     f"Duplicate case value: {case_value[1]}", line, column))
             else:
                 case_values.add(str_val)
-        if len(case_tail_node.children) >= 4:
-            self.visit(case_tail_node.children[3])
-        if len(case_tail_node.children) > 4 and case_tail_node.children[4]:
-            self.visit_case_values(case_tail_node.children[4], case_values)
+        if case_tail_node.body is not None:
+            self.visit(case_tail_node.body)
+        if case_tail_node.cases:
+            self.visit_case_values(case_tail_node.cases, case_values)
     def visit_group_or_list(self, node):
         if not node.children:
             return None
@@ -2052,7 +2057,7 @@ class SemanticAnalyzer(Visitor):
                             self.errors.append(InvalidGroupAccessError(
                                 var_name, parent_line, parent_column))
                             result = ("unknown", None)
-        self.values[id(node)] = result
+        node.semantic_value = result
         return result
     def visit_group_declaration(self, node):
         ident = node.children[1]
@@ -0,0 +1,385 @@
+# ast_nodes.py
+#
+# Compact AST the back-end passes work on. build_ast() turns the Lark parse
+# tree into AstNode objects: the same data/children shape the visitors
+# already walk, but stored in __slots__ instead of a per-node __dict__, with
+# a source span and slots the passes use to annotate nodes in place of
+# id()-keyed side tables. Tokens are kept as the Lark tokens they are.
+#
+# Nodes of the main statement and expression rules get a subclass with
+# named fields (VarDecl.name, BinOp.left, CheckIf.body, ...) that read the
+# child at the position fixed by grammar.lark. Field names never shadow the
+# token attributes (type, value, line, column) the passes probe with hasattr.
+
+from lark import Tree
+
+# Value of an annotation slot that has not been filled in
+UNSET = object()
+
+
+def _child(index):
+    """Named field reading children[index], or None when there is no such child."""
+    def get(self):
+        children = self.children
+        return children[index] if index < len(children) else None
+    return property(get)
+
+
+def _rule_child(data):
+    """Named field reading the first child node of rule data, or None."""
+    def get(self):
+        for child in self.children:
+            if isinstance(child, AstNode) and child.data == data:
+                return child
+        return None
+    return property(get)
+
+
+class AstNode:
+    """
+    One grammar rule match. data is the rule name and children is a tuple
+    of the child nodes and tokens in grammar order. The span runs from the start
+    of the first token to the end of the last one; empty nodes (an absent
+    optional part) have no span.
+
+    parent is only set by the semantic analyzer, on the accessors it walks
+    up from. semantic_value and tac_value hold the cached result of each
+    pass for the node.
+    """
+    __slots__ = ('data', 'children', 'start_line', 'start_column', 'end_line', 'end_column',
+                 'parent', 'semantic_value', 'tac_value')
+
+    rules = ()
+
+    def __init__(self, data, children, start_line=None, start_column=None,
+                 end_line=None, end_column=None):
+        self.data = data
+        self.children = children
+        self.start_line = start_line
+        self.start_column = start_column
+        self.end_line = end_line
+        self.end_column = end_column
+        self.semantic_value = UNSET
+        self.tac_value = UNSET
+
+    @property
+    def span(self):
+        """(start_line, start_column, end_line, end_column), or None for an empty node."""
+        if self.start_line is None:
+            return None
+        return (self.start_line, self.start_column, self.end_line, self.end_column)
+
+    def iter_nodes(self):
+        """All nodes of the subtree, this one first."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(child for child in reversed(node.children) if isinstance(child, AstNode))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.data!r}, {self.children!r})"
+
+
+class Block(AstNode):
+    # annotated: names of the annotation slots written anywhere below this
+    # node, kept so clear_annotation() can skip trees that are still fresh
+    __slots__ = ('annotated',)
+    rules = ('start', 'program', 'program_block', 'loop_block', 'function_prog', 'func_loop_block')
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.annotated = ()
+
+    @property
+    def statements(self):
+        return self.children
+
+
+class VarDecl(AstNode):
+    __slots__ = ()
+    rules = ('varlist_declaration', 'varlist_tail')
+    name = _child(1)
+    init = _child(2)
+    tail = _child(3)
+
+
+class VarInit(AstNode):
+    __slots__ = ()
+    rules = ('var_init',)
+    expr = _child(1)
+
+
+class FixedDecl(AstNode):
+    __slots__ = ()
+    rules = ('fixed_declaration', 'fixed_tail')
+    name = _child(1)
+    expr = _child(3)
+    tail = _child(4)
+
+
+class GroupDecl(AstNode):
+    __slots__ = ()
+    rules = ('group_declaration',)
+    name = _child(1)
+    members = _child(3)
+
+
+class GroupMembers(AstNode):
+    __slots__ = ()
+    rules = ('group_members',)
+    key = _child(0)
+    expr = _child(2)
+    tail = _child(3)
+
+
+class ListValue(AstNode):
+    __slots__ = ()
+    rules = ('list_value',)
+    first = _child(0)
+    tail = _child(1)
+
+
+class ListTail(AstNode):
+    __slots__ = ()
+    rules = ('list_tail',)
+    item = _child(1)
+    tail = _child(2)
+
+
+class IdUsage(AstNode):
+    __slots__ = ()
+    rules = ('id_usage',)
+    name = _child(0)
+    suffix = _child(1)
+
+
+class IdUsageTail(AstNode):
+    __slots__ = ()
+    rules = ('id_usagetail',)
+    # Empty suffixes are dropped by simplify_tree, so look them up by rule
+    accessor = _rule_child('group_or_list')
+    unary = _rule_child('unary_op')
+
+
+class Accessor(AstNode):
+    __slots__ = ()
+    rules = ('group_or_list',)
+    key = _child(1)
+
+
+class Call(AstNode):
+    __slots__ = ()
+    rules = ('func_call',)
+    args = _child(1)
+
+
+class GetCall(AstNode):
+    __slots__ = ()
+    rules = ('operand',)
+    prompt = _child(2)
+
+
+class VarAssign(AstNode):
+    __slots__ = ()
+    rules = ('var_assign',)
+    name = _child(0)
+    accessor = _child(1)
+    op = _child(2)
+    expr = _child(3)
+
+
+class BinOp(AstNode):
+    __slots__ = ()
+    rules = ('logical_or_expr', 'logical_and_expr', 'equality_expr', 'relational_expr',
+             'add_expr', 'mul_expr')
+    left = _child(0)
+    op = _child(1)
+    right = _child(2)
+
+
+class PreExpr(AstNode):
+    __slots__ = ()
+    rules = ('pre_expr',)
+    op = _child(0)
+    operand = _child(1)
+
+
+class Paren(AstNode):
+    __slots__ = ()
+    rules = ('primary_expr',)
+    expr = _child(1)
+
+
+class Typecast(AstNode):
+    __slots__ = ()
+    rules = ('typecast_expression',)
+    target = _child(0)
+    expr = _child(2)
+
+
+class Show(AstNode):
+    __slots__ = ()
+    rules = ('show_statement',)
+    expr = _child(2)
+
+
+class CheckIf(AstNode):
+    __slots__ = ()
+    rules = ('checkif_statement', 'loop_checkif_statement', 'func_checkif_statement',
+             'func_loop_checkif_statement')
+    condition = _child(2)
+    body = _child(5)
+    recheck = _child(7)
+    otherwise = _child(8)
+
+
+class Recheck(AstNode):
+    __slots__ = ()
+    rules = ('recheck_statement', 'loop_recheck_statement', 'func_recheck_statement',
+             'func_loop_recheck_statement')
+    condition = _child(2)
+    body = _child(5)
+    recheck = _child(7)
+
+
+class Otherwise(AstNode):
+    __slots__ = ()
+    rules = ('otherwise_statement', 'loop_otherwise_statement', 'func_otherwise_statement',
+             'func_loop_otherwise_statement')
+    body = _child(2)
+
+
+class Match(AstNode):
+    __slots__ = ()
+    rules = ('match_statement', 'loop_match_statement', 'func_match_statement',
+             'func_loop_match_statement')
+    subject = _child(2)
+    case_label = _child(6)
+    body = _child(8)
+    cases = _child(9)
+    default = _child(10)
+
+
+class Case(AstNode):
+    __slots__ = ()
+    rules = ('case_tail', 'case_tail_loop', 'func_case_tail', 'func_loop_case_tail')
+    label = _child(1)
+    body = _child(3)
+    cases = _child(4)
+
+
+class Default(AstNode):
+    __slots__ = ()
+    rules = ('default', 'loop_match_default', 'func_match_default', 'func_loop_match_default')
+    body = _child(2)
+
+
+class EachLoop(AstNode):
+    __slots__ = ()
+    rules = ('each_statement', 'each_func_statement')
+    init = _child(2)
+    condition = _child(3)
+    update = _child(5)
+    body = _child(8)
+
+
+class RepeatLoop(AstNode):
+    __slots__ = ()
+    rules = ('repeat_statement', 'repeat_func_statement')
+    condition = _child(2)
+    body = _child(5)
+
+
+class DoRepeatLoop(AstNode):
+    __slots__ = ()
+    rules = ('do_repeat_statement', 'do_repeat_func_statement')
+    body = _child(2)
+    condition = _child(6)
+
+
+class FuncDef(AstNode):
+    __slots__ = ()
+    rules = ('func_definition',)
+    name = _child(1)
+    params = _child(3)
+    body = _child(6)
+
+
+class Throw(AstNode):
+    __slots__ = ()
+    rules = ('throw_statement',)
+    expr = _child(1)
+
+
+class ControlFlow(AstNode):
+    __slots__ = ()
+    rules = ('control_flow',)
+    keyword = _child(0)
+
+
+# Rule name -> node class; rules not listed use AstNode
+NODE_CLASSES = {rule: cls for cls in AstNode.__subclasses__() for rule in cls.rules}
+
+
+def _make_node(data, children):
+    start_line = start_column = end_line = end_column = None
+    for child in children:
+        if isinstance(child, AstNode):
+            if child.start_line is not None:
+                start_line, start_column = child.start_line, child.start_column
+                break
+        elif child.line is not None:
+            start_line, start_column = child.line, child.column
+            break
+    for child in reversed(children):
+        if isinstance(child, AstNode):
+            if child.end_line is not None:
+                end_line, end_column = child.end_line, child.end_column
+                break
+        elif child.end_line is not None:
+            end_line, end_column = child.end_line, child.end_column
+            break
+    data = str(data)
+    return NODE_CLASSES.get(data, AstNode)(data, tuple(children), start_line, start_column,
+                                           end_line, end_column)
+
+
+def build_ast(tree):
+    """
+    Convert a Lark parse tree into AstNodes. The walk is iterative, so deeply
+    nested expressions do not hit the recursion limit.
+    """
+    if not isinstance(tree, Tree):
+        return tree
+    stack = [(tree, iter(tree.children), [])]
+    while True:
+        source, pending, children = stack[-1]
+        for child in pending:
+            if isinstance(child, Tree):
+                stack.append((child, iter(child.children), []))
+                break
+            children.append(child)
+        else:
+            stack.pop()
+            node = _make_node(source.data, children)
+            if not stack:
+                return node
+            stack[-1][2].append(node)
+
+
+def clear_annotation(tree, name):
+    """
+    Reset the annotation slot name on every node of tree, before a pass
+    starts filling it in. A block that was never annotated is left alone,
+    as every slot is still UNSET.
+    """
+    if not isinstance(tree, AstNode):
+        return
+    if isinstance(tree, Block):
+        if name not in tree.annotated:
+            tree.annotated += (name,)
+            return
+    reset = getattr(AstNode, name).__set__
+    for node in tree.iter_nodes():
+        reset(node, UNSET)
@@ -1,12 +1,76 @@
 # syntax_analyzer.py
 
+import glob
+import hashlib
 import os
 from lark import Lark, UnexpectedToken, UnexpectedCharacters, UnexpectedInput, UnexpectedEOF
 from .syntax_errors import process_syntax_error
 from .token_map import TOKEN_MAP
+from .token_lexer import MinimaTokenLexer
+from .tree_simplifier import simplify_tree
+from .ast_nodes import build_ast
 
 grammar_path = os.path.join(os.path.dirname(__file__), "grammar.lark")
-parser = Lark.open(grammar_path, start="start", parser="lalr")
+
+# Compiled LALR tables are cached on disk, one file per grammar hash.
+# MINIMA_PARSER_CACHE_DIR moves the cache, MINIMA_PARSER_CACHE=0 disables it.
+PARSER_CACHE_DIR = os.environ.get(
+    "MINIMA_PARSER_CACHE_DIR", os.path.join(os.path.dirname(__file__), "__parser_cache__"))
+PARSER_CACHE_ENABLED = os.environ.get("MINIMA_PARSER_CACHE", "1") != "0"
+
+def grammar_hash(path=grammar_path):
+    with open(path, "rb") as grammar_file:
+        return hashlib.sha256(grammar_file.read()).hexdigest()[:16]
+
+# Parsers of the grammar: "tokens" consumes tokens from the Minima lexer
+# instead of re-lexing the source, "source" lexes the source text itself
+PARSER_LEXERS = {"tokens": MinimaTokenLexer, "source": "contextual"}
+
+def parser_cache_path(lexer="tokens"):
+    suffix = "" if lexer == "tokens" else f"_{lexer}"
+    return os.path.join(PARSER_CACHE_DIR, f"grammar_{grammar_hash()}{suffix}.lark_cache")
+
+def build_parser(use_cache=PARSER_CACHE_ENABLED, lexer="tokens"):
+    """
+    Build the LALR parser with the lexer named lexer (see PARSER_LEXERS).
+    With use_cache, the tables are loaded from the cache file for the
+    current grammar, or built and written there. Lark also records the
+    grammar, options and Lark/Python versions in the file and rebuilds
+    when they do not match, so a stale cache is never used.
+    """
+    cache = False
+    if use_cache:
+        try:
+            os.makedirs(PARSER_CACHE_DIR, exist_ok=True)
+            cache = parser_cache_path(lexer)
+        except OSError:
+            # Read-only location: build without the cache
+            pass
+    return Lark.open(grammar_path, start="start", parser="lalr", lexer=PARSER_LEXERS[lexer], cache=cache)
+
+def remove_stale_parser_caches():
+    """Delete cache files left by earlier versions of the grammar."""
+    current = {parser_cache_path(lexer) for lexer in PARSER_LEXERS}
+    for cache_file in glob.glob(os.path.join(PARSER_CACHE_DIR, "grammar_*.lark_cache")):
+        if cache_file not in current:
+            os.remove(cache_file)
+
+parser = None
+source_parser = None
+
+def get_parser():
+    """The shared parser, built on first use."""
+    global parser
+    if parser is None:
+        parser = build_parser()
+    return parser
+
+def get_source_parser():
+    """The shared parser that lexes source text itself, built on first use."""
+    global source_parser
+    if source_parser is None:
+        source_parser = build_parser(lexer="source")
+    return source_parser
 
 def analyze_syntax(code, pre_analyzed_tokens=None, lexical_errors=None):
     """
@@ -14,11 +78,12 @@ def analyze_syntax(code, pre_analyzed_tokens=None, lexical_errors=None):
     
     Args:
         code: The source code to analyze
-        pre_analyzed_tokens: Optional pre-analyzed tokens to avoid redundant lexical analysis
+        pre_analyzed_tokens: Optional pre-analyzed tokens (a list or a Lexer.iter_tokens() stream)
+            to avoid redundant lexical analysis
         lexical_errors: Optional list of lexical errors already found
         
     Returns:
-        Tuple of (success, result) where result is either the parse tree or error info
+        Tuple of (success, result) where result is either the AST (see ast_nodes) or error info
     """
     # Check if we already have lexical analysis results
     if lexical_errors is not None and lexical_errors:
@@ -44,8 +109,9 @@ def analyze_syntax(code, pre_analyzed_tokens=None, lexical_errors=None):
     if pre_analyzed_tokens is None:
         from ..Lexer.minima_lexer import Lexer
         
-        lexer = Lexer(code)
-        tokens = lexer.tokenize_all()
+        # Whitespace is skipped by the parser, so fold it into runs
+        lexer = Lexer(code, coalesce_whitespace=True)
+        pre_analyzed_tokens = lexer.tokenize_all()
         
         # Check if there are any lexical errors
         if lexer.errors:
@@ -69,7 +135,16 @@ def analyze_syntax(code, pre_analyzed_tokens=None, lexical_errors=None):
     
     # Proceed with syntax analysis
     try:
-        parse_tree = parser.parse(code)
+        parse_tree = get_parser().parse(pre_analyzed_tokens)
+    except UnexpectedInput:
+        # Syntax errors are reported as the grammar's own lexer finds them:
+        # where the Minima lexer only warns (an unterminated text, say) it
+        # stops at different places, with different expected tokens
+        parse_tree = None
+    if parse_tree is not None:
+        return (True, build_ast(simplify_tree(parse_tree)))
+    try:
+        parse_tree = build_ast(simplify_tree(get_source_parser().parse(code)))
         return (True, parse_tree)
     except (UnexpectedToken, UnexpectedCharacters, UnexpectedEOF, UnexpectedInput) as ut:
         expected_tokens = list(ut.expected) if hasattr(ut, "expected") else []
@@ -1,5 +1,6 @@
 import re
 from .token_map import TOKEN_MAP
+from ..Lexer.keywords import RESERVED_WORDS, BUILTIN_TERMINALS
 
 def process_syntax_error(
     error_msg: str,
@@ -44,30 +45,10 @@ def process_syntax_error(
     
     # Helper to categorize tokens
     def categorize_tokens(tokens):
-        KEYWORDS = {
-            "var", "fixed", "group", "func", "throw", "show", "checkif",
-            "recheck", "otherwise", "match", "case", "default", "exit",
-            "next", "each", "repeat", "do", "integer", "point", "state",
-            "text", "empty", "get"
-        }
-        # Add built-in functions to keywords
-        BUILTIN_FUNCTIONS = {
-            "abs", "ceil", "contains", "factorial", "floor", "isqrt", "join",
-            "length", "lowercase", "max", "min", "pow", "reverse", "round",
-            "slice", "sorted", "sum", "type", "unique", "uppercase"
-        }
-        # Combine regular keywords and built-in functions
-        KEYWORDS = KEYWORDS.union(BUILTIN_FUNCTIONS)
-        
-        # Map for uppercase token versions to lowercase display
-        BUILTIN_UPPERCASE_MAP = {
-            "ABS": "abs", "CEIL": "ceil", "CONTAINS": "contains", "FACTORIAL": "factorial",
-            "FLOOR": "floor", "ISQRT": "isqrt", "JOIN": "join", "LENGTH": "length",
-            "LOWERCASE": "lowercase", "MAX": "max", "MIN": "min", "POW": "pow",
-            "REVERSE": "reverse", "ROUND": "round", "SLICE": "slice", "SORTED": "sorted",
-            "SUM": "sum", "TYPE": "type", "UNIQUE": "unique", "UPPERCASE": "uppercase"
-        }
-        
+        # Reserved words and uppercase built-in terminals come from the shared keyword table
+        KEYWORDS = RESERVED_WORDS
+        BUILTIN_UPPERCASE_MAP = BUILTIN_TERMINALS
+
         LITERALS = {
             "TEXTLITERAL", "INTEGERLITERAL", "NEGINTEGERLITERAL",
             "POINTLITERAL", "NEGPOINTLITERAL", "STATELITERAL"
@@ -0,0 +1,99 @@
+# token_lexer.py
+
+from lark import Token as LarkToken
+from lark.lexer import Lexer as LarkLexer
+
+from ..Lexer.keywords import KEYWORD_TERMINALS
+
+# Token types produced by the Minima lexer that carry no syntactic meaning
+SKIPPED_TOKEN_TYPES = {'WHITESPACE', 'COMMENT'}
+
+# Minima lexer token types (symbols and keywords) mapped to grammar terminals.
+# Keywords and built-in functions come from the shared keyword table.
+# Literal token types (INTEGERLITERAL, TEXTLITERAL, ...) share their names
+# with the grammar and are passed through unchanged.
+TERMINAL_MAP = {
+    '{': 'LBRACE',
+    '}': 'RBRACE',
+    '[': 'LSQB',
+    ']': 'RSQB',
+    '(': 'LPAREN',
+    ')': 'RPAREN',
+    '||': 'OR_OP',
+    '&&': 'AND_OP',
+    '==': 'EQ_OP',
+    '!=': 'NEQ_OP',
+    '<': 'LT',
+    '<=': 'LE',
+    '>': 'GT',
+    '>=': 'GE',
+    '+': 'PLUS',
+    '-': 'MINUS',
+    '*': 'STAR',
+    '/': 'SLASH',
+    '%': 'PERCENT',
+    '!': 'BANG',
+    '++': 'INC_OP',
+    '--': 'DEC_OP',
+    '=': 'ASSIGN',
+    '+=': 'ADD_ASSIGN',
+    '-=': 'SUB_ASSIGN',
+    '*=': 'MUL_ASSIGN',
+    '/=': 'DIV_ASSIGN',
+    ',': 'COMMA',
+    ':': 'COLON',
+    ';': 'SEMICOLON',
+}
+TERMINAL_MAP.update(KEYWORD_TERMINALS)
+
+# Negative literals and the positive terminal left over once the sign is split off
+NEGATIVE_LITERALS = {
+    'NEGINTEGERLITERAL': 'INTEGERLITERAL',
+    'NEGPOINTLITERAL': 'POINTLITERAL',
+}
+
+
+def to_terminal(token_type):
+    """Map a Minima lexer token type onto the grammar terminal name."""
+    if token_type.startswith('IDENTIFIER_'):
+        return 'IDENTIFIER'
+    return TERMINAL_MAP.get(token_type, token_type)
+
+
+class MinimaTokenLexer(LarkLexer):
+    """
+    Lark lexer adapter that replays tokens from the hand-written Minima lexer.
+
+    The "text" handed to parser.parse() is the token list produced by
+    Lexer.tokenize_all(), so the source is never lexed a second time.
+    """
+    __future_interface__ = True
+
+    def __init__(self, lexer_conf):
+        pass
+
+    def lex(self, lexer_state, parser_state):
+        states = parser_state.parse_conf.states
+        for token in lexer_state.text:
+            if token.type in SKIPPED_TOKEN_TYPES:
+                continue
+            terminal = to_terminal(token.type)
+
+            # The Minima lexer reads "x -1" as a negative literal because the
+            # token before '-' is whitespace. Lark's contextual lexer only
+            # offers negative literals where the parser accepts them, so split
+            # the sign off whenever the current parser state expects an operator.
+            if terminal in NEGATIVE_LITERALS:
+                accepted = states[parser_state.position]
+                if terminal not in accepted and 'MINUS' in accepted:
+                    yield LarkToken('MINUS', '-', None, token.line, token.column,
+                                    token.line, token.column + 1)
+                    terminal = NEGATIVE_LITERALS[terminal]
+                    value = token.value[1:]
+                    yield LarkToken(terminal, value, None, token.line, token.column + 1,
+                                    token.line, token.column + 1 + len(value))
+                    continue
+
+            value = token.value
+            yield LarkToken(terminal, value, None, token.line, token.column,
+                            token.line, token.column + len(value))
@@ -0,0 +1,33 @@
+# tree_simplifier.py
+
+from lark import Tree
+
+# Optional suffixes of an identifier (indexing, ++/--) that the grammar
+# matches with an empty alternative when they are absent
+OPTIONAL_SUFFIXES = {'group_or_list', 'unary_op'}
+
+
+def simplify_tree(tree):
+    """
+    Remove empty passthrough nodes from a parse tree, in place.
+
+    The expression precedence rules are already inlined by the grammar's
+    ?rule forms, but every identifier use still parses as
+    id_usage -> [IDENTIFIER, id_usagetail -> [group_or_list, unary_op]],
+    with both suffix nodes empty. Empty suffixes are dropped, and so is an
+    id_usagetail left without children, so a plain variable reference is
+    id_usage -> [IDENTIFIER]. The visitors read id_usage children past the
+    identifier as optional, so their results are unchanged.
+    """
+    for node in tree.iter_subtrees():
+        if node.data != 'id_usage' or len(node.children) != 2:
+            continue
+        tail = node.children[1]
+        if not isinstance(tail, Tree) or tail.data != 'id_usagetail':
+            continue
+        tail.children = [child for child in tail.children
+                         if not (isinstance(child, Tree) and child.data in OPTIONAL_SUFFIXES
+                                 and not child.children)]
+        if not tail.children:
+            del node.children[1]
+    return tree
@@ -0,0 +1,211 @@
+import hashlib
+import io
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import redirect_stdout
+
+from backend.Lexer.minima_lexer import Lexer
+from backend.Syntax.syntax_analyzer import analyze_syntax
+from backend.Semantic.semantic_analyzer import SemanticAnalyzer
+from backend.CodegenTAC.code_generator import TACGenerator
+from backend.CodegenTAC.tac_program import TACProgram
+from backend.CodegenTAC.tac_transpiler import TACTranspiler
+
+# Estimated bytes an artifact keeps for each stage, measured with
+# tracemalloc on sample programs
+TOKEN_BYTES = 32            # per token, for each TokenBuffer
+PARSE_TREE_BYTES = 240      # per token, for the parse tree
+ANALYSIS_BYTES = 40         # per source character, for the semantic analyzer
+INSTRUCTION_BYTES = 80      # per TAC instruction
+TRANSPILED_BYTES = 3        # per character of transpiled source, with its code
+
+def normalize_source(code):
+    """Normalize newlines the same way the lexer does."""
+    return code.replace('\r\n', '\n').replace('\r', '\n')
+
+def source_key(code):
+    """Hash of the normalized source, used as the cache key."""
+    return hashlib.sha256(normalize_source(code).encode('utf-8')).hexdigest()
+
+class CompilationArtifact:
+    """
+    Everything the front end produces for one source text: tokens, lexer
+    errors, the parse tree or syntax error, the semantic analyzer, the
+    generated TAC, kept as a TACProgram, and its transpiled Python form.
+
+    Each stage runs the first time it is asked for and is kept afterwards.
+    The semantic analyzer logs to stdout; that output is recorded and
+    written again on every analyze() call, so routes that capture stdout
+    get the same terminal output on a cache hit.
+
+    weight estimates the bytes the artifact keeps. It starts at the
+    source length and grows as each stage is filled in, and the cache the
+    artifact is in, if any, is told of each increase.
+    """
+
+    def __init__(self, code, key=None):
+        self.code = normalize_source(code)
+        self.key = key or source_key(self.code)
+        self.lock = threading.RLock()
+        self.token_buffers = {}         # coalesce_whitespace -> TokenBuffer
+        self.lexer_errors = None
+        self.parse_result = None
+        self.semantic_analyzer = None
+        self.semantic_output = ''
+        self.tac_program = None
+        self.transpiled_program = None
+        self.transpile_attempted = False
+        self.weight = len(self.code)
+        self.cache = None
+
+    def grow(self, amount):
+        """Add amount to the weight, for a stage that has just been filled in."""
+        self.weight += amount
+        if self.cache is not None:
+            self.cache.grown(self, amount)
+
+    def tokens(self, coalesce_whitespace=False):
+        """The TokenBuffer for the source, in either whitespace mode."""
+        with self.lock:
+            tokens = self.token_buffers.get(coalesce_whitespace)
+            if tokens is None:
+                lexer = Lexer(self.code, coalesce_whitespace=coalesce_whitespace)
+                tokens = self.token_buffers[coalesce_whitespace] = lexer.tokenize_compact()
+                if self.lexer_errors is None:
+                    self.lexer_errors = lexer.errors
+                self.grow(len(tokens) * TOKEN_BYTES)
+            return tokens
+
+    @property
+    def errors(self):
+        """Lexical errors and warnings, in the order the lexer reported them."""
+        with self.lock:
+            if self.lexer_errors is None:
+                # Whitespace is skipped by the parser, so fold it into runs
+                self.tokens(coalesce_whitespace=True)
+            return self.lexer_errors
+
+    def parse(self):
+        """(success, parse tree or syntax error dict), as from analyze_syntax."""
+        with self.lock:
+            if self.parse_result is None:
+                # Both whitespace modes parse the same; reuse whichever was lexed
+                tokens = next(iter(self.token_buffers.values()), None)
+                if tokens is None:
+                    tokens = self.tokens(coalesce_whitespace=True)
+                self.parse_result = analyze_syntax(self.code, pre_analyzed_tokens=tokens)
+                if self.parse_result[0]:
+                    self.grow(len(tokens) * PARSE_TREE_BYTES)
+            return self.parse_result
+
+    def analyze(self):
+        """The SemanticAnalyzer after analyzing the parse tree."""
+        with self.lock:
+            if self.semantic_analyzer is None:
+                parse_tree = self.parse()[1]
+                output_buffer = io.StringIO()
+                with redirect_stdout(output_buffer):
+                    semantic_analyzer = SemanticAnalyzer()
+                    semantic_analyzer.analyze(parse_tree)
+                self.semantic_analyzer = semantic_analyzer
+                self.semantic_output = output_buffer.getvalue()
+                self.grow(len(self.code) * ANALYSIS_BYTES + len(self.semantic_output))
+        sys.stdout.write(self.semantic_output)
+        return self.semantic_analyzer
+
+    def program(self):
+        """The TACProgram generated from the parse tree."""
+        with self.lock:
+            if self.tac_program is None:
+                code_generator = TACGenerator()
+                tac_instructions = code_generator.generate(self.parse()[1])
+                self.tac_program = TACProgram.from_instructions(
+                    tac_instructions, getattr(code_generator, 'source_positions', None))
+                self.grow(len(self.tac_program) * INSTRUCTION_BYTES)
+            return self.tac_program
+
+    def transpiled(self):
+        """The TranspiledProgram for the TAC, or None when it is left to the interpreter."""
+        with self.lock:
+            if not self.transpile_attempted:
+                self.transpiled_program = TACTranspiler().transpile(self.program())
+                self.transpile_attempted = True
+                if self.transpiled_program is not None:
+                    self.grow(len(self.transpiled_program.source) * TRANSPILED_BYTES)
+            return self.transpiled_program
+
+    def generate(self):
+        """(TAC instructions, source positions) for the parse tree, as lists of tuples."""
+        return self.program().to_tuples()
+
+class CompilationCache:
+    """
+    Process-wide LRU cache of CompilationArtifacts keyed by source hash.
+
+    Entries are evicted least recently used first once there are more than
+    max_entries of them or their weights add up to more than max_size, an
+    estimate in bytes (see CompilationArtifact). Artifacts grow as their
+    stages run, so the limit is enforced then too.
+    """
+
+    def __init__(self, max_entries=128, max_size=128 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.total_size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, code):
+        """Return the artifact for code, creating an empty one on a miss."""
+        key = source_key(code)
+        with self.lock:
+            artifact = self.entries.get(key)
+            if artifact is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return artifact
+            self.misses += 1
+            artifact = CompilationArtifact(code, key)
+            artifact.cache = self
+            self.entries[key] = artifact
+            self.total_size += artifact.weight
+            self.evict()
+            return artifact
+
+    def grown(self, artifact, amount):
+        """Count amount more for artifact, unless it has been evicted already."""
+        with self.lock:
+            if self.entries.get(artifact.key) is artifact:
+                self.total_size += amount
+                self.evict()
+
+    def evict(self):
+        # Called with the lock held; always keeps the most recent entry
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or
+                                         self.total_size > self.max_size):
+            _, evicted = self.entries.popitem(last=False)
+            evicted.cache = None
+            self.total_size -= evicted.weight
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_size = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'size': self.total_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+# Shared by every route
+compilation_cache = CompilationCache()
@@ -1,11 +1,9 @@
 import os
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from backend.Lexer.minima_lexer import Lexer  
-from backend.Syntax.syntax_analyzer import analyze_syntax, parser
-from backend.Semantic.semantic_analyzer import SemanticAnalyzer 
 from backend.CodegenTAC.code_executor import execute_code, format_tac_instructions
 from backend.CodegenTAC.built_in_functions import MinimaBultins
+from backend.compilation_cache import compilation_cache
 import io
 from contextlib import redirect_stdout
 
@@ -23,70 +21,269 @@ CORS(app, origins=allowed_origins, supports_credentials=True)
 
 execution_states = {} #debugging purposes
 
+def serialize_tokens(all_tokens, coalesce_whitespace=False):
+    """Token list for the editor"""
+    tokens = []
+    for token in all_tokens:
+        token_info = {
+            'type': token.type, # could be IDENTIFIER, INTEGERLITERAL, etc.
+            'value': token.value, # the actual value of the token, examples are x, 123, etc.
+            'line': token.line, # the line number where the token was found
+            'column': token.column # the column number where the token was found
+        }
+        if coalesce_whitespace and token.type == 'WHITESPACE':
+            token_info['endLine'] = token.end_line
+            token_info['endColumn'] = token.end_column
+            token_info['newlines'] = token.newlines
+        if token.warning:
+            token_info['warning'] = token.warning
+        tokens.append(token_info)
+    return tokens
+
+def collect_errors(artifact):
+    """
+    Lexical errors and warnings, syntax errors and semantic errors, each
+    phase running only if the previous one succeeded.
+    """
+    # Split warnings from errors
+    lexical_errors = []
+    lexical_warnings = []
+    for issue in artifact.errors:
+        if hasattr(issue, 'is_warning') and issue.is_warning:
+            lexical_warnings.append(issue.to_dict())
+        else:
+            lexical_errors.append(issue.to_dict())
+    
+    syntax_errors = []
+    semantic_errors  = []
+    if not lexical_errors: #if lexical_errors dictionary is empty, continue with syntax analysis
+        # Parse tree and semantic results are shared through the cache
+        success, result = artifact.parse()
+        if success:
+            semantic_analyzer = artifact.analyze()
+            semantic_errors = [error.to_dict() for error in semantic_analyzer.errors]
+        else:
+            syntax_errors = [result]
+            semantic_errors = [{
+                "type": "semantic",
+                "message": "Syntax errors detected. Resolve them before semantic analysis."
+            }]
+    else:
+        syntax_errors = [{
+            "type": "syntax",
+            "message": "Lexical errors detected. Resolve them before syntax analysis."
+        }]
+        semantic_errors = [{
+            "type": "semantic",
+            "message": "Lexical errors detected. Resolve them before syntax and semantic analysis."
+        }]
+    return {
+        'lexicalErrors': lexical_errors,
+        'lexicalWarnings': lexical_warnings,
+        'syntaxErrors': syntax_errors,
+        'semanticErrors': semantic_errors
+    }
+
+def serialize_parse_tree(node):
+    """Convert the parse tree to a JSON-friendly format"""
+    if hasattr(node, 'data') and hasattr(node, 'children'):
+        return {
+            'name': str(node.data),
+            'children': [serialize_parse_tree(child) for child in node.children]
+        }
+    elif hasattr(node, 'value') and hasattr(node, 'type'):
+        return {
+            'name': f"{node.type}: {node.value}"
+        }
+    else:
+        return {'name': str(node)}
+
+def serialize_symbol_table(semantic_analyzer):
+    """Convert the symbol table of an analyzed program to a JSON-friendly format"""
+    symbols = []
+    
+    # Dictionary to track which functions variables belong to
+    function_scopes = {}
+    
+    # First, collect function definitions to initialize function_scopes
+    for name, symbol in semantic_analyzer.global_scope.functions.items():
+        return_type = "empty"
+        if name in semantic_analyzer.function_returns:
+            return_info = semantic_analyzer.function_returns[name]
+            if isinstance(return_info, tuple) and len(return_info) >= 1:
+                return_type = return_info[0]
+        
+        symbols.append({
+            'name': name,
+            'kind': 'function',
+            'scope': 'global',
+            'params': symbol.params,
+            'returnType': return_type,
+            'line': symbol.line,
+            'column': symbol.column
+        })
+        
+        # Initialize scope tracking for this function
+        function_scopes[name] = []
+    
+    # Helper function to recursively process all scopes
+    def process_symbol_table(scope, parent_scope_name=None):
+        # Process variables in this scope
+        for name, symbol in scope.variables.items():
+            var_type = "unknown"
+            var_value = None
+            
+            if hasattr(symbol, "value") and symbol.value:
+                if isinstance(symbol.value, tuple) and len(symbol.value) >= 1:
+                    var_type = symbol.value[0]
+                    if len(symbol.value) >= 2:
+                        var_value = str(symbol.value[1]) if symbol.value[1] is not None else "null"
+            
+            # Determine the scope type
+            scope_type = "global"
+            if parent_scope_name:
+                scope_type = f"local:{parent_scope_name}"
+            
+            symbol_info = {
+                'name': name,
+                'kind': 'variable',
+                'scope': scope_type,
+                'type': var_type,
+                'value': var_value,
+                'fixed': symbol.fixed,
+                'line': symbol.line,
+                'column': symbol.column
+            }
+            
+            symbols.append(symbol_info)
+            
+            # If this is a function parameter, track it
+            if parent_scope_name and name in semantic_analyzer.global_scope.functions.get(parent_scope_name, {}).params:
+                symbol_info['isParameter'] = True
+            
+            # Track local variables for each function
+            if parent_scope_name and parent_scope_name in function_scopes:
+                function_scopes[parent_scope_name].append(symbol_info)
+    
+    # Process all global variables
+    process_symbol_table(semantic_analyzer.global_scope)
+    
+    # Process function scopes
+    for function_name, function_locals in semantic_analyzer.function_scopes.items():
+        if function_locals:
+            # We need to store the parameter values separately since they are stored in the scope
+            for local_scope in function_locals:
+                process_symbol_table(local_scope, function_name)
+    
+    # Add built-in functions
+    builtin_functions = semantic_analyzer.builtin_functions
+    for name, info in builtin_functions.items():
+        symbols.append({
+            'name': name,
+            'kind': 'function',
+            'scope': 'builtin',
+            'params': info.get('params', -1),  # -1 means variable arguments
+            'returnType': info.get('return_type', 'unknown'),
+            'isBuiltin': True
+        })
+    return symbols
+
 @app.route('/analyze_full', methods=['POST'])
 def analyze_full():
     data = request.get_json()
     minima_code_input = data.get('code', '')
+    # Opt-in: one token per whitespace run instead of per character
+    coalesce_whitespace = bool(data.get('coalesceWhitespace', False))
     output_buffer = io.StringIO()
     with redirect_stdout(output_buffer):
-        lexer = Lexer(minima_code_input)
-        all_tokens = lexer.tokenize_all()
-        tokens = []
-        for token in all_tokens:
-            token_info = {
-                'type': token.type, # could be IDENTIFIER, INTEGERLITERAL, etc.
-                'value': token.value, # the actual value of the token, examples are x, 123, etc.
-                'line': token.line, # the line number where the token was found
-                'column': token.column # the column number where the token was found
-            }
-            if token.warning:
-                token_info['warning'] = token.warning
-            tokens.append(token_info)
-        
-        # Split warnings from errors
-        lexical_errors = []
-        lexical_warnings = []
-        for issue in lexer.errors:
-            if hasattr(issue, 'is_warning') and issue.is_warning:
-                lexical_warnings.append(issue.to_dict())
-            else:
-                lexical_errors.append(issue.to_dict())
-        
-        syntax_errors = []
-        semantic_errors  = []
-        if not lexical_errors: #if lexical_errors dictionary is empty, continue with syntax analysis
-            # Pass the tokens and lexical errors to avoid redundant analysis
-            success, result = analyze_syntax(minima_code_input, pre_analyzed_tokens=all_tokens, lexical_errors=lexical_errors)
-            if success:
-                parse_tree = result
-                semantic_analyzer = SemanticAnalyzer()
-                semantic_analyzer.analyze(parse_tree)
-                semantic_errors = [error.to_dict() for error in semantic_analyzer.errors]
-            else:
-                syntax_errors = [result]
-                semantic_errors = [{
-                    "type": "semantic",
-                    "message": "Syntax errors detected. Resolve them before semantic analysis."
-                }]
-        else:
-            syntax_errors = [{
-                "type": "syntax",
-                "message": "Lexical errors detected. Resolve them before syntax analysis."
-            }]
-            semantic_errors = [{
-                "type": "semantic",
-                "message": "Lexical errors detected. Resolve them before syntax and semantic analysis."
-            }]
+        artifact = compilation_cache.get(minima_code_input)
+        tokens = serialize_tokens(artifact.tokens(coalesce_whitespace), coalesce_whitespace)
+        errors = collect_errors(artifact)
     terminal_output = output_buffer.getvalue()
     return jsonify({
         'tokens': tokens,
-        'lexicalErrors': lexical_errors,
-        'lexicalWarnings': lexical_warnings,
-        'syntaxErrors': syntax_errors,
-        'semanticErrors': semantic_errors,
+        **errors,
         'terminalOutput': terminal_output
     })
 
+# Sections /analyze can return
+ANALYSIS_SECTIONS = ('tokens', 'errors', 'ast', 'symbols', 'tac')
+
+@app.route('/analyze', methods=['POST'])
+def analyze():
+    """
+    Run the pipeline once and return only the requested sections.
+    'want' lists any of tokens, errors, ast, symbols and tac, as a JSON list
+    or a comma-separated string (body or query string); the default is
+    tokens and errors. Sections whose phase could not run are null.
+    """
+    data = request.get_json()
+    minima_code_input = data.get('code', '')
+    coalesce_whitespace = bool(data.get('coalesceWhitespace', False))
+    want = request.args.get('want') or data.get('want') or ['tokens', 'errors']
+    if isinstance(want, str):
+        want = want.strip('[]').split(',')
+    if not isinstance(want, list) or not all(isinstance(section, str) for section in want):
+        return jsonify({
+            'success': False,
+            'error': "'want' must be a list of section names or a comma-separated string"
+        }), 400
+    want = {section.strip() for section in want if section.strip()}
+    unknown_sections = sorted(want.difference(ANALYSIS_SECTIONS))
+    if unknown_sections:
+        return jsonify({
+            'success': False,
+            'error': f"Unknown sections requested: {', '.join(unknown_sections)}"
+        }), 400
+
+    response = {'success': True}
+    output_buffer = io.StringIO()
+    try:
+        with redirect_stdout(output_buffer):
+            artifact = compilation_cache.get(minima_code_input)
+            if 'tokens' in want:
+                response['tokens'] = serialize_tokens(artifact.tokens(coalesce_whitespace), coalesce_whitespace)
+
+            # Run the front end as far as the requested sections need
+            if want & {'errors', 'symbols', 'tac'}:
+                errors = collect_errors(artifact)
+                if 'errors' in want:
+                    response.update(errors)
+            elif 'ast' in want:
+                lexical_errors = [error for error in artifact.errors if not (hasattr(error, 'is_warning') and error.is_warning)]
+                if not lexical_errors:
+                    artifact.parse()
+
+            # Later phases reuse the results computed above
+            parse_result = artifact.parse_result
+            parse_tree = parse_result[1] if parse_result and parse_result[0] else None
+            semantic_analyzer = artifact.semantic_analyzer
+            if 'ast' in want:
+                response['ast'] = serialize_parse_tree(parse_tree) if parse_tree is not None else None
+            if 'symbols' in want:
+                if semantic_analyzer is not None:
+                    response['symbols'] = serialize_symbol_table(semantic_analyzer)
+                    response['hasErrors'] = bool(semantic_analyzer.errors)
+                else:
+                    response['symbols'] = None
+            if 'tac' in want:
+                # TAC is only generated for semantically valid programs
+                if semantic_analyzer is not None and not semantic_analyzer.errors:
+                    tac_instructions, source_positions = artifact.generate()
+                    response['tac'] = tac_instructions
+                    response['formattedTAC'] = format_tac_instructions(tac_instructions, source_positions)
+                else:
+                    response['tac'] = None
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': f'Error analyzing code: {str(e)}'
+        })
+    response['terminalOutput'] = output_buffer.getvalue()
+    return jsonify(response)
+
 @app.route('/getSymbolTable', methods=['POST'])
 def get_symbol_table():
     data = request.get_json()
@@ -100,11 +297,10 @@ def get_symbol_table():
     
     try:
         # First check for lexical errors
-        lexer = Lexer(minima_code_input)
-        all_tokens = lexer.tokenize_all()
+        artifact = compilation_cache.get(minima_code_input)
         
         # Filter out warnings from actual errors
-        lexical_errors = [error for error in lexer.errors if not (hasattr(error, 'is_warning') and error.is_warning)]
+        lexical_errors = [error for error in artifact.errors if not (hasattr(error, 'is_warning') and error.is_warning)]
         
         if lexical_errors:
             return jsonify({
@@ -113,7 +309,7 @@ def get_symbol_table():
             })
         
         # If no lexical errors, try to parse
-        success, result = analyze_syntax(minima_code_input, pre_analyzed_tokens=all_tokens, lexical_errors=lexical_errors)
+        success, result = artifact.parse()
         if not success:
             return jsonify({
                 'success': False,
@@ -122,8 +318,7 @@ def get_symbol_table():
             })
         
         # Run semantic analysis to build the symbol table
-        semantic_analyzer = SemanticAnalyzer()
-        semantic_analyzer.analyze(result)
+        semantic_analyzer = artifact.analyze()
         
         if semantic_analyzer.errors:
             # If there are semantic errors, we still return the symbol table but flag the issues
@@ -131,93 +326,7 @@ def get_symbol_table():
         else:
             has_errors = False
         
-        # Convert the symbol table to a JSON-friendly format
-        symbols = []
-        
-        # Dictionary to track which functions variables belong to
-        function_scopes = {}
-        
-        # First, collect function definitions to initialize function_scopes
-        for name, symbol in semantic_analyzer.global_scope.functions.items():
-            return_type = "empty"
-            if name in semantic_analyzer.function_returns:
-                return_info = semantic_analyzer.function_returns[name]
-                if isinstance(return_info, tuple) and len(return_info) >= 1:
-                    return_type = return_info[0]
-            
-            symbols.append({
-                'name': name,
-                'kind': 'function',
-                'scope': 'global',
-                'params': symbol.params,
-                'returnType': return_type,
-                'line': symbol.line,
-                'column': symbol.column
-            })
-            
-            # Initialize scope tracking for this function
-            function_scopes[name] = []
-        
-        # Helper function to recursively process all scopes
-        def process_symbol_table(scope, parent_scope_name=None):
-            # Process variables in this scope
-            for name, symbol in scope.variables.items():
-                var_type = "unknown"
-                var_value = None
-                
-                if hasattr(symbol, "value") and symbol.value:
-                    if isinstance(symbol.value, tuple) and len(symbol.value) >= 1:
-                        var_type = symbol.value[0]
-                        if len(symbol.value) >= 2:
-                            var_value = str(symbol.value[1]) if symbol.value[1] is not None else "null"
-                
-                # Determine the scope type
-                scope_type = "global"
-                if parent_scope_name:
-                    scope_type = f"local:{parent_scope_name}"
-                
-                symbol_info = {
-                    'name': name,
-                    'kind': 'variable',
-                    'scope': scope_type,
-                    'type': var_type,
-                    'value': var_value,
-                    'fixed': symbol.fixed,
-                    'line': symbol.line,
-                    'column': symbol.column
-                }
-                
-                symbols.append(symbol_info)
-                
-                # If this is a function parameter, track it
-                if parent_scope_name and name in semantic_analyzer.global_scope.functions.get(parent_scope_name, {}).params:
-                    symbol_info['isParameter'] = True
-                
-                # Track local variables for each function
-                if parent_scope_name and parent_scope_name in function_scopes:
-                    function_scopes[parent_scope_name].append(symbol_info)
-        
-        # Process all global variables
-        process_symbol_table(semantic_analyzer.global_scope)
-        
-        # Process function scopes
-        for function_name, function_locals in semantic_analyzer.function_scopes.items():
-            if function_locals:
-                # We need to store the parameter values separately since they are stored in the scope
-                for local_scope in function_locals:
-                    process_symbol_table(local_scope, function_name)
-        
-        # Add built-in functions
-        builtin_functions = semantic_analyzer.builtin_functions
-        for name, info in builtin_functions.items():
-            symbols.append({
-                'name': name,
-                'kind': 'function',
-                'scope': 'builtin',
-                'params': info.get('params', -1),  # -1 means variable arguments
-                'returnType': info.get('return_type', 'unknown'),
-                'isBuiltin': True
-            })
+        symbols = serialize_symbol_table(semantic_analyzer)
         
         return jsonify({
             'success': True,
@@ -245,11 +354,10 @@ def get_ast():
     
     try:
         # First check for lexical errors
-        lexer = Lexer(minima_code_input)
-        all_tokens = lexer.tokenize_all()
+        artifact = compilation_cache.get(minima_code_input)
         
         # Filter out warnings from actual errors
-        lexical_errors = [error for error in lexer.errors if not (hasattr(error, 'is_warning') and error.is_warning)]
+        lexical_errors = [error for error in artifact.errors if not (hasattr(error, 'is_warning') and error.is_warning)]
         
         if lexical_errors:
             return jsonify({
@@ -258,7 +366,7 @@ def get_ast():
             })
         
         # If no lexical errors, try to parse
-        success, result = analyze_syntax(minima_code_input, pre_analyzed_tokens=all_tokens, lexical_errors=lexical_errors)
+        success, result = artifact.parse()
         if not success:
             return jsonify({
                 'success': False,
@@ -266,21 +374,7 @@ def get_ast():
                 'syntaxError': result
             })
         
-        # Convert the parse tree to a JSON-friendly format
-        def process_tree(node):
-            if hasattr(node, 'data') and hasattr(node, 'children'):
-                return {
-                    'name': str(node.data),
-                    'children': [process_tree(child) for child in node.children]
-                }
-            elif hasattr(node, 'value') and hasattr(node, 'type'):
-                return {
-                    'name': f"{node.type}: {node.value}"
-                }
-            else:
-                return {'name': str(node)}
-        
-        ast_json = process_tree(result)
+        ast_json = serialize_parse_tree(result)
         
         return jsonify({
             'success': True,
@@ -313,6 +407,11 @@ def execute_code_route():
         result['formattedTAC'] = format_tac_instructions(result['tac'])
     return jsonify(result)
 
+@app.route('/cacheStats', methods=['GET'])
+def cache_stats():
+    """Return the compilation cache counters"""
+    return jsonify(compilation_cache.stats())
+
 @app.route('/api/builtin-functions', methods=['GET'])
 def get_builtin_functions():
     """Return the list of built-in function names for the editor highlighting"""
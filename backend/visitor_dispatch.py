@@ -0,0 +1,31 @@
+# visitor_dispatch.py
+#
+# Rule-name dispatch for the AST visitors. The visit_<rule> methods of a
+# visitor class are collected once per class; each visitor instance binds
+# them once, so visiting a node is a dict lookup on node.data instead of
+# building "visit_<rule>" and probing it with hasattr/getattr.
+
+HANDLER_PREFIX = 'visit_'
+
+
+def handler_table(cls):
+    """
+    Rule name -> visit_<rule> function of cls (including inherited ones),
+    built on first use and kept on the class.
+    """
+    table = cls.__dict__.get('_handler_table')
+    if table is None:
+        table = {}
+        for name in dir(cls):
+            if name.startswith(HANDLER_PREFIX):
+                handler = getattr(cls, name)
+                if callable(handler):
+                    table[name[len(HANDLER_PREFIX):]] = handler
+        cls._handler_table = table
+    return table
+
+
+def bind_handlers(visitor):
+    """Rule name -> handler bound to visitor, for the visitor's visit()."""
+    return {rule: handler.__get__(visitor)
+            for rule, handler in handler_table(type(visitor)).items()}
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+
+from backend.Syntax.syntax_analyzer import PARSER_LEXERS, build_parser, parser_cache_path, remove_stale_parser_caches
+
+def main():
+    # Build step: serialize the LALR tables so workers skip grammar analysis
+    for lexer in PARSER_LEXERS:
+        cache_path = parser_cache_path(lexer)
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+        start_time = time.perf_counter()
+        build_parser(use_cache=True, lexer=lexer)
+        build_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        build_parser(use_cache=True, lexer=lexer)
+        load_time = time.perf_counter() - start_time
+
+        print(f"Parser cache ({lexer} lexer): {cache_path}")
+        print(f"Build: {build_time * 1000:.1f} ms")
+        print(f"Load from cache: {load_time * 1000:.1f} ms")
+    remove_stale_parser_caches()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# Usage: interpreter_bench.py [scale] [repeats] [baseline revision]
+#
+# Times the interpreter's backends against the interpreter.py of the
+# baseline revision, read with git show. Without git or that revision
+# (a shallow clone, an export) the baseline column is left out.
+import io
+import os
+import statistics
+import subprocess
+import sys
+import time
+import types
+from contextlib import redirect_stdout
+from functools import partial
+
+from backend.compilation_cache import CompilationArtifact
+from backend.CodegenTAC.interpreter import TACInterpreter
+from backend.CodegenTAC.tac_transpiler import TACTranspiler
+
+# Revision whose interpreter the others are compared with by default: the
+# tree before the interpreter was reworked
+BASELINE_REVISION = "b10876fa9e9e2574816d93d4fcad0c782e39b994"
+
+FIBONACCI = """func fib(n) {{
+    checkif (n < 2) {{
+        throw n;
+    }}
+    throw fib(n - 1) + fib(n - 2);
+}}
+show(fib({n}));
+"""
+
+BUBBLE_SORT = """var nums = [{values}];
+var n = length(nums);
+var i = 0;
+var j = 0;
+each (i = 0; i < n - 1; i++) {{
+    each (j = 0; j < n - i - 1; j++) {{
+        checkif (nums[j] > nums[j + 1]) {{
+            var tmp = nums[j];
+            nums[j] = nums[j + 1];
+            nums[j + 1] = tmp;
+        }}
+    }}
+}}
+show(nums);
+"""
+
+DEEP_RECURSION = """var step = 1;
+func depth(n) {{
+    checkif (n < 1) {{
+        throw 0;
+    }}
+    throw depth(n - step) + step;
+}}
+var total = 0;
+var k = 0;
+each (k = 0; k < 20; k++) {{
+    total = total + depth({n});
+}}
+show(total);
+"""
+
+STRING_BUILDING = """var s = "";
+var k = 0;
+each (k = 0; k < {n}; k++) {{
+    s = s + "item " + text(k) + ";";
+    show(k);
+    show("\\n");
+}}
+show(length(s));
+"""
+
+def make_programs(scale):
+    values = ', '.join(str((i * 37) % 101) for i in range(int(40 * scale)))
+    return (("fibonacci", FIBONACCI.format(n=int(15 + scale))),
+            ("bubble sort", BUBBLE_SORT.format(values=values)),
+            ("deep recursion", DEEP_RECURSION.format(n=int(200 * scale))),
+            ("string building", STRING_BUILDING.format(n=int(2000 * scale))))
+
+class HandlerTableTACInterpreter(TACInterpreter):
+    """TACInterpreter running every instruction through its handler, without the specialized closures."""
+
+    def compiled_steps(self):
+        code = self.code
+        return [partial(self.handlers[code.opcodes[ip]], *code.instruction(ip)[1:], code.targets[ip])
+                for ip in range(len(code))]
+
+def load_baseline_interpreter(revision):
+    """
+    A TACInterpreter subclass of the interpreter.py at the git revision, run
+    on the same program, or None when it cannot be loaded. Its step counts
+    differ from the current ones, so runs are compared by time.
+    """
+    path = "backend/CodegenTAC/interpreter.py"
+    try:
+        shown = subprocess.run(["git", "show", f"{revision}:{path}"], capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError as e:
+        shown = subprocess.CompletedProcess(e.filename, 1, '', str(e))
+    if shown.returncode != 0:
+        print(f"Cannot load the baseline interpreter from {revision}, leaving it out: "
+              f"{shown.stderr.strip()}", file=sys.stderr)
+        return None
+    module = types.ModuleType("baseline_interpreter")
+    exec(compile(shown.stdout, f"{revision}:{path}", "exec"), module.__dict__)
+
+    class BaselineTACInterpreter(module.TACInterpreter):
+        def load(self, program):
+            return super().load(*program.to_tuples())
+
+    return BaselineTACInterpreter
+
+def compile_program(code):
+    artifact = CompilationArtifact(code)
+    with redirect_stdout(io.StringIO()):
+        if artifact.errors or not artifact.parse()[0] or artifact.analyze().errors:
+            print(f"Benchmark program does not compile:\n{code}", file=sys.stderr)
+            sys.exit(1)
+        return artifact.program()
+
+def run_program(interpreter_class, program, transpiled=None):
+    """(steps executed, output) of one run, through the transpiled program if given."""
+    interpreter = interpreter_class().load(program)
+    interpreter.set_execution_limit(None)
+    with redirect_stdout(io.StringIO()):
+        output = transpiled.run(interpreter) if transpiled else interpreter.run()
+    return interpreter.steps_executed, output
+
+def time_runs(backends, program, repeats):
+    """Median time of one run for each (interpreter class, transpiled program); runs are interleaved."""
+    times = [[] for _ in backends]
+    for _ in range(repeats):
+        for backend_times, (interpreter_class, transpiled) in zip(times, backends):
+            start_time = time.perf_counter()
+            run_program(interpreter_class, program, transpiled)
+            backend_times.append(time.perf_counter() - start_time)
+    return [statistics.median(backend_times) for backend_times in times]
+
+def main():
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+    revision = sys.argv[3] if len(sys.argv) > 3 else BASELINE_REVISION
+    baseline_class = load_baseline_interpreter(revision)
+
+    if baseline_class is None:
+        print(f"median of {repeats} runs, ms per run")
+    else:
+        print(f"median of {repeats} runs, ms per run; speedups over the interpreter at {revision}")
+    for label, code in make_programs(scale):
+        program = compile_program(code)
+        transpiled = TACTranspiler().transpile(program)
+        if transpiled is None:
+            print(f"{label}: the transpiler does not take the program", file=sys.stderr)
+            sys.exit(1)
+        backends = ((HandlerTableTACInterpreter, None), (TACInterpreter, None), (TACInterpreter, transpiled))
+        steps, output = run_program(TACInterpreter, program)
+        for interpreter_class, backend_program in backends:
+            if run_program(interpreter_class, program, backend_program) != (steps, output):
+                print(f"{label}: {interpreter_class.__name__} disagrees", file=sys.stderr)
+                sys.exit(1)
+        if baseline_class is None:
+            table_time, closure_time, transpiled_time = time_runs(backends, program, repeats)
+            print(f"  {label:16} {steps:7} steps   handler table {table_time * 1000:7.1f}   "
+                  f"closures {closure_time * 1000:7.1f}   transpiled {transpiled_time * 1000:7.1f}")
+            continue
+        if run_program(baseline_class, program)[1] != output:
+            print(f"{label}: the baseline interpreter disagrees", file=sys.stderr)
+            sys.exit(1)
+        baseline_time, table_time, closure_time, transpiled_time = time_runs(
+            ((baseline_class, None),) + backends, program, repeats)
+        print(f"  {label:16} {steps:7} steps   baseline {baseline_time * 1000:7.1f}   "
+              f"handler table {table_time * 1000:7.1f} ({baseline_time / table_time:4.2f}x)   "
+              f"closures {closure_time * 1000:7.1f} ({baseline_time / closure_time:4.2f}x)   "
+              f"transpiled {transpiled_time * 1000:7.1f} ({baseline_time / transpiled_time:5.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+import sys
+from collections import Counter
+
+from backend.Lexer.minima_lexer import Lexer
+
+def check_file(file_path):
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            content = file.read()
+    except FileNotFoundError:
+        print(f"Error: File '{file_path}' not found.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error reading file: {e}")
+        sys.exit(1)
+
+    # Tokens are streamed and counted, never collected into a list
+    lexer = Lexer(content)
+    counts = Counter()
+    for token in lexer.iter_tokens():
+        counts['INVALID' if token.type == 'INVALID' else
+                'IDENTIFIER' if token.type.startswith('IDENTIFIER_') else
+                'WHITESPACE' if token.type == 'WHITESPACE' else 'OTHER'] += 1
+
+    return counts, lexer.errors
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python lex_check.py <filename>")
+        sys.exit(1)
+
+    filename = sys.argv[1]
+    counts, errors = check_file(filename)
+
+    print(f"File: {filename}")
+    print(f"Total tokens: {sum(counts.values())}")
+    print(f"Whitespace tokens: {counts['WHITESPACE']}")
+    print(f"Identifier tokens: {counts['IDENTIFIER']}")
+    print(f"Invalid tokens: {counts['INVALID']}")
+    print(f"Lexical errors: {len(errors)}")
+    for error in errors:
+        print(f"  line {error.line}, column {error.column}: {error.message}")
+
+    sys.exit(1 if errors else 0)
+
+if __name__ == "__main__":
+    main()
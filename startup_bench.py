@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in a fresh interpreter: time from the first backend import until the
+# first /analyze_full response is built
+COLD_START = """
+import time
+start_time = time.perf_counter()
+from backend.main import app
+import_time = time.perf_counter() - start_time
+response = app.test_client().post('/analyze_full', json={'code': 'var x = 1;\\nshow(x);\\n'})
+assert response.status_code == 200
+print(import_time, time.perf_counter() - start_time)
+"""
+
+def cold_start(use_cache):
+    env = dict(os.environ, MINIMA_PARSER_CACHE="1" if use_cache else "0")
+    output = subprocess.run([sys.executable, "-c", COLD_START], env=env, check=True,
+                            capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    import_time, first_response_time = map(float, output.split()[-2:])
+    return import_time, first_response_time
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    # Make sure the cache is current before timing the cached starts
+    cold_start(use_cache=True)
+
+    print(f"Cold start, median of {runs} runs")
+    for label, use_cache in (("no parser cache", False), ("parser cache", True)):
+        times = [cold_start(use_cache) for _ in range(runs)]
+        import_time = statistics.median(t[0] for t in times)
+        first_response_time = statistics.median(t[1] for t in times)
+        print(f"  {label:16} import {import_time * 1000:7.1f} ms   first response {first_response_time * 1000:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
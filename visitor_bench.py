@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+import io
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+
+from backend.Syntax.syntax_analyzer import analyze_syntax
+from backend.Semantic.semantic_analyzer import SemanticAnalyzer
+from backend.CodegenTAC.code_generator import TACGenerator
+
+# Repeated to reach the requested number of lines
+PROGRAM_BLOCK = """var a{n} = {n} + 2 * (3 - {n} % 4);
+var b{n} = a{n} * 3 - (a{n} + 1) / 2;
+checkif (a{n} > b{n}) {{
+    show(a{n} - b{n});
+}} recheck (a{n} == b{n}) {{
+    show(0);
+}} otherwise {{
+    b{n} += 1;
+}}
+each (var i{n} = 0; i{n} < 3; i{n}++) {{
+    a{n} = a{n} + i{n} * 2;
+}}
+repeat (b{n} > 100) {{
+    b{n} = b{n} - 7;
+}}
+show(a{n} + b{n});
+"""
+
+def make_program(lines):
+    blocks = []
+    count = 0
+    n = 0
+    while count < lines:
+        block = PROGRAM_BLOCK.format(n=n)
+        blocks.append(block)
+        count += block.count('\n')
+        n += 1
+    return ''.join(blocks)
+
+class LegacySemanticAnalyzer(SemanticAnalyzer):
+    """SemanticAnalyzer with the getattr-based dispatch it used before the handler table."""
+
+    def visit(self, tree):
+        if not hasattr(tree, "data"):
+            if hasattr(tree, "type"):
+                return self.visit_token(tree)
+            else:
+                return None
+        method_name = f"visit_{tree.data}"
+        if hasattr(self, method_name):
+            method = getattr(self, method_name)
+            return method(tree)
+        else:
+            for child in tree.children:
+                if hasattr(child, "data") or hasattr(child, "type"):
+                    self.visit(child)
+            return None
+
+class LegacyTACGenerator(TACGenerator):
+    """TACGenerator with the getattr-based dispatch and parenthesis scans it used before."""
+
+    def visit(self, tree):
+        if not hasattr(tree, "data"):
+            if hasattr(tree, "type"):
+                return self.visit_token(tree)
+            return None
+        if tree.data == "primary_expr" and len(tree.children) > 1:
+            if (hasattr(tree.children[0], "type") and tree.children[0].type == "LPAREN" and
+                hasattr(tree.children[-1], "type") and tree.children[-1].type == "RPAREN"):
+                if self.debug_mode:
+                    print(f"Prioritizing parenthesized expression: {tree.data}")
+                method = getattr(self, f"visit_{tree.data}")
+                return method(tree)
+        if tree.data in ("add_expr", "mul_expr", "expression"):
+            for child in tree.children:
+                if hasattr(child, "data") and child.data == "primary_expr":
+                    if (len(child.children) > 1 and
+                        hasattr(child.children[0], "type") and child.children[0].type == "LPAREN"):
+                        if self.debug_mode:
+                            print(f"Found parenthesized subexpression in {tree.data}")
+        method_name = f"visit_{tree.data}"
+        if hasattr(self, method_name):
+            method = getattr(self, method_name)
+            return method(tree)
+        else:
+            result = None
+            for child in tree.children:
+                if hasattr(child, "data") or hasattr(child, "type"):
+                    result = self.visit(child)
+            return result
+
+def count_visits(visitor_class, run):
+    """Number of visit() calls one pass makes."""
+    calls = [0]
+    class Counting(visitor_class):
+        def visit(self, tree):
+            calls[0] += 1
+            return super().visit(tree)
+    run(Counting)
+    return calls[0]
+
+def time_passes(visitor_classes, run, repeats):
+    """Median time of one pass for each class; runs are interleaved."""
+    times = [[] for _ in visitor_classes]
+    for _ in range(repeats):
+        for class_times, visitor_class in zip(times, visitor_classes):
+            start_time = time.perf_counter()
+            run(visitor_class)
+            class_times.append(time.perf_counter() - start_time)
+    return [statistics.median(class_times) for class_times in times]
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+
+    code = make_program(lines)
+    success, tree = analyze_syntax(code)
+    if not success:
+        print(f"Generated program does not parse: {tree['message']}")
+        sys.exit(1)
+
+    def semantic(visitor_class):
+        with redirect_stdout(io.StringIO()):
+            visitor_class().analyze(tree)
+
+    def codegen(visitor_class):
+        visitor_class().generate(tree)
+
+    print(f"{code.count(chr(10))} lines, median of {repeats} runs")
+    for label, run, legacy_class, table_class in (
+            ("semantic", semantic, LegacySemanticAnalyzer, SemanticAnalyzer),
+            ("codegen", codegen, LegacyTACGenerator, TACGenerator)):
+        visits = count_visits(table_class, run)
+        legacy_time, table_time = time_passes((legacy_class, table_class), run, repeats)
+        saved = (legacy_time - table_time) / visits * 1e9
+        print(f"  {label:8} {visits} visits   getattr dispatch {legacy_time * 1000:7.1f} ms "
+              f"({legacy_time / visits * 1e9:6.0f} ns/visit)   handler table {table_time * 1000:7.1f} ms "
+              f"({table_time / visits * 1e9:6.0f} ns/visit)   saved {saved:4.0f} ns/visit")
+
+if __name__ == "__main__":
+    main()